@@ -1,12 +1,35 @@
+import time
+_script_start = time.perf_counter()
+import startup_profile
+startup_profile.install_import_profiler()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from kmodes.kprototypes import KPrototypes
-from fpdf import FPDF
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import tempfile
+import uuid
+
+import instrumentation
+
+from schema import CATEGORICAL_COLS, CLUSTER_LABEL_DTYPE, memory_report, legacy_memory_estimate
+from clustering import (CLUSTERING_ENGINES, cached_fit_kprototypes, cached_warm_fit_kprototypes, fingerprint_dataframe,
+                        make_cache_key)
+from cluster_profile import build_cluster_profile, describe_clusters, get_or_build_profile
+from kproto_engine import MiniBatchKPrototypes
+from ingestion import SUPPORTED_UPLOAD_TYPES, load_uploaded_table
+from prediction import predict_batch, to_excel_bytes
+from preprocessing import preprocess_table
+from student_index import MEMBER_PAGE_SIZE, SEARCH_PAGE_SIZE, get_cluster_membership, get_student_index
+from charts import CHART_PNG_WIDTH, cluster_profile_chart, new_student_chart, student_profile_chart
+from artifact_store import list_versions, load_artifacts, save_artifacts
+# PERBAIKAN: scikit-learn, kmodes, fpdf dan matplotlib tidak diimpor di sini; modul
+# yang membutuhkannya (sweep K, laporan akurasi, PDF) diimpor di cabang menu terkait
+# sehingga layar pemilihan peran tidak menanggung waktu impornya.
+
+# PERBAIKAN: Copy-on-write agar frame turunan (data praproses, data hasil klaster)
+# memakai kolom yang sama dengan data asli alih-alih menyalin seluruh tabel.
+pd.set_option("mode.copy_on_write", True)
 
 # --- KONSTANTA GLOBAL ---
 PRIMARY_COLOR = "#2C2F7F"
@@ -19,12 +42,6 @@ ACTIVE_BUTTON_BG_COLOR = "#3F51B5"
 ACTIVE_BUTTON_TEXT_COLOR = "#FFFFFF"
 ACTIVE_BUTTON_BORDER_COLOR = "#FFD700"
 
-ID_COLS = ["No", "Nama", "JK", "Kelas"]
-NUMERIC_COLS = ["Rata Rata Nilai Akademik", "Kehadiran"]
-CATEGORICAL_COLS = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian",
-                    "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
-ALL_FEATURES_FOR_CLUSTERING = NUMERIC_COLS + CATEGORICAL_COLS
-
 # --- CUSTOM CSS & HEADER ---
 custom_css = f"""
 <style>
@@ -399,130 +416,347 @@ st.markdown(header_html, unsafe_allow_html=True)
 
 # --- FUNGSI PEMBANTU ---
 
+@instrumentation.timed("pdf")
 def generate_pdf_profil_siswa(nama, data_siswa_dict, klaster, cluster_desc_map):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.set_text_color(44, 47, 127)
-    pdf.cell(0, 10, "PROFIL SISWA - HASIL KLASTERISASI", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font("Arial", "", 10)
-    pdf.set_text_color(0, 0, 0)
-    keterangan_umum = (
-        "Laporan ini menyajikan profil detail siswa berdasarkan hasil pengelompokan "
-        "menggunakan Algoritma K-Prototype. Klasterisasi dilakukan berdasarkan "
-        "nilai akademik, kehadiran, dan partisipasi ekstrakurikuler siswa. "
-        "Informasi klaster ini dapat digunakan untuk memahami kebutuhan siswa dan "
-        "merancang strategi pembinaan yang sesuai."
-    )
-    pdf.multi_cell(0, 5, keterangan_umum, align='J')
-    pdf.ln(5)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, f"Nama Siswa: {nama}", ln=True)
-    pdf.cell(0, 8, f"Klaster Hasil: {klaster}", ln=True)
-    pdf.ln(3)
-    klaster_desc = cluster_desc_map.get(klaster, "Deskripsi klaster tidak tersedia.")
-    pdf.set_font("Arial", "I", 10)
-    pdf.set_text_color(80, 80, 80)
-    pdf.multi_cell(0, 5, f"Karakteristik Klaster {klaster}: {klaster_desc}", align='J')
-    pdf.ln(5)
-    pdf.set_font("Arial", "", 10)
-    pdf.set_text_color(0, 0, 0)
-    ekskul_diikuti = []
-    ekskul_cols_full_names = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian", "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
-    for col in ekskul_cols_full_names:
-        val = data_siswa_dict.get(col)
-        if val is not None and (val == 1 or str(val).strip() == '1'):
-            ekskul_diikuti.append(col.replace("Ekstrakurikuler ", ""))
-
-    display_data = {
-        "Nomor Induk": data_siswa_dict.get("No", "-"),
-        "Jenis Kelamin": data_siswa_dict.get("JK", "-"),
-        "Kelas": data_siswa_dict.get("Kelas", "-"),
-        "Rata-rata Nilai Akademik": f"{data_siswa_dict.get('Rata Rata Nilai Akademik', '-'):.2f}",
-        "Persentase Kehadiran": f"{data_siswa_dict.get('Kehadiran', '-'):.2%}",
-        "Ekstrakurikuler yang Diikuti": ", ".join(ekskul_diikuti) if ekskul_diikuti else "Tidak mengikuti ekstrakurikuler",
-    }
-    for key, val in display_data.items():
-        pdf.cell(0, 7, f"{key}: {val}", ln=True)
+    from pdf_reports import generate_profile_pdf
     try:
-        pdf_output = pdf.output(dest='S').encode('latin-1')
-        return bytes(pdf_output)
+        return generate_profile_pdf(nama, data_siswa_dict, klaster, cluster_desc_map)
     except Exception as e:
         st.error(f"Error saat mengonversi PDF: {e}. Coba pastikan tidak ada karakter aneh pada data.")
         return None
 
+@instrumentation.timed("praproses")
 def preprocess_data(df):
-    df_processed = df.copy()
-    df_processed.columns = [col.strip() for col in df_processed.columns]
-    missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in df_processed.columns]
-    if missing_cols:
-        st.error(f"Kolom-kolom berikut tidak ditemukan dalam data Anda: {', '.join(missing_cols)}. Harap periksa file Excel Anda dan pastikan nama kolom sudah benar.")
+    # PERBAIKAN: Tabel bertipe ringkas (flag uint8, numerik float32); kolom ekstrakurikuler
+    # tidak lagi diubah menjadi string sehingga tidak ada matriks object saat klasterisasi.
+    try:
+        df_clean_for_clustering, scaler, filled = preprocess_table(df)
+    except ValueError as e:
+        st.error(str(e))
         return None, None
-    df_clean_for_clustering = df_processed.drop(columns=ID_COLS, errors="ignore")
-    for col in CATEGORICAL_COLS:
-        df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(0).astype(str)
-    for col in NUMERIC_COLS:
-        if df_clean_for_clustering[col].isnull().any():
-            mean_val = df_clean_for_clustering[col].mean()
-            df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(mean_val)
-            st.warning(f"Nilai kosong pada kolom '{col}' diisi dengan rata-rata: {mean_val:.2f}.")
-    scaler = StandardScaler()
-    df_clean_for_clustering[NUMERIC_COLS] = scaler.fit_transform(df_clean_for_clustering[NUMERIC_COLS])
+    for col, mean_val in filled.items():
+        st.warning(f"Nilai kosong pada kolom '{col}' diisi dengan rata-rata: {mean_val:.2f}.")
     return df_clean_for_clustering, scaler
 
-def run_kprototypes_clustering(df_preprocessed, n_clusters):
-    df_for_clustering = df_preprocessed.copy()
-    X_data = df_for_clustering[ALL_FEATURES_FOR_CLUSTERING]
-    X = X_data.to_numpy()
-    categorical_feature_indices = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
+@instrumentation.timed("fit_kprototypes")
+def run_kprototypes_clustering(df_preprocessed, n_clusters, engine="kmodes", warm_model=None):
+    # PERBAIKAN: Hasil disimpan di cache bersama (kunci: sidik jari data + K + parameter)
+    # sehingga rerun Streamlit tidak melatih ulang model dari awal. Bila warm_model diberikan,
+    # fit dimulai dari prototipe model tersebut; hasilnya disimpan dengan kunci sendiri
+    # (termasuk sidik jari prototipe awal) sehingga tidak pernah tertukar dengan fit dingin.
     try:
-        kproto = KPrototypes(n_clusters=n_clusters, init='Huang', n_init=10, verbose=0, random_state=42, n_jobs=-1)
-        clusters = kproto.fit_predict(X, categorical=categorical_feature_indices)
+        if warm_model is not None:
+            (clusters, kproto, categorical_feature_indices), info = cached_warm_fit_kprototypes(
+                df_preprocessed, n_clusters, warm_model, engine=engine
+            )
+            if info is not None:
+                st.caption(f"{info['Mode']}: biaya {info['Biaya Akhir']:.2f} (acuan {info['Biaya Acuan']:.2f}) "
+                           f"dalam {info['Waktu (detik)']:.2f} detik.")
+        else:
+            clusters, kproto, categorical_feature_indices = cached_fit_kprototypes(df_preprocessed, n_clusters, engine=engine)
     except Exception as e:
         st.error(f"Terjadi kesalahan saat menjalankan K-Prototypes: {e}. Pastikan data Anda cukup bervariasi untuk jumlah klaster yang dipilih.")
         return None, None, None
-    df_for_clustering["Klaster"] = clusters
+    df_for_clustering = df_preprocessed.assign(Klaster=clusters.astype(CLUSTER_LABEL_DTYPE))
     return df_for_clustering, kproto, categorical_feature_indices
 
-def generate_cluster_descriptions(df_clustered, n_clusters, numeric_cols, categorical_cols):
-    cluster_characteristics_map = {}
-    if 'df_original' not in st.session_state or st.session_state.df_original is None:
-        return {}
-    
-    df_original_numeric = st.session_state.df_original[NUMERIC_COLS]
-    for i in range(n_clusters):
-        cluster_data = df_clustered[df_clustered["Klaster"] == i]
-        avg_scaled_values = cluster_data[numeric_cols].mean()
-        mode_values = cluster_data[categorical_cols].mode().iloc[0]
-        desc = ""
-        if avg_scaled_values["Rata Rata Nilai Akademik"] > 0.75:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat tinggi. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] > 0.25:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di atas rata-rata. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.75:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat rendah. "
-        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.25:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di bawah rata-rata. "
-        else:
-            desc += "Siswa di klaster ini memiliki nilai akademik cenderung rata-rata. "
-        if avg_scaled_values["Kehadiran"] > 0.75:
-            desc += "Tingkat kehadiran cenderung sangat tinggi. "
-        elif avg_scaled_values["Kehadiran"] > 0.25:
-            desc += "Tingkat kehadiran cenderung di atas rata-rata. "
-        elif avg_scaled_values["Kehadiran"] < -0.75:
-            desc += "Tingkat kehadiran cenderung sangat rendah. "
-        elif avg_scaled_values["Kehadiran"] < -0.25:
-            desc += "Tingkat kehadiran cenderung di bawah rata-rata. "
-        else:
-            desc += "Tingkat kehadiran cenderung rata-rata. "
-        ekskul_aktif_modes = [col_name for col_name in categorical_cols if mode_values[col_name] == '1']
-        if ekskul_aktif_modes:
-            desc += f"Siswa di klaster ini aktif dalam ekstrakurikuler: {', '.join([c.replace('Ekstrakurikuler ', '') for c in ekskul_aktif_modes])}."
-        else:
-            desc += "Siswa di klaster ini kurang aktif dalam kegiatan ekstrakurikuler."
-        cluster_characteristics_map[i] = desc
-    return cluster_characteristics_map
+@instrumentation.timed("profil_deskripsi")
+def store_clustering_result(df_clustered, kproto_model, categorical_features_indices, k, engine, incremental_state=None):
+    # df_clustered: data praproses beserta kolom Klaster, sejajar (indeks sama) dengan df_original.
+    st.session_state.df_clustered = st.session_state.df_original.assign(Klaster=df_clustered["Klaster"])
+    st.session_state.kproto_model = kproto_model
+    st.session_state.categorical_features_indices = categorical_features_indices
+    st.session_state.n_clusters = k
+    st.session_state.clustering_engine = engine
+    st.session_state.incremental_state = incremental_state
+    st.session_state.cluster_profile = build_cluster_profile(
+        st.session_state.df_original, df_clustered, df_clustered["Klaster"], k
+    )
+    st.session_state.cluster_characteristics_map = describe_clusters(
+        st.session_state.cluster_profile
+    )
+
+@instrumentation.timed("tambah_inkremental")
+def append_students_incrementally(df_new):
+    # Siswa tambahan dinormalisasi dengan scaler tersimpan dan ditugaskan ke prototipe yang
+    # ada; prototipe diperbarui online. Fit ulang penuh (scaler baru + K-Prototypes) hanya
+    # dijalankan bila ukuran drift melewati ambang batas. Mengembalikan (statistik, drift,
+    # daftar ambang yang terlewati).
+    # PERBAIKAN: incremental.append_students menyiapkan semua hasil tanpa mengubah sesi;
+    # session state baru diubah setelah penugasan atau fit ulang berhasil, sehingga kegagalan
+    # tidak meninggalkan df_original, df_clustered dan state yang saling tidak cocok.
+    from incremental import IncrementalClusterState, append_students
+    engine, k = st.session_state.clustering_engine, st.session_state.n_clusters
+    state = st.session_state.incremental_state
+    if state is None:
+        state = IncrementalClusterState.from_clustered(
+            st.session_state.df_clustered, st.session_state.kproto_model, st.session_state.scaler,
+            st.session_state.categorical_features_indices, features=st.session_state.df_preprocessed_for_clustering,
+        )
+
+    def refit(df_original):
+        df_preprocessed, scaler = preprocess_data(df_original)
+        if df_preprocessed is None:
+            raise ValueError("Praproses untuk klasterisasi ulang penuh gagal; data sesi tidak diubah.")
+        df_clustered, kproto_model, categorical_features_indices = run_kprototypes_clustering(df_preprocessed, k, engine=engine)
+        if df_clustered is None:
+            raise ValueError("Klasterisasi ulang penuh gagal; data sesi tidak diubah.")
+        return {"df_preprocessed": df_preprocessed, "scaler": scaler, "df_clustered": df_clustered,
+                "model": kproto_model, "categorical": categorical_features_indices}
+
+    result = append_students(state, st.session_state.df_original, st.session_state.df_preprocessed_for_clustering,
+                             st.session_state.df_clustered, df_new, refit)
+    st.session_state.df_original = result["df_original"]
+    st.session_state.df_preprocessed_for_clustering = result["df_preprocessed"]
+    if result["exceeded"]:
+        st.session_state.scaler = result["scaler"]
+        store_clustering_result(result["df_clustered"], result["model"], result["categorical"], k, engine)
+    else:
+        store_clustering_result(result["df_clustered"], result["model"], st.session_state.categorical_features_indices,
+                                k, engine, incremental_state=result["state"])
+    publish_clustering_result(engine)
+    return result["stats"], result["drift"], result["exceeded"]
+
+@instrumentation.timed("klaster_partisi")
+def run_partitioned_clustering(partition_key, k, engine):
+    # Satu model per nilai partition_key (mis. Kelas atau Sekolah), difit paralel. Hasilnya
+    # disimpan terpisah dari model global, sehingga menu visualisasi dan prediksi siswa
+    # tunggal tetap memakai model global.
+    from partitioning import fit_partitioned, save_partitioned_artifacts
+    df_partitioned, model, stats = fit_partitioned(st.session_state.df_original, partition_key, k, engine=engine)
+    st.session_state.partitioned_result = {"model": model, "df_clustered": df_partitioned, "stats": stats}
+    try:
+        save_partitioned_artifacts(model, df_clustered=df_partitioned)
+    except Exception as e:
+        st.warning(f"Model per partisi tidak dapat disimpan sebagai artefak: {e}")
+    return st.session_state.partitioned_result
+
+def publish_clustering_result(engine):
+    # Menyimpan model, scaler dan hasil klasterisasi sebagai versi artefak baru agar
+    # sesi lain (mis. Kepala Sekolah) dan layanan skoring dapat memuatnya tanpa fit ulang.
+    try:
+        version = save_artifacts(
+            st.session_state.scaler,
+            st.session_state.kproto_model,
+            st.session_state.categorical_features_indices,
+            st.session_state.cluster_characteristics_map,
+            fingerprint_dataframe(st.session_state.df_preprocessed_for_clustering),
+            df_clustered=st.session_state.df_clustered,
+            engine=engine,
+            cluster_profile=st.session_state.cluster_profile,
+        )
+    except Exception as e:
+        st.warning(f"Hasil klasterisasi tidak dapat disimpan sebagai artefak model: {e}")
+        return None
+    st.session_state.model_version = version
+    return version
+
+@instrumentation.timed("muat_model")
+def load_published_result(version=None):
+    bundle = load_artifacts(version)
+    if bundle["df_clustered"] is None:
+        raise FileNotFoundError(f"Versi {bundle['version']} tidak menyimpan data hasil klasterisasi.")
+    st.session_state.df_clustered = bundle["df_clustered"]
+    st.session_state.df_original = bundle["df_clustered"].drop(columns=["Klaster"])
+    st.session_state.scaler = bundle["scaler"]
+    st.session_state.kproto_model = bundle["model"]
+    st.session_state.categorical_features_indices = bundle["categorical_indices"]
+    st.session_state.cluster_characteristics_map = bundle["cluster_desc_map"]
+    st.session_state.cluster_profile = bundle["cluster_profile"]
+    st.session_state.n_clusters = bundle["meta"]["n_clusters"]
+    st.session_state.model_version = bundle["version"]
+    st.session_state.incremental_state = None
+    return bundle
+
+def k_slider_max():
+    # Batas atas slider K mengikuti rentang sweep terakhir agar semua K hasil sweep dapat dipilih.
+    if st.session_state.get("k_sweep_results") is not None:
+        return max(6, int(st.session_state.k_sweep_results["K"].max()))
+    return 6
+
+@instrumentation.timed("grafik")
+def show_chart(build_chart, *args):
+    # Vega-Lite dirender di browser; PNG hanya bila backend matplotlib dipilih (CHART_BACKEND).
+    chart = build_chart(*args)
+    if "png" in chart:
+        st.image(chart["png"], width=CHART_PNG_WIDTH)
+    else:
+        st.vega_lite_chart(chart["data"], chart["spec"], use_container_width=True)
+
+def chart_scope():
+    # Cakupan kunci cache grafik: versi model yang dimuat, atau hash unggahan bila belum dipublikasikan.
+    return st.session_state.model_version or st.session_state.upload_hash
+
+@instrumentation.timed("profil_klaster")
+def render_cluster_profiles(profile, cluster_desc_map, scope):
+    # Dipakai oleh halaman visualisasi Operator TU dan Kepala Sekolah; hanya membaca
+    # ringkasan profil klaster tanpa menyentuh tabel siswa.
+    for i in range(profile["n_clusters"]):
+        st.markdown("---")
+        st.subheader(f"Klaster {i}")
+        norm_mean = profile["norm_mean"].loc[i]
+        flag_mode = profile["flag_mode"].loc[i]
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.markdown("#### Statistik Klaster")
+            st.markdown(f"Jumlah Siswa: {int(profile['counts'].loc[i])}")
+            st.write("Rata-rata Nilai & Kehadiran (Dinormalisasi dan Nilai Asli):")
+            st.dataframe(pd.DataFrame({'Rata-rata': norm_mean, 'Nilai Asli': profile["raw_mean"].loc[i]}).round(2), use_container_width=True)
+            if "raw_median" in profile:
+                st.write("Sebaran Nilai Asli (Kuartil):")
+                sebaran = pd.DataFrame({
+                    'Q1': profile["raw_q25"].loc[i], 'Median': profile["raw_median"].loc[i],
+                    'Q3': profile["raw_q75"].loc[i], 'Std': profile["raw_std"].loc[i],
+                })
+                st.dataframe(sebaran.round(2), use_container_width=True)
+            st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
+            st.write("Kecenderungan Ekstrakurikuler (Modus):")
+            mode_ekskul_display = flag_mode.apply(lambda x: 'Ya' if x == 1 else 'Tidak')
+            st.dataframe(mode_ekskul_display.to_frame(name='Paling Umum'), use_container_width=True)
+            st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
+            st.info(f"Ringkasan Karakteristik Klaster {i}:\n{cluster_desc_map.get(i, 'Deskripsi tidak tersedia.')}")
+        with col2:
+            st.markdown("#### Grafik Profil Klaster")
+            st.write("📈 Visualisasi ini menunjukkan rata-rata (numerik) atau modus (kategorikal) dari fitur-fitur di klaster ini.")
+            values_for_plot = norm_mean.fillna(0).tolist() + [int(v) for v in flag_mode.tolist()]
+            # PERBAIKAN: Grafik Vega-Lite dari DataFrame kecil (atau PNG ter-cache bila backend matplotlib).
+            show_chart(cluster_profile_chart, scope, i, values_for_plot)
+
+@instrumentation.timed("cari_siswa")
+def select_student(df_clustered, key_prefix):
+    # PERBAIKAN: Pencarian lewat indeks siswa (dibangun sekali per dataset) dengan hasil
+    # berhalaman, menggantikan satu selectbox berisi semua nama dan filter Nama == nama.
+    index = get_student_index(df_clustered, chart_scope())
+    col_cari, col_halaman = st.columns([3, 1])
+    with col_cari:
+        kata_kunci = st.text_input("Cari Nama atau Nomor Induk", key=f"{key_prefix}_student_query",
+                                   help="Ketik awalan atau potongan nama; ejaan yang sedikit salah tetap dicari.")
+    hasil = index.search(kata_kunci)
+    if len(hasil) == 0:
+        st.warning("Tidak ada siswa yang cocok dengan pencarian.")
+        return None
+    jumlah_halaman = -(-len(hasil) // SEARCH_PAGE_SIZE)
+    with col_halaman:
+        # Kunci mengikuti kata kunci agar halaman kembali ke 1 setiap pencarian baru.
+        halaman = st.number_input("Halaman", min_value=1, max_value=jumlah_halaman, value=1, step=1,
+                                  key=f"{key_prefix}_student_page::{kata_kunci}")
+    st.caption(f"{len(hasil)} siswa ditemukan (halaman {halaman} dari {jumlah_halaman}).")
+    mulai = (halaman - 1) * SEARCH_PAGE_SIZE
+    pilihan = [int(p) for p in hasil[mulai:mulai + SEARCH_PAGE_SIZE]]
+    posisi_tersimpan = st.session_state.get(f"{key_prefix}_selected_student_pos")
+    default_index = pilihan.index(posisi_tersimpan) if posisi_tersimpan in pilihan else 0
+    posisi_terpilih = st.selectbox("Pilih Nama Siswa", pilihan, index=default_index, format_func=index.label,
+                                   key=f"{key_prefix}_student_select", help="Pilih siswa yang profilnya ingin Anda lihat.")
+    st.session_state[f"{key_prefix}_selected_student_pos"] = posisi_terpilih
+    return posisi_terpilih
+
+def render_cluster_members(df_clustered, klaster, posisi_siswa, key_prefix):
+    # PERBAIKAN: Anggota klaster diambil dari indeks posisi baris dan hanya halaman yang
+    # ditampilkan yang diformat dan dikirim ke browser (bukan seluruh klaster).
+    membership = get_cluster_membership(df_clustered["Klaster"].to_numpy(), chart_scope())
+    jumlah_lain = len(membership.members(klaster)) - 1
+    if jumlah_lain <= 0:
+        st.info("Tidak ada siswa lain dalam klaster ini.")
+        return
+    jumlah_halaman = -(-jumlah_lain // MEMBER_PAGE_SIZE)
+    st.write("Berikut adalah daftar siswa lain yang juga tergolong dalam klaster ini:")
+    halaman = st.number_input("Halaman", min_value=1, max_value=jumlah_halaman, value=1, step=1,
+                              key=f"{key_prefix}_member_page::{klaster}")
+    posisi_halaman, jumlah_lain, jumlah_halaman = membership.page(klaster, exclude_position=posisi_siswa, page=halaman)
+    display_cols_for_others = ["No", "Nama", "JK", "Kelas", "Rata Rata Nilai Akademik", "Kehadiran"]
+    display_df_others = df_clustered.iloc[posisi_halaman][display_cols_for_others]
+    display_df_others = display_df_others.assign(Kehadiran=display_df_others["Kehadiran"].map("{:.2%}".format))
+    st.dataframe(display_df_others, use_container_width=True, hide_index=True)
+    st.caption(f"{jumlah_lain} siswa lain (halaman {halaman} dari {jumlah_halaman}).")
+
+@instrumentation.timed("tabel")
+def show_table_preview(df, dataset_key, key_prefix, interactive=True):
+    # dataset_key harus berubah setiap isi tabel berubah (hash unggahan atau fingerprint_dataframe),
+    # karena tabel Arrow, urutan dan filter di-cache per kunci ini.
+    # PERBAIKAN: Pratinjau tabel tidak lagi mengirim seluruh tabel ke browser. Hanya jendela
+    # baris dan kolom yang terlihat yang dikirim; urut dan filter dihitung di server pada
+    # tabel Arrow yang di-cache per versi dataset. Tanpa kontrol (interactive=False) hanya
+    # halaman pertama yang ditampilkan, untuk hasil di dalam blok tombol.
+    from data_preview import DEFAULT_PAGE_ROWS, PAGE_ROW_OPTIONS, preview_window
+    kolom = list(df.columns)
+    if not interactive:
+        window, total, _, _ = preview_window(df, dataset_key, page_rows=DEFAULT_PAGE_ROWS)
+        st.dataframe(window, use_container_width=True, hide_index=True)
+        st.caption(f"Menampilkan {window.num_rows} dari {total} baris.")
+        return
+    with st.expander("Atur Tampilan Tabel"):
+        kolom_terpilih = st.multiselect("Kolom Ditampilkan", kolom, default=kolom, key=f"{key_prefix}_preview_cols")
+        col_urut, col_arah = st.columns([3, 1])
+        with col_urut:
+            urut = st.selectbox("Urutkan Berdasarkan", ["(Tanpa Urutan)"] + kolom, key=f"{key_prefix}_preview_sort")
+        with col_arah:
+            naik = st.checkbox("Naik", value=True, key=f"{key_prefix}_preview_asc")
+        col_filter, col_teks = st.columns([1, 2])
+        with col_filter:
+            kolom_filter = st.selectbox("Filter Kolom", kolom, key=f"{key_prefix}_preview_filter_col")
+        with col_teks:
+            teks_filter = st.text_input("Berisi Teks", key=f"{key_prefix}_preview_filter_text")
+    col_baris, col_halaman = st.columns([1, 1])
+    with col_baris:
+        baris_per_halaman = st.selectbox("Baris per Halaman", PAGE_ROW_OPTIONS,
+                                         index=PAGE_ROW_OPTIONS.index(DEFAULT_PAGE_ROWS), key=f"{key_prefix}_preview_rows")
+    with col_halaman:
+        # Kunci mengikuti filter agar halaman kembali ke 1 setiap filter berubah.
+        halaman = st.number_input("Halaman", min_value=1, value=1, step=1,
+                                  key=f"{key_prefix}_preview_page::{kolom_filter}::{teks_filter}")
+    window, total, jumlah_halaman, mulai = preview_window(
+        df, dataset_key, columns=kolom_terpilih or kolom, sort_by=None if urut == "(Tanpa Urutan)" else urut,
+        ascending=naik, filter_column=kolom_filter, filter_text=teks_filter, page=halaman, page_rows=baris_per_halaman,
+    )
+    st.dataframe(window, use_container_width=True, hide_index=True)
+    if total:
+        st.caption(f"Baris {mulai + 1}–{mulai + window.num_rows} dari {total} "
+                   f"(halaman {min(halaman, jumlah_halaman)} dari {jumlah_halaman}).")
+    else:
+        st.caption("Tidak ada baris yang cocok dengan filter.")
+
+@instrumentation.timed("pdf_massal")
+def render_bulk_report_export(df_clustered, cluster_desc_map, key_prefix):
+    # Ekspor laporan PDF massal per Kelas, per Klaster atau seluruh sekolah. Halaman ditulis
+    # bertahap ke file sementara di disk, bukan ditumpuk sebagai ribuan objek bytes di sesi;
+    # hanya arsip akhirnya yang dibaca untuk tombol unduh.
+    from pdf_reports import REPORT_FORMATS, export_reports, select_students
+    st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
+    st.subheader("Unduh Laporan PDF Massal")
+    lingkup = st.radio("Cakupan Laporan", ["Per Kelas", "Per Klaster", "Seluruh Sekolah"], horizontal=True, key=f"{key_prefix}_bulk_scope")
+    kelas, klaster = None, None
+    if lingkup == "Per Kelas":
+        kelas = st.selectbox("Pilih Kelas", sorted(df_clustered["Kelas"].dropna().astype(str).unique()), key=f"{key_prefix}_bulk_kelas")
+    elif lingkup == "Per Klaster":
+        klaster = st.selectbox("Pilih Klaster", sorted(df_clustered["Klaster"].unique()), key=f"{key_prefix}_bulk_klaster")
+    fmt = st.radio("Format", list(REPORT_FORMATS), format_func=REPORT_FORMATS.get, horizontal=True, key=f"{key_prefix}_bulk_format")
+    df_students = select_students(df_clustered, kelas=kelas, klaster=klaster)
+    st.caption(f"{len(df_students)} siswa akan dibuatkan laporan.")
+    if st.button("Buat Laporan Massal", key=f"{key_prefix}_bulk_run", disabled=df_students.empty):
+        progress = st.progress(0.0, text="Menyiapkan laporan...")
+        # Satu file sementara unik per ekspor: semua sesi Streamlit berbagi satu proses.
+        fd, out_path = tempfile.mkstemp(prefix=f"laporan_{key_prefix}_", suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            stats = export_reports(
+                df_students, cluster_desc_map, out_path, fmt=fmt,
+                progress_callback=lambda done, total: progress.progress(done / total, text=f"{done}/{total} siswa"),
+            )
+            with open(out_path, "rb") as f:
+                report_bytes = f.read()
+        except Exception as e:
+            st.error(f"Gagal membuat laporan massal: {e}")
+            return
+        finally:
+            os.remove(out_path)
+        st.success(f"{stats['Jumlah Halaman']} halaman dibuat dalam {stats['Waktu (detik)']:.1f} detik ({stats['Halaman per Detik']:.1f} halaman/detik).")
+        st.download_button(
+            label="Unduh Laporan Massal",
+            data=report_bytes,
+            file_name=f"Laporan_Profil_Siswa.{fmt}",
+            mime="application/zip" if fmt == "zip" else "application/pdf",
+            key=f"{key_prefix}_bulk_download",
+        )
 
 # --- INISIALISASI SESSION STATE ---
 if 'role' not in st.session_state:
@@ -541,8 +775,25 @@ if 'categorical_features_indices' not in st.session_state:
     st.session_state.categorical_features_indices = None
 if 'n_clusters' not in st.session_state:
     st.session_state.n_clusters = 3
+if 'clustering_engine' not in st.session_state:
+    st.session_state.clustering_engine = "kmodes"
+if 'k_sweep_results' not in st.session_state:
+    st.session_state.k_sweep_results = None
+if 'upload_hash' not in st.session_state:
+    st.session_state.upload_hash = None
+if 'model_version' not in st.session_state:
+    st.session_state.model_version = None
 if 'cluster_characteristics_map' not in st.session_state:
     st.session_state.cluster_characteristics_map = {}
+if 'cluster_profile' not in st.session_state:
+    st.session_state.cluster_profile = None
+if 'incremental_state' not in st.session_state:
+    st.session_state.incremental_state = None
+if 'partitioned_result' not in st.session_state:
+    st.session_state.partitioned_result = None
+if 'instrumentation_session' not in st.session_state:
+    st.session_state.instrumentation_session = uuid.uuid4().hex[:8]
+instrumentation.begin_rerun(st.session_state.instrumentation_session)
 if 'current_menu' not in st.session_state:
     st.session_state.current_menu = None
 if 'kepsek_current_menu' not in st.session_state:
@@ -628,29 +879,58 @@ def show_operator_tu_page():
         st.header("Unggah Data Siswa")
         st.markdown("""
         <div style='background-color:#e3f2fd; padding:15px; border-radius:10px; border-left: 5px solid #2196F3;'>
-        Silakan unggah file Excel (.xlsx) yang berisi dataset siswa. Pastikan file Anda memiliki
+        Silakan unggah file Excel (.xlsx) yang berisi dataset siswa. Untuk ekspor data berukuran besar,
+        file CSV (.csv) dan Parquet (.parquet) juga didukung. Pastikan file Anda memiliki
         kolom-kolom berikut agar sistem dapat bekerja dengan baik:<br><br>
         <ul>
             <li><b>Kolom Identitas:</b> "No", "Nama", "JK", "Kelas"</li>
             <li><b>Kolom Numerik (untuk analisis):</b> "Rata Rata Nilai Akademik", "Kehadiran"</li>
-            <li><b>Kolom Kategorikal (untuk analisis, nilai 0 atau 1):</b> "Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian", "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"</li>
+            <li><b>Kolom Kategorikal (untuk analisis, nilai 0/1 atau Ya/Tidak; sel kosong dianggap 0):</b> "Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian", "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"</li>
         </ul>
         Pastikan nama kolom sudah persis sama dan tidak ada kesalahan penulisan.
         </div>
         """, unsafe_allow_html=True)
         st.markdown("---")
-        uploaded_file = st.file_uploader("Pilih File Excel Dataset", type=["xlsx"], help="Unggah file Excel Anda di sini. Hanya format .xlsx yang didukung.")
+        uploaded_file = st.file_uploader("Pilih File Dataset", type=SUPPORTED_UPLOAD_TYPES, help="Unggah file Excel (.xlsx), CSV (.csv) atau Parquet (.parquet) Anda di sini.")
         if uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-                st.session_state.df_original = df
-                st.session_state.df_clustered = None
-                st.success("Data berhasil diunggah! Anda dapat melanjutkan ke langkah praproses.")
+                # PERBAIKAN: File hanya diparse sekali per isi (hash byte). Rerun atau unggahan
+                # ulang file yang sama tidak lagi menghapus hasil praproses dan klasterisasi.
+                with instrumentation.stage("baca_file"):
+                    upload_hash, df = load_uploaded_table(uploaded_file.name, uploaded_file.getvalue())
+                if st.session_state.upload_hash != upload_hash:
+                    st.session_state.df_original = df
+                    st.session_state.df_preprocessed_for_clustering = None
+                    st.session_state.df_clustered = None
+                    st.session_state.cluster_profile = None
+                    st.session_state.incremental_state = None
+                    st.session_state.partitioned_result = None
+                    # Versi model lama tidak lagi menggambarkan data ini; chart_scope() kembali ke
+                    # hash unggahan sehingga indeks siswa dan cache grafik tidak memakai data lama.
+                    st.session_state.model_version = None
+                    st.session_state.upload_hash = upload_hash
+                    st.success("Data berhasil diunggah! Anda dapat melanjutkan ke langkah praproses.")
+                else:
+                    st.info("File ini sudah dimuat sebelumnya. Hasil praproses dan klasterisasi yang ada tetap dipertahankan.")
                 st.subheader("Preview Data yang Diunggah:")
-                st.dataframe(df, use_container_width=True, height=300)
+                show_table_preview(df, ("upload", upload_hash), "upload")
                 st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
             except Exception as e:
-                st.error(f"Terjadi kesalahan saat membaca file: {e}. Pastikan format file Excel benar dan tidak rusak.")
+                st.error(f"Terjadi kesalahan saat membaca file: {e}. Pastikan format file benar dan tidak rusak.")
+        if st.session_state.df_original is not None:
+            with st.expander("Laporan Memori Sesi"):
+                st.write("Data disimpan dalam tipe ringkas (flag ekstrakurikuler uint8, JK/Kelas categorical, numerik float32), "
+                         "dan frame turunan memakai kolom yang sama dengan data asli.")
+                if st.button("Hitung Penggunaan Memori", key="memory_report_button"):
+                    report, unique_mb = memory_report({
+                        "Data Asli": st.session_state.df_original,
+                        "Data Praproses": st.session_state.df_preprocessed_for_clustering,
+                        "Data Hasil Klaster": st.session_state.df_clustered,
+                    })
+                    legacy_mb = legacy_memory_estimate(st.session_state.df_original)
+                    st.dataframe(report.round(3), use_container_width=True, hide_index=True)
+                    st.markdown(f"Total memori unik sesi ini: **{unique_mb:.2f} MB** "
+                                f"(perkiraan tata letak lama tiga salinan penuh: {legacy_mb:.2f} MB).")
 
     elif st.session_state.current_menu == "Praproses & Normalisasi Data":
         st.header("Praproses Data & Normalisasi Z-score")
@@ -674,9 +954,13 @@ def show_operator_tu_page():
                 if df_preprocessed is not None and scaler is not None:
                     st.session_state.df_preprocessed_for_clustering = df_preprocessed
                     st.session_state.scaler = scaler
+                    st.session_state.incremental_state = None
+                    st.session_state.partitioned_result = None
                     st.success("Praproses dan Normalisasi berhasil dilakukan. Data siap untuk klasterisasi!")
                     st.subheader("Data Setelah Praproses dan Normalisasi:")
-                    st.dataframe(st.session_state.df_preprocessed_for_clustering, use_container_width=True, height=300)
+                    show_table_preview(st.session_state.df_preprocessed_for_clustering,
+                                       ("pre", fingerprint_dataframe(st.session_state.df_preprocessed_for_clustering)), "pre",
+                                       interactive=False)
                     st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
 
     elif st.session_state.current_menu == "Klasterisasi Data K-Prototypes":
@@ -694,27 +978,71 @@ def show_operator_tu_page():
             </div>
             """, unsafe_allow_html=True)
             st.markdown("---")
-            k = st.slider("Pilih Jumlah Klaster (K)", 2, 6, value=st.session_state.n_clusters,
+            k_max = k_slider_max()
+            k = st.slider("Pilih Jumlah Klaster (K)", 2, k_max, value=min(st.session_state.n_clusters, k_max),
                             help="Pilih berapa banyak kelompok siswa yang ingin Anda bentuk.")
+            engine_options = list(CLUSTERING_ENGINES.keys())
+            engine = st.selectbox("Mesin Klasterisasi", engine_options,
+                                  index=engine_options.index(st.session_state.clustering_engine),
+                                  format_func=lambda e: CLUSTERING_ENGINES[e],
+                                  help="Mesin NumPy memproses fitur numerik dan kategorikal sebagai array bertipe sehingga jauh lebih cepat untuk data besar.")
+            with st.expander("Mode Sweep K: Bandingkan Beberapa Nilai K Sekaligus"):
+                st.write("Sweep melatih model untuk setiap K dalam rentang secara paralel, lalu menampilkan kurva biaya (elbow) "
+                         "dan skor silhouette campuran. Setelah sweep, setiap K dalam rentang dapat dibuka tanpa pelatihan ulang.")
+                k_range = st.slider("Rentang K untuk Sweep", 2, 10, value=(2, 6), key="k_sweep_range")
+                if st.button("Jalankan Sweep K"):
+                    # Isi expander tetap dieksekusi walau tertutup; k_sweep (dan sklearn) baru
+                    # diimpor saat sweep benar-benar dijalankan.
+                    from k_sweep import run_k_sweep
+                    with st.spinner(f"Melatih model untuk K = {k_range[0]} hingga {k_range[1]} secara paralel..."):
+                        try:
+                            sweep_results = run_k_sweep(
+                                st.session_state.df_preprocessed_for_clustering,
+                                range(k_range[0], k_range[1] + 1),
+                                engine=engine,
+                            )
+                        except Exception as e:
+                            st.error(f"Terjadi kesalahan saat menjalankan sweep K: {e}.")
+                            sweep_results = None
+                    if sweep_results is not None:
+                        st.session_state.k_sweep_results = sweep_results
+                        st.session_state.clustering_engine = engine
+                        st.rerun()
+                if st.session_state.k_sweep_results is not None:
+                    sweep_results = st.session_state.k_sweep_results
+                    st.dataframe(sweep_results.round(4), use_container_width=True, hide_index=True)
+                    col_elbow, col_quality = st.columns(2)
+                    with col_elbow:
+                        st.markdown("#### Kurva Elbow (Biaya)")
+                        st.line_chart(sweep_results.set_index("K")[["Biaya (cost_)"]])
+                    with col_quality:
+                        st.markdown("#### Skor Silhouette Campuran")
+                        st.line_chart(sweep_results.set_index("K")[["Skor Silhouette Campuran"]])
+                    from k_sweep import suggest_k
+                    k_saran = suggest_k(sweep_results)
+                    if k_saran is not None:
+                        st.info(f"K dengan skor silhouette tertinggi: {k_saran}. Gunakan kurva elbow sebagai pertimbangan tambahan.")
+            warm_start = st.checkbox("Mulai dari model sebelumnya (warm start)", value=False,
+                                     disabled=st.session_state.kproto_model is None,
+                                     help="Prototipe model terakhir dipakai sebagai titik awal (dibelah atau digabung bila K berubah), "
+                                          "sehingga cukup satu inisialisasi bila data hanya sedikit berubah.")
             if st.button("Jalankan Klasterisasi"):
                 with st.spinner(f"Melakukan klasterisasi dengan {k} klaster..."):
                     df_clustered, kproto_model, categorical_features_indices = run_kprototypes_clustering(
-                        st.session_state.df_preprocessed_for_clustering, k
+                        st.session_state.df_preprocessed_for_clustering, k, engine=engine,
+                        warm_model=st.session_state.kproto_model if warm_start else None,
                     )
                 if df_clustered is not None:
-                    df_final = st.session_state.df_original.copy()
-                    df_final['Klaster'] = df_clustered['Klaster']
-                    st.session_state.df_clustered = df_final
-                    st.session_state.kproto_model = kproto_model
-                    st.session_state.categorical_features_indices = categorical_features_indices
-                    st.session_state.n_clusters = k
-                    st.session_state.cluster_characteristics_map = generate_cluster_descriptions(
-                        df_clustered, k, NUMERIC_COLS, CATEGORICAL_COLS
-                    )
+                    store_clustering_result(df_clustered, kproto_model, categorical_features_indices, k, engine)
+                    df_final = st.session_state.df_clustered
                     st.success(f"Klasterisasi selesai dengan {k} klaster! Hasil pengelompokan siswa telah tersedia.")
+                    model_version = publish_clustering_result(engine)
+                    if model_version:
+                        st.caption(f"Model dan hasil klasterisasi tersimpan sebagai versi {model_version} dan dapat dibuka oleh Kepala Sekolah.")
                     st.markdown("---")
                     st.subheader("Data Hasil Klasterisasi (Disertai Data Asli):")
-                    st.dataframe(df_final, use_container_width=True, height=300)
+                    show_table_preview(df_final, ("clustered", fingerprint_dataframe(df_final)), "clustered",
+                                       interactive=False)
                     st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
                     st.subheader("Ringkasan Klaster: Jumlah Siswa per Kelompok")
                     jumlah_per_klaster = df_final["Klaster"].value_counts().sort_index().reset_index()
@@ -736,6 +1064,79 @@ def show_operator_tu_page():
                     #     st.success(f"Hasil klasterisasi berhasil disimpan ke file '{file_name}' untuk diakses oleh Kepala Sekolah.")
                     # except Exception as e:
                     #     st.error(f"Gagal menyimpan file Excel untuk Kepala Sekolah: {e}")
+            if isinstance(st.session_state.kproto_model, MiniBatchKPrototypes):
+                st.markdown("---")
+                st.subheader("Akurasi Mini-batch Dibandingkan Fit Penuh")
+                st.write("Bandingkan hasil mini-batch dengan fit penuh (NumPy, 10 inisialisasi) pada data yang sama.")
+                if st.button("Hitung Laporan Akurasi", key="minibatch_accuracy"):
+                    from streaming import compare_with_full_fit
+                    with st.spinner("Menjalankan fit penuh sebagai pembanding..."):
+                        laporan = compare_with_full_fit(
+                            st.session_state.df_preprocessed_for_clustering,
+                            st.session_state.kproto_model,
+                            st.session_state.n_clusters,
+                        )
+                    st.table(pd.Series(laporan, name="Nilai").to_frame())
+            if st.session_state.df_clustered is not None and st.session_state.kproto_model is not None:
+                st.markdown("---")
+                st.subheader("Tambah Siswa ke Klaster yang Ada (Pembaruan Inkremental)")
+                st.write("Unggah file berisi siswa yang baru terdaftar saja. Siswa dinormalisasi dengan scaler tersimpan, "
+                         "dimasukkan ke klaster terdekat, lalu prototipe klaster diperbarui tanpa melatih ulang. "
+                         "Klasterisasi ulang penuh hanya dijalankan bila pergeseran data melewati ambang batas.")
+                file_tambahan = st.file_uploader("Pilih File Siswa Tambahan", type=SUPPORTED_UPLOAD_TYPES, key="incremental_file")
+                if file_tambahan and st.button("Tambahkan ke Klaster", key="incremental_run"):
+                    from incremental import DRIFT_THRESHOLDS
+                    try:
+                        with instrumentation.stage("baca_file"):
+                            _, df_tambahan = load_uploaded_table(file_tambahan.name, file_tambahan.getvalue())
+                        with st.spinner("Menambahkan siswa ke klaster..."):
+                            stats_tambahan, drift, terlewati = append_students_incrementally(df_tambahan)
+                    except ValueError as e:
+                        st.error(f"Siswa tambahan tidak dapat diproses: {e}")
+                    else:
+                        if terlewati:
+                            st.warning(f"Ambang drift terlewati ({', '.join(terlewati)}); klasterisasi ulang penuh telah dijalankan.")
+                        else:
+                            st.success(f"{stats_tambahan['Jumlah Siswa']} siswa ditambahkan dalam "
+                                       f"{stats_tambahan['Waktu (detik)'] * 1000:.1f} ms tanpa klasterisasi ulang.")
+                        st.table(pd.DataFrame({"Nilai": drift, "Ambang Batas": DRIFT_THRESHOLDS}).round(4))
+            st.markdown("---")
+            st.subheader("Klasterisasi per Partisi (per Kelas / Sekolah)")
+            st.write("Siswa dikelompokkan di dalam setiap nilai kolom yang dipilih, bukan dari seluruh tabel sekaligus. "
+                     "Setiap partisi mendapat scaler, model dan deskripsi sendiri dan difit paralel sesuai jumlah core, "
+                     "memakai K dan mesin yang dipilih di atas. Setiap partisi memakai rentang nomor klaster sendiri.")
+            from partitioning import partition_columns, partition_summary
+            kolom_partisi = partition_columns(st.session_state.df_original)
+            if not kolom_partisi:
+                st.info("Data tidak memiliki kolom yang dapat dipakai sebagai partisi (mis. Kelas atau Sekolah).")
+            else:
+                partition_key = st.selectbox("Kolom Partisi", kolom_partisi,
+                                             index=kolom_partisi.index("Kelas") if "Kelas" in kolom_partisi else 0,
+                                             key="partition_key")
+                if st.button("Jalankan Klasterisasi per Partisi", key="partition_run"):
+                    with st.spinner(f"Melakukan klasterisasi {k} klaster untuk setiap nilai '{partition_key}'..."):
+                        try:
+                            run_partitioned_clustering(partition_key, k, engine)
+                        except ValueError as e:
+                            st.error(f"Klasterisasi per partisi tidak dapat dijalankan: {e}")
+                hasil_partisi = st.session_state.partitioned_result
+                if hasil_partisi is not None:
+                    model_partisi, stats_partisi = hasil_partisi["model"], hasil_partisi["stats"]
+                    col_p, col_w, col_t = st.columns(3)
+                    col_p.metric(f"Jumlah Partisi ({model_partisi.key})", stats_partisi["Jumlah Partisi"])
+                    col_w.metric("Proses Pekerja", stats_partisi["Jumlah Pekerja"])
+                    col_t.metric("Waktu Total", f"{stats_partisi['Waktu (detik)']:.2f} detik")
+                    st.dataframe(partition_summary(model_partisi).round(3), use_container_width=True, hide_index=True)
+                    show_table_preview(hasil_partisi["df_clustered"],
+                                       ("partitioned", fingerprint_dataframe(hasil_partisi["df_clustered"])),
+                                       "partitioned")
+                    with st.expander("Deskripsi Klaster per Partisi"):
+                        for cluster_id, desc in model_partisi.cluster_desc_map.items():
+                            st.markdown(f"**Klaster {cluster_id}** — {desc}")
+                    st.download_button("Unduh Hasil per Partisi (CSV)",
+                                       data=hasil_partisi["df_clustered"].to_csv(index=False).encode("utf-8"),
+                                       file_name=f"Hasil_Klasterisasi_per_{model_partisi.key}.csv", mime="text/csv",
+                                       key="download_partitioned_csv")
 
     elif st.session_state.current_menu == "Prediksi Klaster Siswa Baru":
         st.header("Prediksi Klaster untuk Siswa Baru")
@@ -798,20 +1199,65 @@ def show_operator_tu_page():
                     st.subheader("Visualisasi Karakteristik Siswa Baru (Dinormalisasi)")
                     st.write("Grafik ini menampilkan nilai fitur siswa setelah dinormalisasi (nilai akademik & kehadiran) atau dalam format biner (ekstrakurikuler).")
                     values_for_plot = list(normalized_numeric_data) + input_cat_ekskul_values
-                    labels_for_plot = ["Nilai Akademik (Norm)", "Kehadiran (Norm)"] + [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    bars = sns.barplot(x=labels_for_plot, y=values_for_plot, palette="viridis", ax=ax)
-                    ax.set_ylim(min(values_for_plot) - 0.2 if values_for_plot else -1, max(values_for_plot) + 0.2 if values_for_plot else 1)
-                    for index, value in enumerate(values_for_plot):
-                        ax.text(bars.patches[index].get_x() + bars.patches[index].get_width() / 2,
-                                bars.patches[index].get_height() + (0.05 if value >= 0 else -0.1),
-                                f"{value:.2f}", ha='center', fontsize=9, weight='bold')
-                    ax.set_title("Profil Siswa Baru", fontsize=16, weight='bold')
-                    ax.set_ylabel("Nilai (Dinormalisasi / Biner)")
-                    plt.xticks(rotation=0)
-                    plt.tight_layout()
-                    st.pyplot(fig)
-                    plt.close(fig) # PERBAIKAN: Menutup plot untuk mencegah kebocoran memori
+                    show_chart(new_student_chart, values_for_plot)
+
+            st.markdown("---")
+            st.subheader("Prediksi Banyak Siswa Sekaligus (File)")
+            st.write("Unggah file Excel/CSV/Parquet berisi data siswa baru dengan kolom yang sama seperti dataset pelatihan. "
+                     "Semua siswa dinormalisasi dan diprediksi dalam satu panggilan.")
+            batch_file = st.file_uploader("Pilih File Siswa Baru", type=SUPPORTED_UPLOAD_TYPES, key="batch_prediction_file")
+            model_partisi = (st.session_state.partitioned_result or {}).get("model")
+            pakai_partisi = False
+            if model_partisi is not None:
+                pakai_partisi = st.radio(
+                    "Model Prediksi", [False, True], horizontal=True, key="batch_partitioned",
+                    format_func=lambda p: f"Model per {model_partisi.key}" if p else "Model global",
+                    help=f"Model per {model_partisi.key}: setiap siswa diprediksi dengan model partisinya "
+                         f"berdasarkan kolom '{model_partisi.key}' di file.",
+                )
+            if batch_file:
+                try:
+                    with instrumentation.stage("baca_file"):
+                        batch_hash, df_batch = load_uploaded_table(batch_file.name, batch_file.getvalue())
+                    batch_key = (batch_hash, id(model_partisi if pakai_partisi else st.session_state.kproto_model))
+                    cached_batch = st.session_state.get("batch_prediction")
+                    if cached_batch is None or cached_batch[0] != batch_key:
+                        with st.spinner("Memprediksi klaster untuk seluruh siswa baru..."), instrumentation.stage("prediksi_batch"):
+                            if pakai_partisi:
+                                from partitioning import predict_partitioned
+                                hasil_batch, stats_batch = predict_partitioned(df_batch, model_partisi)
+                            else:
+                                hasil_batch, stats_batch = predict_batch(
+                                    df_batch,
+                                    st.session_state.scaler,
+                                    st.session_state.kproto_model,
+                                    st.session_state.categorical_features_indices,
+                                    st.session_state.cluster_characteristics_map,
+                                )
+                        st.session_state.batch_prediction = (batch_key, hasil_batch, stats_batch)
+                    _, hasil_batch, stats_batch = st.session_state.batch_prediction
+                    col_n, col_t, col_rps = st.columns(3)
+                    col_n.metric("Jumlah Siswa", f"{stats_batch['Jumlah Siswa']:,}")
+                    col_t.metric("Waktu Prediksi", f"{stats_batch['Waktu (detik)'] * 1000:.1f} ms")
+                    col_rps.metric("Throughput", f"{stats_batch['Baris per Detik']:,.0f} baris/detik")
+                    if stats_batch.get("Tanpa Model Partisi"):
+                        st.warning(f"{stats_batch['Tanpa Model Partisi']} siswa tidak memiliki model partisi dan diberi Klaster -1.")
+                    jumlah_batch = hasil_batch["Klaster"].value_counts().sort_index().reset_index()
+                    jumlah_batch.columns = ["Klaster", "Jumlah Siswa"]
+                    st.table(jumlah_batch)
+                    show_table_preview(hasil_batch, ("batch",) + batch_key, "batch")
+                    col_csv, col_xlsx = st.columns(2)
+                    with col_csv:
+                        st.download_button("Unduh Hasil (CSV)", data=hasil_batch.to_csv(index=False).encode("utf-8"),
+                                           file_name="Prediksi_Klaster_Siswa_Baru.csv", mime="text/csv",
+                                           key="download_batch_csv")
+                    with col_xlsx:
+                        st.download_button("Unduh Hasil (Excel)", data=to_excel_bytes(hasil_batch),
+                                           file_name="Prediksi_Klaster_Siswa_Baru.xlsx",
+                                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                           key="download_batch_xlsx")
+                except Exception as e:
+                    st.error(f"Terjadi kesalahan saat memprediksi file siswa baru: {e}")
 
     elif st.session_state.current_menu == "Visualisasi & Profil Klaster":
         st.header("Visualisasi dan Interpretasi Profil Klaster")
@@ -829,52 +1275,36 @@ def show_operator_tu_page():
             </div>
             """, unsafe_allow_html=True)
             st.markdown("---")
-            k_visual = st.slider("Jumlah Klaster (K) untuk visualisasi", 2, 6, value=st.session_state.n_clusters,
-                                 help="Geser untuk memilih jumlah klaster yang ingin Anda visualisasikan. Ini akan melatih ulang model sementara untuk tujuan visualisasi.")
-            df_for_visual_clustering, kproto_visual, cat_indices_visual = run_kprototypes_clustering(
-                st.session_state.df_preprocessed_for_clustering, k_visual
-            )
+            k_visual_max = k_slider_max()
+            k_visual = st.slider("Jumlah Klaster (K) untuk visualisasi", 2, k_visual_max, value=min(st.session_state.n_clusters, k_visual_max),
+                                 help="Geser untuk memilih jumlah klaster yang ingin Anda visualisasikan. Hasil untuk setiap K disimpan di cache sehingga tidak dilatih ulang saat halaman dimuat kembali.")
+            df_clustered_sesi = st.session_state.df_clustered
+            if (df_clustered_sesi is not None and k_visual == st.session_state.n_clusters
+                    and len(df_clustered_sesi) == len(st.session_state.df_preprocessed_for_clustering)):
+                # K hasil klasterisasi: tampilkan label sesi itu sendiri (bisa hasil warm start atau
+                # penambahan inkremental), bukan fit dingin baru untuk K yang sama.
+                df_for_visual_clustering = st.session_state.df_preprocessed_for_clustering.assign(
+                    Klaster=df_clustered_sesi["Klaster"].to_numpy()
+                )
+            else:
+                df_for_visual_clustering, _, _ = run_kprototypes_clustering(
+                    st.session_state.df_preprocessed_for_clustering, k_visual, engine=st.session_state.clustering_engine
+                )
             if df_for_visual_clustering is not None:
-                cluster_characteristics_map_visual = generate_cluster_descriptions(
-                    df_for_visual_clustering, k_visual, NUMERIC_COLS, CATEGORICAL_COLS
+                # Label ikut menjadi kunci profil karena hasil sesi dan fit dingin dapat berbeda untuk K yang sama.
+                labels_visual = fingerprint_dataframe(df_for_visual_clustering[["Klaster"]])
+                profile_visual = get_or_build_profile(
+                    make_cache_key(st.session_state.df_preprocessed_for_clustering, k_visual,
+                                   engine=st.session_state.clustering_engine) + (labels_visual,),
+                    lambda: build_cluster_profile(st.session_state.df_original, df_for_visual_clustering,
+                                                  df_for_visual_clustering["Klaster"], k_visual),
                 )
+                cluster_characteristics_map_visual = describe_clusters(profile_visual)
                 st.markdown(f"### Menampilkan Profil Klaster untuk K = {k_visual}")
                 st.write("Visualisasi ini menggunakan data yang telah dinormalisasi (nilai, kehadiran) atau dikodekan (ekstrakurikuler 0/1).")
-                for i in range(k_visual):
-                    st.markdown(f"---")
-                    st.subheader(f"Klaster {i}")
-                    cluster_data = df_for_visual_clustering[df_for_visual_clustering["Klaster"] == i]
-                    col1, col2 = st.columns([1, 2])
-                    with col1:
-                        st.markdown("#### Statistik Klaster")
-                        st.markdown(f"Jumlah Siswa: {len(cluster_data)}")
-                        st.write("Rata-rata Nilai & Kehadiran (Dinormalisasi):")
-                        st.dataframe(cluster_data[NUMERIC_COLS].mean().round(2).to_frame(name='Rata-rata'), use_container_width=True)
-                        st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
-                        st.write("Kecenderungan Ekstrakurikuler (Modus):")
-                        mode_ekskul_display = cluster_data[CATEGORICAL_COLS].mode().iloc[0].apply(lambda x: 'Ya' if x == '1' else 'Tidak')
-                        st.dataframe(mode_ekskul_display.to_frame(name='Paling Umum'), use_container_width=True)
-                        st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
-                        st.info(f"Ringkasan Karakteristik Klaster {i}:\n{cluster_characteristics_map_visual.get(i, 'Deskripsi tidak tersedia.')}")
-                    with col2:
-                        st.markdown("#### Grafik Profil Klaster")
-                        st.write("📈 Visualisasi ini menunjukkan rata-rata (numerik) atau modus (kategorikal) dari fitur-fitur di klaster ini.")
-                        values_for_plot_numeric = cluster_data[NUMERIC_COLS].mean().tolist()
-                        values_for_plot_ekskul = [int(cluster_data[col].mode().iloc[0]) for col in CATEGORICAL_COLS]
-                        values_for_plot = values_for_plot_numeric + values_for_plot_ekskul
-                        labels_for_plot = ["Nilai (Norm)", "Kehadiran (Norm)"] + [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
-                        fig, ax = plt.subplots(figsize=(10, 6))
-                        bars = sns.barplot(x=labels_for_plot, y=values_for_plot, palette="cubehelix", ax=ax)
-                        ax.set_ylim(min(values_for_plot) - 0.2 if values_for_plot else -1, max(values_for_plot) + 0.2 if values_for_plot else 1)
-                        for index, value in enumerate(values_for_plot):
-                            offset = 0.05 if value >= 0 else -0.1
-                            ax.text(bars.patches[index].get_x() + bars.patches[index].get_width() / 2, bars.patches[index].get_height() + offset, f"{value:.2f}", ha='center', fontsize=9, weight='bold')
-                        ax.set_title(f"Profil Klaster {i}", fontsize=16, weight='bold')
-                        ax.set_ylabel("Nilai (Dinormalisasi / Biner)")
-                        plt.xticks(rotation=0)
-                        plt.tight_layout()
-                        st.pyplot(fig)
-                        plt.close(fig) # PERBAIKAN: Menutup plot untuk mencegah kebocoran memori
+                render_cluster_profiles(profile_visual, cluster_characteristics_map_visual,
+                                        scope=("visual", st.session_state.upload_hash, k_visual, st.session_state.clustering_engine,
+                                               labels_visual))
                 st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
 
     elif st.session_state.current_menu == "Lihat Profil Siswa Individual":
@@ -885,22 +1315,10 @@ def show_operator_tu_page():
             st.info("Pilih nama siswa dari daftar di bawah untuk melihat detail profil mereka, termasuk klaster tempat mereka berada dan karakteristiknya.")
             st.markdown("---")
             df_original_with_cluster = st.session_state.df_clustered
-            default_index = 0
-            if "selected_student_name" in st.session_state and st.session_state.selected_student_name in df_original_with_cluster["Nama"].unique():
-                try:
-                    default_index = list(df_original_with_cluster["Nama"].unique()).index(st.session_state.selected_student_name)
-                except ValueError:
-                    default_index = 0
-            nama_terpilih = st.selectbox(
-                "Pilih Nama Siswa",
-                df_original_with_cluster["Nama"].unique(),
-                index=default_index,
-                key="pilih_nama_siswa_selectbox_tu",
-                help="Pilih siswa yang profilnya ingin Anda lihat."
-            )
-            st.session_state.selected_student_name = nama_terpilih
-            if nama_terpilih:
-                siswa_data = df_original_with_cluster[df_original_with_cluster["Nama"] == nama_terpilih].iloc[0]
+            posisi_siswa = select_student(df_original_with_cluster, "tu")
+            if posisi_siswa is not None:
+                siswa_data = df_original_with_cluster.iloc[posisi_siswa]
+                nama_terpilih = str(siswa_data["Nama"])
                 klaster_siswa_terpilih = siswa_data['Klaster']
                 st.success(f"Siswa {nama_terpilih} tergolong dalam Klaster {klaster_siswa_terpilih} (hasil dari {st.session_state.n_clusters} klaster).")
                 st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
@@ -934,41 +1352,14 @@ def show_operator_tu_page():
                 with col_chart:
                     st.markdown("#### Visualisasi Profil Siswa Individual")
                     st.write("Grafik ini menampilkan nilai asli (tidak dinormalisasi) untuk rata-rata nilai akademik dan persentase kehadiran (0-100%), serta status biner (0/1) untuk ekstrakurikuler.")
-                    labels_siswa_plot = ["Rata-rata\nNilai Akademik", "Kehadiran (%)"] + [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
-                    values_siswa_plot_numeric = [
+                    values_siswa_plot = [
                         siswa_data["Rata Rata Nilai Akademik"],
                         siswa_data["Kehadiran"] * 100
-                    ]
-                    values_siswa_plot_ekskul = [
-                        siswa_data[col] * 100 for col in CATEGORICAL_COLS
-                    ]
-                    values_siswa_plot = values_siswa_plot_numeric + values_siswa_plot_ekskul
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    bars = sns.barplot(x=labels_siswa_plot, y=values_siswa_plot, palette="magma", ax=ax)
-                    max_plot_val = max(values_siswa_plot) if values_siswa_plot else 100
-                    ax.set_ylim(0, max(100, max_plot_val * 1.1))
-                    for bar, val in zip(bars.patches, values_siswa_plot):
-                        ax.text(bar.get_x() + bar.get_width() / 2, val + (ax.get_ylim()[1] * 0.02), f"{val:.1f}", ha='center', fontsize=9, weight='bold')
-                    ax.set_title(f"Grafik Profil Siswa - {nama_terpilih}", fontsize=16, weight='bold')
-                    ax.set_ylabel("Nilai / Status (%)")
-                    plt.xticks(rotation=0)
-                    plt.tight_layout()
-                    st.pyplot(fig)
-                    plt.close(fig) # PERBAIKAN: Menutup plot untuk mencegah kebocoran memori
+                    ] + [int(siswa_data[col]) * 100 for col in CATEGORICAL_COLS]
+                    show_chart(student_profile_chart, chart_scope(), siswa_data.get("No", nama_terpilih), nama_terpilih, values_siswa_plot)
                 st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
                 st.subheader(f"Siswa Lain di Klaster {klaster_siswa_terpilih}:")
-                siswa_lain_di_klaster = df_original_with_cluster[
-                    (df_original_with_cluster['Klaster'] == klaster_siswa_terpilih) &
-                    (df_original_with_cluster['Nama'] != nama_terpilih)
-                ]
-                if not siswa_lain_di_klaster.empty:
-                    st.write("Berikut adalah daftar siswa lain yang juga tergolong dalam klaster ini:")
-                    display_cols_for_others = ["No", "Nama", "JK", "Kelas", "Rata Rata Nilai Akademik", "Kehadiran"]
-                    display_df_others = siswa_lain_di_klaster[display_cols_for_others].copy()
-                    display_df_others["Kehadiran"] = display_df_others["Kehadiran"].apply(lambda x: f"{x:.2%}")
-                    st.dataframe(display_df_others, use_container_width=True)
-                else:
-                    st.info("Tidak ada siswa lain dalam klaster ini.")
+                render_cluster_members(df_original_with_cluster, klaster_siswa_terpilih, posisi_siswa, "tu")
                 st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
                 st.subheader("Unduh Laporan Profil Siswa (PDF)")
                 if st.session_state.cluster_characteristics_map:
@@ -993,10 +1384,20 @@ def show_operator_tu_page():
                             )
                 else:
                     st.warning("Mohon lakukan klasterisasi terlebih dahulu (Menu 'Klasterisasi Data K-Prototypes') untuk menghasilkan data profil PDF.")
+            if st.session_state.cluster_characteristics_map:
+                render_bulk_report_export(df_original_with_cluster, st.session_state.cluster_characteristics_map, "tu")
 
 
 def show_kepala_sekolah_page():
     # PERBAIKAN: Hapus logika pembacaan file Excel lokal dan langsung cek session state.
+    # Jika sesi ini belum memiliki hasil, muat versi artefak model terbaru dari disk.
+    if st.session_state.df_clustered is None or st.session_state.df_clustered.empty:
+        try:
+            load_published_result()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            st.error(f"Gagal memuat hasil klasterisasi tersimpan: {e}")
     if st.session_state.df_clustered is None or st.session_state.df_clustered.empty:
         st.warning(f"Data hasil klasterisasi tidak ditemukan. Mohon minta Operator TU untuk memproses data terlebih dahulu.")
         return
@@ -1025,6 +1426,21 @@ def show_kepala_sekolah_page():
             st.session_state.kepsek_current_menu = option
             st.rerun()
 
+    model_versions = list_versions()
+    if model_versions:
+        st.sidebar.markdown("---")
+        versi_tersedia = model_versions[::-1]
+        versi_aktif = st.session_state.model_version if st.session_state.model_version in versi_tersedia else versi_tersedia[0]
+        versi_terpilih = st.sidebar.selectbox("Versi Model", versi_tersedia, index=versi_tersedia.index(versi_aktif),
+                                              key="kepsek_model_version",
+                                              help="Pilih versi hasil klasterisasi yang ingin ditampilkan (bawaan: terbaru).")
+        if versi_terpilih != st.session_state.model_version:
+            try:
+                load_published_result(versi_terpilih)
+                st.rerun()
+            except Exception as e:
+                st.sidebar.error(f"Gagal memuat versi {versi_terpilih}: {e}")
+
     js_highlight_active_button = f"""
     <script>
         function cleanButtonText(text) {{
@@ -1079,12 +1495,16 @@ def show_kepala_sekolah_page():
         st.markdown("---")
         
         st.subheader("Data Hasil Klasterisasi")
-        st.dataframe(st.session_state.df_clustered, use_container_width=True, height=300)
+        show_table_preview(st.session_state.df_clustered, ("published", fingerprint_dataframe(st.session_state.df_clustered)),
+                           "kepsek")
         
         st.markdown("---")
         st.subheader("Ringkasan Klaster: Jumlah Siswa per Kelompok")
-        jumlah_per_klaster = st.session_state.df_clustered["Klaster"].value_counts().sort_index().reset_index()
-        jumlah_per_klaster.columns = ["Klaster", "Jumlah Siswa"]
+        if st.session_state.cluster_profile is not None:
+            jumlah_per_klaster = st.session_state.cluster_profile["counts"].rename("Jumlah Siswa").reset_index()
+        else:
+            jumlah_per_klaster = st.session_state.df_clustered["Klaster"].value_counts().sort_index().reset_index()
+            jumlah_per_klaster.columns = ["Klaster", "Jumlah Siswa"]
         st.table(jumlah_per_klaster)
     
     elif st.session_state.kepsek_current_menu == "Visualisasi & Profil Klaster":
@@ -1099,59 +1519,13 @@ def show_kepala_sekolah_page():
         st.subheader(f"Karakteristik Umum Klaster ({st.session_state.n_clusters} Klaster):")
         st.write("Berikut adalah deskripsi singkat untuk setiap klaster yang terbentuk:")
         
-        # PERBAIKAN: Gunakan data asli untuk preprocessing agar visualisasi konsisten
-        df_preprocessed_temp, scaler_temp = preprocess_data(st.session_state.df_original)
-        if df_preprocessed_temp is None:
-            st.error("Gagal melakukan praproses data untuk visualisasi.")
+        # PERBAIKAN: Tidak ada praproses ulang di sini; grafik dan tabel dibaca dari
+        # ringkasan profil yang dibangun saat model dilatih (atau dimuat dari artefak).
+        if st.session_state.cluster_profile is None:
+            st.warning("Ringkasan profil klaster tidak tersedia. Mohon Operator TU menjalankan klasterisasi ulang.")
             return
-
-        df_preprocessed_temp['Klaster'] = st.session_state.df_clustered['Klaster']
-
-        for i in range(st.session_state.n_clusters):
-            st.markdown(f"---")
-            st.subheader(f"Klaster {i}")
-            cluster_data = st.session_state.df_clustered[st.session_state.df_clustered["Klaster"] == i]
-            cluster_data_norm = df_preprocessed_temp[df_preprocessed_temp["Klaster"] == i]
-            
-            col1, col2 = st.columns([1, 2])
-            with col1:
-                st.markdown("#### Statistik Klaster")
-                st.markdown(f"Jumlah Siswa: {len(cluster_data)}")
-                
-                st.write("Rata-rata Nilai & Kehadiran (Dinormalisasi):")
-                st.dataframe(cluster_data_norm[NUMERIC_COLS].mean().round(2).to_frame(name='Rata-rata'), use_container_width=True)
-
-                st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
-                st.write("Kecenderungan Ekstrakurikuler (Modus):")
-                mode_ekskul_display = cluster_data[CATEGORICAL_COLS].mode().iloc[0].apply(lambda x: 'Ya' if x == '1' else 'Tidak')
-                st.dataframe(mode_ekskul_display.to_frame(name='Paling Umum'), use_container_width=True)
-                
-                st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
-                st.info(f"Ringkasan Karakteristik Klaster {i}:\n{st.session_state.cluster_characteristics_map.get(i, 'Deskripsi tidak tersedia.')}")
-            
-            with col2:
-                st.markdown("#### Grafik Profil Klaster")
-                st.write("📈 Visualisasi ini menunjukkan rata-rata (numerik) atau modus (kategorikal) dari fitur-fitur di klaster ini.")
-                
-                values_for_plot_numeric = cluster_data_norm[NUMERIC_COLS].mean().tolist()
-                values_for_plot_ekskul = [int(cluster_data_norm[col].mode().iloc[0]) for col in CATEGORICAL_COLS]
-                values_for_plot = values_for_plot_numeric + values_for_plot_ekskul
-                labels_for_plot = ["Nilai (Norm)", "Kehadiran (Norm)"] + [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
-                
-                fig, ax = plt.subplots(figsize=(10, 6))
-                bars = sns.barplot(x=labels_for_plot, y=values_for_plot, palette="cubehelix", ax=ax)
-                ax.set_ylim(min(values_for_plot) - 0.2 if values_for_plot else -1, max(values_for_plot) + 0.2 if values_for_plot else 1)
-                
-                for index, value in enumerate(values_for_plot):
-                    offset = 0.05 if value >= 0 else -0.1
-                    ax.text(bars.patches[index].get_x() + bars.patches[index].get_width() / 2, bars.patches[index].get_height() + offset, f"{value:.2f}", ha='center', fontsize=9, weight='bold')
-                
-                ax.set_title(f"Profil Klaster {i}", fontsize=16, weight='bold')
-                ax.set_ylabel("Nilai (Dinormalisasi / Biner)")
-                plt.xticks(rotation=0)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close(fig) # PERBAIKAN: Menutup plot untuk mencegah kebocoran memori
+        render_cluster_profiles(st.session_state.cluster_profile, st.session_state.cluster_characteristics_map,
+                                scope=st.session_state.model_version)
         st.markdown("<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
         
     elif st.session_state.kepsek_current_menu == "Lihat Profil Siswa Individual":
@@ -1160,23 +1534,10 @@ def show_kepala_sekolah_page():
         st.markdown("---")
 
         df_kepsek = st.session_state.df_clustered
-        default_index = 0
-        if "selected_student_name_kepsek" in st.session_state and st.session_state.selected_student_name_kepsek in df_kepsek["Nama"].unique():
-            try:
-                default_index = list(df_kepsek["Nama"].unique()).index(st.session_state.selected_student_name_kepsek)
-            except ValueError:
-                default_index = 0
-        nama_terpilih_kepsek = st.selectbox(
-            "Pilih Nama Siswa",
-            df_kepsek["Nama"].unique(),
-            index=default_index,
-            key="pilih_nama_siswa_kepsek",
-            help="Pilih siswa yang profilnya ingin Anda lihat."
-        )
-        st.session_state.selected_student_name_kepsek = nama_terpilih_kepsek
-        
-        if nama_terpilih_kepsek:
-            siswa_data = df_kepsek[df_kepsek["Nama"] == nama_terpilih_kepsek].iloc[0]
+        posisi_siswa_kepsek = select_student(df_kepsek, "kepsek")
+        if posisi_siswa_kepsek is not None:
+            siswa_data = df_kepsek.iloc[posisi_siswa_kepsek]
+            nama_terpilih_kepsek = str(siswa_data["Nama"])
             klaster_siswa_terpilih = siswa_data['Klaster']
             st.success(f"Siswa {nama_terpilih_kepsek} tergolong dalam Klaster {klaster_siswa_terpilih}.")
             klaster_desc_for_new_student = st.session_state.cluster_characteristics_map.get(klaster_siswa_terpilih, "Deskripsi klaster tidak tersedia.")
@@ -1209,39 +1570,15 @@ def show_kepala_sekolah_page():
             with col_chart:
                 st.markdown("#### Visualisasi Profil Siswa Individual")
                 st.write("Grafik ini menampilkan nilai asli (tidak dinormalisasi) untuk rata-rata nilai akademik dan persentase kehadiran (0-100%), serta status biner (0/1) untuk ekstrakurikuler.")
-                labels_siswa_plot = ["Rata-rata\nNilai Akademik", "Kehadiran (%)"] + [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
-                values_siswa_plot_numeric = [
+                # PERBAIKAN: Kehadiran disimpan sebagai pecahan 0-1; dikalikan 100 seperti di halaman Operator TU.
+                values_siswa_plot = [
                     siswa_data.get("Rata Rata Nilai Akademik", 0),
-                    float(str(siswa_data.get("Kehadiran", "0%")).replace('%',''))
-                ]
-                values_siswa_plot_ekskul = [
-                    float(str(siswa_data.get(col, 0))) * 100 for col in CATEGORICAL_COLS
-                ]
-                values_siswa_plot = values_siswa_plot_numeric + values_siswa_plot_ekskul
-                fig, ax = plt.subplots(figsize=(10, 6))
-                bars = sns.barplot(x=labels_siswa_plot, y=values_siswa_plot, palette="magma", ax=ax)
-                max_plot_val = max(values_siswa_plot) if values_siswa_plot else 100
-                ax.set_ylim(0, max(100, max_plot_val * 1.1))
-                for bar, val in zip(bars.patches, values_siswa_plot):
-                    ax.text(bar.get_x() + bar.get_width() / 2, val + (ax.get_ylim()[1] * 0.02), f"{val:.1f}", ha='center', fontsize=9, weight='bold')
-                ax.set_title(f"Grafik Profil Siswa - {nama_terpilih_kepsek}", fontsize=16, weight='bold')
-                ax.set_ylabel("Nilai / Status (%)")
-                plt.xticks(rotation=0)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close(fig) # PERBAIKAN: Menutup plot untuk mencegah kebocoran memori
+                    float(siswa_data.get("Kehadiran", 0)) * 100
+                ] + [float(str(siswa_data.get(col, 0))) * 100 for col in CATEGORICAL_COLS]
+                show_chart(student_profile_chart, chart_scope(), siswa_data.get("No", nama_terpilih_kepsek), nama_terpilih_kepsek, values_siswa_plot)
             st.markdown("---")
             st.subheader(f"Siswa Lain di Klaster {klaster_siswa_terpilih}:")
-            siswa_lain_di_klaster = df_kepsek[
-                (df_kepsek['Klaster'] == klaster_siswa_terpilih) &
-                (df_kepsek['Nama'] != nama_terpilih_kepsek)
-            ]
-            if not siswa_lain_di_klaster.empty:
-                st.write("Berikut adalah daftar siswa lain yang juga tergolong dalam klaster ini:")
-                display_cols_for_others = ["No", "Nama", "JK", "Kelas", "Rata Rata Nilai Akademik", "Kehadiran"]
-                st.dataframe(siswa_lain_di_klaster[display_cols_for_others], use_container_width=True)
-            else:
-                st.info("Tidak ada siswa lain dalam klaster ini.")
+            render_cluster_members(df_kepsek, klaster_siswa_terpilih, posisi_siswa_kepsek, "kepsek")
             st.markdown("---")
             st.subheader("Unduh Laporan Profil Siswa (PDF)")
             if st.session_state.cluster_characteristics_map:
@@ -1268,6 +1605,8 @@ def show_kepala_sekolah_page():
                         )
             else:
                 st.warning("Data klasterisasi tidak valid untuk membuat profil PDF.")
+        if st.session_state.cluster_characteristics_map:
+            render_bulk_report_export(df_kepsek, st.session_state.cluster_characteristics_map, "kepsek")
 
 
 # --- LOGIKA UTAMA APLIKASI UNTUK PEMILIHAN PERAN ---
@@ -1317,4 +1656,39 @@ elif st.session_state.role == 'Operator TU':
     show_operator_tu_page()
 
 elif st.session_state.role == 'Kepala Sekolah':
-    show_kepala_sekolah_page()
\ No newline at end of file
+    show_kepala_sekolah_page()
+
+# --- PROFIL WAKTU MULAI (APP_STARTUP_PROFILE=1) ---
+if startup_profile.STARTUP_PROFILE_ENABLED:
+    render_seconds = startup_profile.record_first_render(_script_start)
+    with st.sidebar.expander("Profil Waktu Mulai"):
+        st.write(f"Render pertama: {render_seconds * 1000:.0f} ms")
+        st.dataframe(pd.DataFrame(startup_profile.import_report(), columns=["Modul", "Detik"]),
+                     use_container_width=True, hide_index=True)
+
+# --- INSTRUMENTASI PER TAHAP (PANEL ADMIN: APP_ADMIN_PANEL=1) ---
+halaman_aktif = st.session_state.current_menu if st.session_state.role == 'Operator TU' else st.session_state.kepsek_current_menu
+rerun_terakhir = instrumentation.end_rerun(page=f"{st.session_state.role or 'Pemilihan Peran'} / {halaman_aktif or '-'}")
+if os.environ.get("APP_ADMIN_PANEL") == "1":
+    with st.sidebar.expander("Panel Instrumentasi (Admin)"):
+        kolom_tahap = ["stage", "depth", "wall_s", "cpu_s", "peak_bytes"]
+        st.write(f"Rerun ini: {rerun_terakhir['wall_s'] * 1000:.0f} ms dinding, {rerun_terakhir['cpu_s'] * 1000:.0f} ms CPU.")
+        st.dataframe(pd.DataFrame(rerun_terakhir["stages"], columns=kolom_tahap), use_container_width=True, hide_index=True)
+        riwayat = instrumentation.history()
+        tahap_riwayat = pd.DataFrame([entry for record in riwayat for entry in record["stages"]], columns=kolom_tahap)
+        if not tahap_riwayat.empty:
+            st.write(f"Ringkasan {len(riwayat)} rerun terakhir (semua sesi):")
+            ringkasan = tahap_riwayat.groupby("stage").agg(
+                Jumlah=("wall_s", "size"),
+                Median_Dinding_ms=("wall_s", lambda w: w.median() * 1000),
+                P95_Dinding_ms=("wall_s", lambda w: w.quantile(0.95) * 1000),
+                Rata_CPU_ms=("cpu_s", lambda c: c.mean() * 1000),
+                Puncak_MB=("peak_bytes", lambda b: b.max() / 1e6),
+            ).sort_values("P95_Dinding_ms", ascending=False)
+            st.dataframe(ringkasan.round(2), use_container_width=True)
+        if not instrumentation.TRACE_MEMORY:
+            st.caption("Puncak alokasi tidak dicatat; jalankan dengan APP_TRACE_MEMORY=1 untuk mengaktifkannya.")
+        st.download_button("Unduh JSON Lines", data=instrumentation.to_jsonl().encode("utf-8"),
+                           file_name="instrumentasi.jsonl", mime="application/x-ndjson", key="download_metrics_jsonl")
+        st.download_button("Unduh Textfile Prometheus", data=instrumentation.prometheus_text().encode("utf-8"),
+                           file_name="pengelompokan_siswa.prom", mime="text/plain", key="download_metrics_prom")
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from cluster_profile import build_cluster_profile, profile_from_json, profile_to_json
+from kproto_engine import FastKPrototypes, extract_prototypes
+from lru import LRUCache
+from prediction import prepare_features
+from schema import CATEGORICAL_COLS, NUMERIC_COLS
+
+# --- PENYIMPANAN ARTEFAK MODEL BERVERSI ---
+# Setiap versi disimpan di folder sendiri:
+#   arrays.npz   -> prototipe numerik, kode prototipe kategorikal, kategori, parameter scaler
+#   meta.json    -> hash dataset, K, mesin, waktu fit, biaya, gamma, deskripsi klaster
+#   profile.json -> ringkasan profil per klaster (jumlah, rata-rata, frekuensi ekskul)
+#   table.parquet (opsional) -> data hasil klasterisasi untuk dasbor Kepala Sekolah
+# Berkas LATEST menunjuk ke versi terbaru. Model dimuat kembali sebagai
+# FastKPrototypes sehingga tidak perlu unpickle maupun melatih ulang.
+# Berkas ditulis ke folder sementara unik; penomoran versi, rename dan pembaruan LATEST
+# dilakukan di bawah kunci berkas (flock, atau msvcrt.locking di Windows) agar sesi lain
+# atau pipeline batch yang menyimpan bersamaan tidak mendapat nomor versi yang sama.
+# Kunci dilepas sistem operasi saat prosesnya mati, jadi tidak ada kunci tertinggal.
+
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    "MODEL_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+)
+PINNED_VERSION = os.environ.get("MODEL_ARTIFACT_VERSION") or None
+LATEST_FILE = "LATEST"
+ARRAYS_FILE = "arrays.npz"
+META_FILE = "meta.json"
+TABLE_FILE = "table.parquet"
+PROFILE_FILE = "profile.json"
+MAX_VERSIONS = 20
+LOCK_FILE = ".lock"
+LOCK_TIMEOUT_SECONDS = 30.0
+LOADED_CACHE_MAX_ENTRIES = 4
+
+_loaded_cache = LRUCache(max_entries=LOADED_CACHE_MAX_ENTRIES)
+
+
+def list_versions(artifact_dir=DEFAULT_ARTIFACT_DIR):
+    if not os.path.isdir(artifact_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(artifact_dir)
+        if name.startswith("v") and os.path.exists(os.path.join(artifact_dir, name, META_FILE))
+    )
+
+
+def latest_version(artifact_dir=DEFAULT_ARTIFACT_DIR):
+    pointer = os.path.join(artifact_dir, LATEST_FILE)
+    if os.path.exists(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+    versions = list_versions(artifact_dir)
+    return versions[-1] if versions else None
+
+
+def read_meta(version, artifact_dir=DEFAULT_ARTIFACT_DIR):
+    with open(os.path.join(artifact_dir, version, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _next_version(artifact_dir):
+    versions = list_versions(artifact_dir)
+    number = int(versions[-1][1:]) + 1 if versions else 1
+    return f"v{number:04d}"
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _artifact_lock(artifact_dir):
+    # Berkas kunci tidak pernah dihapus: menghapusnya memberi peluang dua proses
+    # memegang kunci pada dua berkas berbeda. Isinya hanya PID pemegang terakhir.
+    fd = os.open(os.path.join(artifact_dir, LOCK_FILE), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Folder artefak '{artifact_dir}' sedang dikunci oleh proses lain.")
+            time.sleep(0.05)
+        try:
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode("ascii"))
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def _prune_old_versions(artifact_dir, keep_version):
+    versions = list_versions(artifact_dir)
+    for version in versions[:max(0, len(versions) - MAX_VERSIONS)]:
+        if version not in (keep_version, PINNED_VERSION):
+            shutil.rmtree(os.path.join(artifact_dir, version), ignore_errors=True)
+
+
+def _labels_hash(df_clustered):
+    if df_clustered is None:
+        return None
+    labels = np.ascontiguousarray(df_clustered["Klaster"].to_numpy(dtype=np.int64))
+    return hashlib.blake2b(labels.tobytes(), digest_size=16).hexdigest()
+
+
+def _same_result(meta, dataset_hash, n_clusters, engine, cost, labels_hash):
+    # Data, K dan mesin yang sama belum tentu hasil yang sama (warm start, init berbeda),
+    # jadi biaya dan label juga dibandingkan.
+    if (meta["dataset_hash"], meta["n_clusters"], meta["engine"]) != (dataset_hash, n_clusters, engine):
+        return False
+    stored_cost = meta.get("cost", float("nan"))
+    if not (np.isclose(stored_cost, cost) or (np.isnan(stored_cost) and np.isnan(cost))):
+        return False
+    return labels_hash is None or meta.get("labels_hash") == labels_hash
+
+
+def save_artifacts(scaler, model, categorical_indices, cluster_desc_map, dataset_hash,
+                   df_clustered=None, engine=None, artifact_dir=DEFAULT_ARTIFACT_DIR, extra_meta=None,
+                   skip_if_unchanged=True, cluster_profile=None):
+    num_centroids, cat_codes, categories, gamma = extract_prototypes(model)
+    cost = float(getattr(model, "cost_", float("nan")))
+    labels_hash = _labels_hash(df_clustered)
+    if skip_if_unchanged:
+        # Hasil yang identik dengan versi terbaru (data, K, mesin, biaya, label) tidak disimpan ulang.
+        latest = latest_version(artifact_dir)
+        if latest is not None:
+            meta = read_meta(latest, artifact_dir)
+            if _same_result(meta, dataset_hash, int(num_centroids.shape[0]), engine, cost, labels_hash):
+                return latest
+    os.makedirs(artifact_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".simpan-", dir=artifact_dir)
+    # mkdtemp membuat folder 0700; versi harus tetap dapat dibaca layanan skoring.
+    os.chmod(tmp_dir, 0o755)
+    try:
+        arrays = {
+            "num_centroids": num_centroids,
+            "cat_codes": cat_codes,
+            "scaler_mean": scaler.mean_,
+            "scaler_scale": scaler.scale_,
+            "scaler_var": scaler.var_,
+        }
+        for j, cats in enumerate(categories):
+            arrays[f"categories_{j}"] = cats
+        np.savez(os.path.join(tmp_dir, ARRAYS_FILE), **arrays)
+        if cluster_profile is not None:
+            with open(os.path.join(tmp_dir, PROFILE_FILE), "w", encoding="utf-8") as f:
+                json.dump(profile_to_json(cluster_profile), f, ensure_ascii=False)
+        if df_clustered is not None:
+            df_clustered.to_parquet(os.path.join(tmp_dir, TABLE_FILE), index=False)
+
+        with _artifact_lock(artifact_dir):
+            version = _next_version(artifact_dir)
+            meta = {
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "dataset_hash": dataset_hash,
+                "n_clusters": int(num_centroids.shape[0]),
+                "engine": engine,
+                "fit_seconds": float(getattr(model, "fit_seconds_", float("nan"))),
+                "cost": cost,
+                "labels_hash": labels_hash,
+                "gamma": gamma,
+                "numeric_cols": NUMERIC_COLS,
+                "categorical_cols": CATEGORICAL_COLS,
+                "categorical_indices": [int(i) for i in categorical_indices],
+                "n_samples_seen": int(np.max(getattr(scaler, "n_samples_seen_", 0))),
+                "cluster_desc_map": {str(k): v for k, v in cluster_desc_map.items()},
+                "has_table": df_clustered is not None,
+                "has_profile": cluster_profile is not None,
+                **(extra_meta or {}),
+            }
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_dir, os.path.join(artifact_dir, version))
+            pointer_tmp = os.path.join(artifact_dir, LATEST_FILE + ".tmp")
+            with open(pointer_tmp, "w", encoding="utf-8") as f:
+                f.write(version)
+            os.replace(pointer_tmp, os.path.join(artifact_dir, LATEST_FILE))
+            _prune_old_versions(artifact_dir, version)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return version
+
+
+def _restore_scaler(arrays, n_samples_seen):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_ = arrays["scaler_mean"]
+    scaler.scale_ = arrays["scaler_scale"]
+    scaler.var_ = arrays["scaler_var"]
+    scaler.n_features_in_ = len(NUMERIC_COLS)
+    scaler.feature_names_in_ = np.array(NUMERIC_COLS, dtype=object)
+    scaler.n_samples_seen_ = n_samples_seen
+    return scaler
+
+
+def load_artifacts(version=None, artifact_dir=DEFAULT_ARTIFACT_DIR, with_table=True):
+    # Versi None berarti versi yang dipin lewat MODEL_ARTIFACT_VERSION, atau versi terbaru.
+    version = version or PINNED_VERSION or latest_version(artifact_dir)
+    if version is None:
+        raise FileNotFoundError(f"Belum ada model tersimpan di '{artifact_dir}'.")
+    key = (os.path.abspath(artifact_dir), version, with_table)
+    cached = _loaded_cache.get(key)
+    if cached is not None:
+        return cached
+
+    meta = read_meta(version, artifact_dir)
+    with np.load(os.path.join(artifact_dir, version, ARRAYS_FILE), allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    categories = [arrays[f"categories_{j}"] for j in range(len(meta["categorical_indices"]))]
+    model = FastKPrototypes.from_prototypes(
+        arrays["num_centroids"], arrays["cat_codes"], categories, meta["gamma"], meta["categorical_indices"]
+    )
+    model.cost_ = meta["cost"]
+    model.fit_seconds_ = meta["fit_seconds"]
+    bundle = {
+        "version": version,
+        "meta": meta,
+        "scaler": _restore_scaler(arrays, meta["n_samples_seen"]),
+        "model": model,
+        "categorical_indices": meta["categorical_indices"],
+        "cluster_desc_map": {int(k): v for k, v in meta["cluster_desc_map"].items()},
+        "df_clustered": None,
+        "cluster_profile": None,
+    }
+    profile_path = os.path.join(artifact_dir, version, PROFILE_FILE)
+    if os.path.exists(profile_path):
+        with open(profile_path, encoding="utf-8") as f:
+            bundle["cluster_profile"] = profile_from_json(json.load(f))
+    table_path = os.path.join(artifact_dir, version, TABLE_FILE)
+    if with_table and os.path.exists(table_path):
+        bundle["df_clustered"] = pd.read_parquet(table_path)
+        if bundle["cluster_profile"] is None:
+            # Versi lama tanpa profile.json: ringkasan dibangun sekali saat dimuat.
+            table = bundle["df_clustered"]
+            _, features = prepare_features(table.drop(columns=["Klaster"]), bundle["scaler"])
+            bundle["cluster_profile"] = build_cluster_profile(table, features, table["Klaster"], meta["n_clusters"])
+    _loaded_cache.put(key, bundle)
+    return bundle
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from artifact_store import DEFAULT_ARTIFACT_DIR, save_artifacts
+from cluster_profile import build_cluster_profile, describe_clusters
+from clustering import CLUSTERING_ENGINES, fingerprint_dataframe, fit_kprototypes
+from ingestion import SUPPORTED_UPLOAD_TYPES, load_uploaded_table
+from partitioning import PartitionedModel, fit_partitioned, save_partitioned_artifacts
+from preprocessing import preprocess_table
+from schema import CLUSTER_LABEL_DTYPE
+
+# --- PIPELINE BATCH TANPA BROWSER ---
+# Menjalankan alur menu Operator TU (praproses -> klasterisasi -> deskripsi -> artefak
+# -> laporan PDF) dari baris perintah, mis. untuk jadwal malam hari. Memakai inti yang
+# sama dengan app.py tanpa Streamlit; kesalahan dilaporkan per workbook.
+#   python batch_pipeline.py data/siswa.xlsx --clusters 3 --output hasil/
+#   python batch_pipeline.py data/sekolah/ --output hasil/     (satu hasil per workbook)
+#   python batch_pipeline.py data/siswa.xlsx --partition-by Kelas   (satu model per Kelas)
+#   python batch_pipeline.py data/kabupaten.csv --chunk-rows 50000   (out-of-core, tanpa memuat tabel utuh)
+TABLE_FORMATS = ["csv", "xlsx", "parquet"]
+STREAMED_TABLE_FORMATS = ["csv", "parquet"]
+STREAMED_ENGINE = "minibatch"
+DEFAULT_OUTPUT_DIR = "hasil_batch"
+
+
+def find_workbooks(path):
+    if os.path.isdir(path):
+        names = sorted(
+            name for name in os.listdir(path)
+            if os.path.splitext(name)[1].lower().lstrip(".") in SUPPORTED_UPLOAD_TYPES and not name.startswith("~$")
+        )
+        if not names:
+            raise FileNotFoundError(f"Tidak ada file {', '.join(SUPPORTED_UPLOAD_TYPES)} di folder '{path}'.")
+        return [os.path.join(path, name) for name in names]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File '{path}' tidak ditemukan.")
+    return [path]
+
+
+def read_workbook(path):
+    with open(path, "rb") as f:
+        return load_uploaded_table(os.path.basename(path), f.read())[1]
+
+
+def cluster_dataset(df, n_clusters, engine="kmodes", n_jobs=-1):
+    # Inti menu Praproses + Klasterisasi: mengembalikan semua yang disimpan app.py di sesi.
+    timings = {}
+    start = time.perf_counter()
+    df_preprocessed, scaler, filled = preprocess_table(df)
+    timings["Praproses (detik)"] = time.perf_counter() - start
+    start = time.perf_counter()
+    clusters, model, categorical_indices = fit_kprototypes(df_preprocessed, n_clusters, engine=engine, n_jobs=n_jobs)
+    timings["Klasterisasi (detik)"] = time.perf_counter() - start
+    start = time.perf_counter()
+    labels = clusters.astype(CLUSTER_LABEL_DTYPE)
+    df_clustered = df.assign(Klaster=labels)
+    profile = build_cluster_profile(df, df_preprocessed, labels, n_clusters)
+    desc_map = describe_clusters(profile)
+    timings["Deskripsi (detik)"] = time.perf_counter() - start
+    return {
+        "df_clustered": df_clustered,
+        "dataset_hash": fingerprint_dataframe(df_preprocessed),
+        "scaler": scaler,
+        "model": model,
+        "categorical_indices": categorical_indices,
+        "profile": profile,
+        "desc_map": desc_map,
+        "filled": filled,
+        "timings": timings,
+    }
+
+
+def cluster_partitioned_dataset(df, partition_by, n_clusters, engine="kmodes", max_workers=None):
+    # Satu model per nilai kolom partition_by; partisi difit paralel di process pool sendiri.
+    df_clustered, model, stats = fit_partitioned(df, partition_by, n_clusters, engine=engine, max_workers=max_workers)
+    filled = {}
+    for value, part in model.partitions.items():
+        filled.update({f"{col} ({partition_by} {value})": mean_val for col, mean_val in part["filled"].items()})
+    return {
+        "df_clustered": df_clustered,
+        "model": model,
+        "desc_map": model.cluster_desc_map,
+        "filled": filled,
+        "timings": {"Klasterisasi per Partisi (detik)": stats["Waktu (detik)"], "Jumlah Partisi": stats["Jumlah Partisi"]},
+    }
+
+
+def cluster_streamed_dataset(paths, n_clusters, chunk_rows):
+    # Mode --chunk-rows untuk data skala kabupaten: tabel tidak pernah dimuat utuh. Fit
+    # mini-batch out-of-core membaca file per potongan; yang disimpan di memori hanya label
+    # dan kolom fitur untuk profil klaster. Tabel hasil ditulis ulang per potongan oleh
+    # write_outputs lewat "labelled_chunks".
+    from streaming import chunks_from_files, cluster_out_of_core, collect_features, iter_labelled_chunks
+    timings = {}
+    chunk_factory = chunks_from_files(paths, chunk_rows)
+    start = time.perf_counter()
+    labels, model, scaler, categorical_indices = cluster_out_of_core(chunk_factory, n_clusters)
+    timings["Klasterisasi Out-of-core (detik)"] = time.perf_counter() - start
+    start = time.perf_counter()
+    df_raw, df_preprocessed = collect_features(chunk_factory, scaler)
+    labels = labels.astype(CLUSTER_LABEL_DTYPE)
+    profile = build_cluster_profile(df_raw, df_preprocessed, labels, n_clusters)
+    desc_map = describe_clusters(profile)
+    timings["Deskripsi (detik)"] = time.perf_counter() - start
+    filled = {col: float(scaler.mean_[j]) for j, col in enumerate(df_raw.columns) if df_raw[col].isna().any()}
+    return {
+        "df_clustered": None,
+        "labels": labels,
+        "labelled_chunks": lambda: iter_labelled_chunks(chunk_factory, labels),
+        "dataset_hash": fingerprint_dataframe(df_preprocessed),
+        "scaler": scaler,
+        "model": model,
+        "categorical_indices": categorical_indices,
+        "profile": profile,
+        "desc_map": desc_map,
+        "filled": filled,
+        "engine": STREAMED_ENGINE,
+        "timings": timings,
+    }
+
+
+def _read_group(paths):
+    return pd.concat([read_workbook(path) for path in paths], ignore_index=True) if len(paths) > 1 else read_workbook(paths[0])
+
+
+def _cluster_workbooks(paths, n_clusters, engine, n_jobs):
+    # Dijalankan di proses pekerja: satu kelompok workbook (digabung) -> hasil klasterisasi.
+    return cluster_dataset(_read_group(paths), n_clusters, engine=engine, n_jobs=n_jobs)
+
+
+def write_table(df, path_stem, fmt):
+    path = f"{path_stem}.{fmt}"
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "xlsx":
+        df.to_excel(path, index=False, engine="openpyxl")
+    else:
+        df.to_parquet(path, index=False)
+    return path
+
+
+def write_table_chunks(chunks, path_stem, fmt):
+    # Padanan write_table untuk mode --chunk-rows: tabel ditulis per potongan.
+    path = f"{path_stem}.{fmt}"
+    if fmt == "csv":
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+    elif fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                # Skema potongan pertama dipakai untuk semua potongan (mis. int vs float per potongan).
+                table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Mode --chunk-rows hanya dapat menulis tabel {', '.join(STREAMED_TABLE_FORMATS)}.")
+    return path
+
+
+def write_outputs(name, result, output_dir, artifact_dir, engine, table_format="csv", pdf_format="zip",
+                  max_workers=None):
+    out_dir = os.path.join(output_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+    df_clustered = result["df_clustered"]
+    labels = result["labels"] if df_clustered is None else df_clustered["Klaster"].to_numpy()
+    engine = result.get("engine", engine)
+    summary = {"Dataset": name, "Jumlah Siswa": len(labels), **result["timings"]}
+    table_stem = os.path.join(out_dir, "Hasil_Klasterisasi")
+    if df_clustered is None:
+        summary["Tabel"] = write_table_chunks(result["labelled_chunks"](), table_stem, table_format)
+    else:
+        summary["Tabel"] = write_table(df_clustered, table_stem, table_format)
+    with open(os.path.join(out_dir, "deskripsi_klaster.json"), "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in result["desc_map"].items()}, f, ensure_ascii=False, indent=2)
+    if isinstance(result["model"], PartitionedModel):
+        entries = save_partitioned_artifacts(result["model"], df_clustered=df_clustered, artifact_dir=artifact_dir)
+        summary["Versi Model"] = {entry["value"]: entry["version"] for entry in entries}
+    else:
+        summary["Versi Model"] = save_artifacts(
+            result["scaler"], result["model"], result["categorical_indices"], result["desc_map"], result["dataset_hash"],
+            df_clustered=df_clustered, engine=engine, artifact_dir=artifact_dir, cluster_profile=result["profile"],
+            extra_meta={"source": "batch_pipeline", "dataset_name": name},
+        )
+    if pdf_format and df_clustered is None:
+        # Laporan per siswa membutuhkan tabel utuh di memori; tidak dibuat pada mode --chunk-rows.
+        summary["Laporan PDF"] = None
+    elif pdf_format:
+        from pdf_reports import export_reports
+        pdf_path = os.path.join(out_dir, f"Laporan_Profil_Siswa.{pdf_format}")
+        stats = export_reports(df_clustered, result["desc_map"], pdf_path, fmt=pdf_format, max_workers=max_workers)
+        summary["Laporan PDF"] = pdf_path
+        summary["PDF (detik)"] = stats["Waktu (detik)"]
+    summary["Jumlah per Klaster"] = {str(k): int(v) for k, v in pd.Series(labels).value_counts().sort_index().items()}
+    return summary
+
+
+def run_pipeline(input_path, n_clusters, output_dir=DEFAULT_OUTPUT_DIR, artifact_dir=DEFAULT_ARTIFACT_DIR,
+                 engine="kmodes", combine=False, table_format="csv", pdf_format="zip", max_workers=None,
+                 partition_by=None, chunk_rows=None, log=print):
+    # Setiap workbook (atau gabungan semuanya bila combine=True) diklasterisasi di process
+    # pool; laporan PDF lalu dibuat berurutan per dataset memakai pool PDF sendiri.
+    # Dengan partition_by, dataset diproses berurutan dan pool dipakai untuk partisinya.
+    # Dengan chunk_rows, setiap dataset difit out-of-core berurutan di proses ini.
+    paths = find_workbooks(input_path)
+    groups = {"gabungan": paths} if combine and len(paths) > 1 else {
+        os.path.splitext(os.path.basename(path))[0]: [path] for path in paths
+    }
+    max_workers = max_workers or os.cpu_count() or 1
+    # Satu dataset: paralelisme di dalam fit (n_jobs=-1). Banyak dataset: satu dataset per pekerja.
+    n_jobs = -1 if len(groups) == 1 else 1
+    summaries, failures = [], {}
+
+    def finish(name, get_result):
+        try:
+            result = get_result()
+            dataset_artifact_dir = artifact_dir if len(groups) == 1 else os.path.join(artifact_dir, name)
+            summary = write_outputs(name, result, output_dir, dataset_artifact_dir, engine,
+                                    table_format=table_format, pdf_format=pdf_format, max_workers=max_workers)
+        except Exception as e:
+            # Workbook rusak (mis. BadZipFile pada .xlsx) tidak menghentikan dataset lain.
+            failures[name] = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+            log(f"[{name}] GAGAL: {failures[name]}")
+            return
+        for col, mean_val in result["filled"].items():
+            log(f"[{name}] Nilai kosong pada kolom '{col}' diisi dengan rata-rata: {mean_val:.2f}.")
+        versions = summary["Versi Model"]
+        model_text = f"{len(versions)} model partisi" if isinstance(versions, dict) else f"model {versions}"
+        log(f"[{name}] {summary['Jumlah Siswa']} siswa, {model_text}, hasil di {os.path.join(output_dir, name)}")
+        summaries.append(summary)
+
+    if partition_by:
+        for name, group in groups.items():
+            finish(name, lambda group=group: cluster_partitioned_dataset(
+                _read_group(group), partition_by, n_clusters, engine=engine, max_workers=max_workers))
+    elif chunk_rows:
+        for name, group in groups.items():
+            finish(name, lambda group=group: cluster_streamed_dataset(group, n_clusters, chunk_rows))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+            futures = {name: executor.submit(_cluster_workbooks, group, n_clusters, engine, n_jobs)
+                       for name, group in groups.items()}
+            for name, future in futures.items():
+                finish(name, future.result)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "ringkasan.json"), "w", encoding="utf-8") as f:
+        json.dump({"hasil": summaries, "gagal": failures}, f, ensure_ascii=False, indent=2)
+    return summaries, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline klasterisasi siswa tanpa browser (praproses, klasterisasi, artefak, PDF).")
+    parser.add_argument("input", help="File workbook (xlsx/csv/parquet) atau folder berisi workbook.")
+    parser.add_argument("--clusters", type=int, default=3, help="Jumlah klaster (K).")
+    parser.add_argument("--engine", choices=list(CLUSTERING_ENGINES), default="kmodes")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Folder hasil (tabel, deskripsi, laporan PDF).")
+    parser.add_argument("--artifact-dir", default=DEFAULT_ARTIFACT_DIR, help="Folder artefak model berversi.")
+    parser.add_argument("--combine", action="store_true", help="Gabungkan semua workbook di folder menjadi satu dataset.")
+    parser.add_argument("--table-format", choices=TABLE_FORMATS, default="csv")
+    parser.add_argument("--pdf-format", choices=["zip", "pdf", "none"], default="zip",
+                        help="zip: satu PDF per siswa, pdf: satu PDF gabungan, none: tanpa laporan.")
+    parser.add_argument("--partition-by", default=None, metavar="KOLOM",
+                        help="Klasterisasi terpisah per nilai kolom ini (mis. Kelas atau Sekolah), satu model per partisi.")
+    parser.add_argument("--chunk-rows", type=int, default=None, metavar="N",
+                        help="Klasterisasi out-of-core mini-batch: file dibaca per N baris tanpa memuat tabel utuh "
+                             "(untuk data skala kabupaten; tanpa laporan PDF).")
+    parser.add_argument("--max-workers", type=int, default=None, help="Jumlah proses pekerja (bawaan: semua core).")
+    args = parser.parse_args(argv)
+    if args.chunk_rows is not None:
+        if args.chunk_rows < 1:
+            parser.error("--chunk-rows harus bilangan bulat positif.")
+        if args.partition_by:
+            parser.error("--chunk-rows tidak dapat digabung dengan --partition-by.")
+        if args.table_format not in STREAMED_TABLE_FORMATS:
+            parser.error(f"--chunk-rows hanya mendukung --table-format {' atau '.join(STREAMED_TABLE_FORMATS)}.")
+    try:
+        _, failures = run_pipeline(
+            args.input, args.clusters, output_dir=args.output, artifact_dir=args.artifact_dir, engine=args.engine,
+            combine=args.combine, table_format=args.table_format,
+            pdf_format=None if args.pdf_format == "none" else args.pdf_format, max_workers=args.max_workers,
+            partition_by=args.partition_by, chunk_rows=args.chunk_rows,
+        )
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
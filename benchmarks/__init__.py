@@ -0,0 +1,2 @@
+# Benchmark tahap-tahap pipeline klasterisasi pada data sintetis.
+# Jalankan dengan: python -m benchmarks --help
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+
+from benchmarks.suite import (BASELINE_FILE, DEFAULT_N_CLUSTERS, DEFAULT_REPEAT, DEFAULT_SIZES, REGRESSION_MIN_DELTA_S,
+                              REGRESSION_TOLERANCE, STAGES, compare_with_baseline, load_results, renderer_speedups, run_suite,
+                              save_results)
+from charts import CHART_BACKENDS
+from clustering import CLUSTERING_ENGINES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline klasterisasi siswa pada data sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Jumlah baris data sintetis (mis. 1000 10000 100000 1000000).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--engine", choices=list(CLUSTERING_ENGINES), default="numpy")
+    parser.add_argument("--clusters", type=int, default=DEFAULT_N_CLUSTERS)
+    parser.add_argument("--chart-backend", choices=CHART_BACKENDS, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="Berkas JSON hasil benchmark.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Berkas JSON baseline pembanding.")
+    parser.add_argument("--save-baseline", action="store_true", help="Simpan hasil ini sebagai baseline baru.")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="Batas kenaikan waktu tercepat relatif terhadap baseline (0.25 = 25%%).")
+    parser.add_argument("--min-delta-ms", type=float, default=REGRESSION_MIN_DELTA_S * 1000,
+                        help="Kenaikan waktu di bawah batas ini (milidetik) tidak dihitung regresi.")
+    args = parser.parse_args(argv)
+
+    def progress(stage, n_rows):
+        print(f"[{n_rows:>9,} baris] {stage} ...", file=sys.stderr)
+
+    report = run_suite(args.sizes, repeat=args.repeat, engine=args.engine, n_clusters=args.clusters, seed=args.seed,
+                       stages=args.stages, chart_backend=args.chart_backend, progress=progress)
+    save_results(report, args.output)
+    print(f"{'Tahap':<14}{'Baris':>10}{'Median (s)':>12}{'Item/detik':>14}{'Puncak (MB)':>13}")
+    for row in report["results"]:
+        print(f"{row['stage']:<14}{row['rows']:>10,}{row['median_s']:>12.4f}{row['items_per_s']:>14,.0f}{row['peak_mb']:>13.1f}")
+    for n_rows, speedup in renderer_speedups(report).items():
+        print(f"PDF template vs FPDF penuh ({n_rows:,} baris): {speedup:.1f}x lebih cepat")
+
+    exit_code = 0
+    if args.save_baseline:
+        save_results(report, args.baseline)
+        print(f"Baseline disimpan ke {args.baseline}")
+    elif os.path.exists(args.baseline):
+        comparison = compare_with_baseline(report, load_results(args.baseline), tolerance=args.tolerance,
+                                           min_delta_s=args.min_delta_ms / 1000)
+        print(f"\nPerbandingan dengan baseline {args.baseline}:")
+        for row in comparison:
+            status = "REGRESI" if row["regression"] else "ok"
+            print(f"{row['stage']:<14}{row['rows']:>10,}{row['baseline_s']:>12.4f}{row['min_s']:>12.4f}{row['ratio']:>8.2f}x  {status}")
+        if any(row["regression"] for row in comparison):
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
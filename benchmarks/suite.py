@@ -0,0 +1,189 @@
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_roster
+from charts import CHART_BACKEND, cluster_profile_chart, get_chart_cache, student_profile_chart
+from cluster_profile import build_cluster_profile, describe_clusters
+from clustering import fit_kprototypes
+from prediction import predict_batch
+from preprocessing import preprocess_table
+from schema import CATEGORICAL_COLS, NUMERIC_COLS, to_student_table
+
+# --- SUITE BENCHMARK PIPELINE ---
+# Setiap tahap dijalankan sekali di bawah tracemalloc (puncak memori), lalu `repeat`
+# kali tanpa tracemalloc untuk waktu. PDF dan grafik dibuat per siswa, sehingga
+# diukur pada sampel paling banyak OUTPUT_SAMPLE_ROWS siswa. Tahap "pdf" memakai jalur
+# template, "pdf_fpdf" jalur FPDF penuh untuk sampel yang sama (pembanding renderer).
+STAGES = ["praproses", "klasterisasi", "deskripsi", "prediksi", "pdf", "pdf_fpdf", "grafik"]
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_REPEAT = 3
+# Tahap singkat diulang sampai total waktu terukur paling sedikit ini (maks. MAX_REPEAT kali),
+# agar waktu tercepatnya diambil dari cukup banyak sampel.
+MIN_MEASURE_SECONDS = 1.0
+MAX_REPEAT = 200
+DEFAULT_N_CLUSTERS = 4
+OUTPUT_SAMPLE_ROWS = 1_000
+REGRESSION_TOLERANCE = 0.25
+# Selisih waktu di bawah ini (detik) dianggap derau, berapa pun rasionya: tahap berdurasi
+# milidetik dapat berbeda >25% antara dua run identik.
+REGRESSION_MIN_DELTA_S = 0.005
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure(fn, repeat=DEFAULT_REPEAT, reset=None, min_seconds=MIN_MEASURE_SECONDS):
+    # Mengembalikan (daftar waktu dalam detik, puncak memori dalam byte).
+    if reset:
+        reset()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    times = []
+    while len(times) < max(int(repeat), 1) or (sum(times) < min_seconds and len(times) < MAX_REPEAT):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times, peak
+
+
+def _result_row(stage, n_rows, n_items, times, peak):
+    median = statistics.median(times)
+    return {
+        "stage": stage,
+        "rows": n_rows,
+        "items": n_items,
+        "repeat": len(times),
+        "median_s": median,
+        "min_s": min(times),
+        "max_s": max(times),
+        "items_per_s": n_items / median if median > 0 else float("inf"),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def run_size(n_rows, repeat=DEFAULT_REPEAT, engine="numpy", n_clusters=DEFAULT_N_CLUSTERS, seed=0,
+             stages=STAGES, chart_backend=None, progress=None):
+    # Tahap dijalankan berurutan; keluaran tahap sebelumnya (tanpa diukur) menjadi masukan
+    # tahap berikutnya, sama seperti alur di aplikasi.
+    chart_backend = chart_backend or CHART_BACKEND
+    df = generate_roster(n_rows, seed=seed)
+    table = to_student_table(df)
+    df_preprocessed, scaler, _ = preprocess_table(df)
+    labels, model, categorical = fit_kprototypes(df_preprocessed, n_clusters, engine=engine)
+    profile = build_cluster_profile(table, df_preprocessed, labels, n_clusters)
+    desc_map = describe_clusters(profile)
+    sample = table.iloc[:OUTPUT_SAMPLE_ROWS].assign(Klaster=labels[:OUTPUT_SAMPLE_ROWS])
+    records = sample.to_dict("records")
+
+    from pdf_reports import generate_profile_pdf, generate_profile_pdf_fpdf
+
+    def pdf_stage(render):
+        def render_pdfs():
+            for record in records:
+                render(record["Nama"], record, int(record["Klaster"]), desc_map)
+        return render_pdfs
+
+    def render_charts():
+        for i in range(n_clusters):
+            values = profile["norm_mean"].loc[i].fillna(0).tolist() + [int(v) for v in profile["flag_mode"].loc[i]]
+            cluster_profile_chart(("benchmark", n_rows), i, values, backend=chart_backend)
+        for record in records:
+            values = [record[NUMERIC_COLS[0]], record[NUMERIC_COLS[1]] * 100] + [int(record[col]) * 100 for col in CATEGORICAL_COLS]
+            student_profile_chart(("benchmark", n_rows), record["No"], record["Nama"], values, backend=chart_backend)
+
+    plans = {
+        "praproses": (lambda: preprocess_table(df), n_rows, None),
+        "klasterisasi": (lambda: fit_kprototypes(df_preprocessed, n_clusters, engine=engine), n_rows, None),
+        "deskripsi": (lambda: describe_clusters(build_cluster_profile(table, df_preprocessed, labels, n_clusters)), n_rows, None),
+        "prediksi": (lambda: predict_batch(df, scaler, model, categorical, desc_map), n_rows, None),
+        "pdf": (pdf_stage(generate_profile_pdf), len(records), None),
+        "pdf_fpdf": (pdf_stage(generate_profile_pdf_fpdf), len(records), None),
+        # Cache PNG dikosongkan agar backend matplotlib diukur saat benar-benar merender.
+        "grafik": (render_charts, len(records) + n_clusters, get_chart_cache().clear),
+    }
+    rows = []
+    for stage in stages:
+        fn, n_items, reset = plans[stage]
+        if progress:
+            progress(stage, n_rows)
+        times, peak = measure(fn, repeat=repeat, reset=reset)
+        rows.append(_result_row(stage, n_rows, n_items, times, peak))
+    return rows
+
+
+def environment_info(engine, chart_backend):
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "engine": engine,
+        "chart_backend": chart_backend or CHART_BACKEND,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, engine="numpy", n_clusters=DEFAULT_N_CLUSTERS,
+              seed=0, stages=STAGES, chart_backend=None, progress=None):
+    results = []
+    for n_rows in sizes:
+        results.extend(run_size(int(n_rows), repeat=repeat, engine=engine, n_clusters=n_clusters, seed=seed,
+                                stages=stages, chart_backend=chart_backend, progress=progress))
+    return {"environment": environment_info(engine, chart_backend), "results": results}
+
+
+def save_results(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def renderer_speedups(report):
+    # Percepatan renderer PDF template terhadap FPDF penuh per ukuran data (median waktu).
+    medians = {(row["stage"], row["rows"]): row["median_s"] for row in report["results"]}
+    return {
+        n_rows: medians[("pdf_fpdf", n_rows)] / median
+        for (stage, n_rows), median in medians.items()
+        if stage == "pdf" and ("pdf_fpdf", n_rows) in medians and median > 0
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE, min_delta_s=REGRESSION_MIN_DELTA_S):
+    # Regresi: waktu tercepat (min, paling tahan derau) lebih dari (1 + tolerance) kali
+    # waktu tercepat baseline DAN lebih lambat paling sedikit min_delta_s detik, untuk tahap
+    # dan ukuran data yang sama. Tahap/ukuran yang tidak ada di baseline dilewati.
+    reference = {(row["stage"], row["rows"]): row for row in baseline["results"]}
+    rows = []
+    for row in report["results"]:
+        base = reference.get((row["stage"], row["rows"]))
+        if base is None:
+            continue
+        ratio = row["min_s"] / base["min_s"] if base["min_s"] > 0 else float("inf")
+        rows.append({
+            "stage": row["stage"],
+            "rows": row["rows"],
+            "baseline_s": base["min_s"],
+            "min_s": row["min_s"],
+            "median_s": row["median_s"],
+            "ratio": ratio,
+            "peak_mb": row["peak_mb"],
+            "baseline_peak_mb": base["peak_mb"],
+            "regression": ratio > 1 + tolerance and row["min_s"] - base["min_s"] > min_delta_s,
+        })
+    return rows
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORICAL_COLS, ID_COLS, NUMERIC_COLS
+
+# --- DATA SISWA SINTETIS ---
+# Mengikuti skema persis (ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS). Siswa dibangkitkan
+# dari beberapa kelompok laten (nilai, kehadiran dan peluang ekskul berbeda) agar
+# klasterisasi bekerja pada struktur yang mirip data sekolah sungguhan.
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+NAMA_DEPAN = ["Ahmad", "Muhammad", "Siti", "Nur", "Dewi", "Rizki", "Putri", "Budi", "Aisyah", "Fajar",
+              "Indah", "Agus", "Rina", "Hendra", "Fitri", "Yusuf", "Lestari", "Dimas", "Ayu", "Rahmat"]
+NAMA_BELAKANG = ["Saputra", "Rahmawati", "Hidayat", "Lestari", "Pratama", "Wulandari", "Setiawan",
+                 "Kurniawan", "Handayani", "Nugroho", "Permata", "Syahputra", "Maharani", "Firmansyah"]
+KELAS = [f"{tingkat} {jurusan} {nomor}" for tingkat in ("X", "XI", "XII") for jurusan in ("IPA", "IPS") for nomor in (1, 2, 3)]
+# Kelompok laten: (rata-rata nilai, sd nilai, rata-rata kehadiran, sd kehadiran, peluang tiap ekskul).
+LATENT_GROUPS = [
+    (88.0, 4.0, 0.96, 0.02, [0.6, 0.1, 0.1, 0.5]),
+    (78.0, 5.0, 0.90, 0.04, [0.2, 0.5, 0.2, 0.6]),
+    (70.0, 6.0, 0.80, 0.07, [0.1, 0.2, 0.6, 0.3]),
+    (62.0, 7.0, 0.68, 0.10, [0.1, 0.1, 0.1, 0.2]),
+]
+
+
+def generate_roster(n_rows, seed=0, missing_rate=0.01):
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, len(LATENT_GROUPS), n_rows)
+    params = [np.array([g[i] for g in LATENT_GROUPS]) for i in range(4)]
+    nilai = np.clip(rng.normal(params[0][group], params[1][group]), 0, 100).round(2)
+    kehadiran = np.clip(rng.normal(params[2][group], params[3][group]), 0, 1).round(4)
+    for values in (nilai, kehadiran):
+        values[rng.random(n_rows) < missing_rate] = np.nan
+    ekskul_prob = np.array([g[4] for g in LATENT_GROUPS])[group]
+    flags = (rng.random((n_rows, len(CATEGORICAL_COLS))) < ekskul_prob).astype(np.int64)
+    nama = (np.array(NAMA_DEPAN, dtype=object)[rng.integers(0, len(NAMA_DEPAN), n_rows)] + " "
+            + np.array(NAMA_BELAKANG, dtype=object)[rng.integers(0, len(NAMA_BELAKANG), n_rows)])
+    columns = {
+        "No": np.arange(1, n_rows + 1),
+        "Nama": nama,
+        "JK": rng.choice(["L", "P"], n_rows),
+        "Kelas": np.array(KELAS, dtype=object)[rng.integers(0, len(KELAS), n_rows)],
+        NUMERIC_COLS[0]: nilai,
+        NUMERIC_COLS[1]: kehadiran,
+    }
+    columns.update({col: flags[:, j] for j, col in enumerate(CATEGORICAL_COLS)})
+    return pd.DataFrame(columns, columns=ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS)
@@ -0,0 +1,155 @@
+import io
+import os
+
+import pandas as pd
+
+from lru import LRUCache
+from schema import CATEGORICAL_COLS
+
+# --- BACKEND GRAFIK PROFIL ---
+# "vega" (bawaan): grafik Vega-Lite bawaan Streamlit dari DataFrame kecil; tidak ada
+# rendering di server dan matplotlib/seaborn tidak diimpor sama sekali.
+# "matplotlib" (opsional, mis. untuk disematkan ke PDF): grafik dirender sekali menjadi
+# PNG lalu disimpan di cache LRU bersama (dibatasi jumlah entri dan total byte). Kunci
+# mencakup cakupan data (versi model / hasil klasterisasi), ID klaster atau siswa,
+# dan nilai yang digambar.
+CHART_BACKENDS = ["vega", "matplotlib"]
+CHART_BACKEND = os.environ.get("CHART_BACKEND", "vega")
+CHART_CACHE_MAX_ENTRIES = 512
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_DPI = 100
+CHART_FIGSIZE = (10, 6)
+# Lebar PNG dalam piksel; st.image tetap membatasinya pada lebar kolom.
+CHART_PNG_WIDTH = CHART_FIGSIZE[0] * CHART_DPI
+EKSKUL_LABELS = [col.replace("Ekstrakurikuler ", "Ekskul\n") for col in CATEGORICAL_COLS]
+CLUSTER_CHART_LABELS = ["Nilai (Norm)", "Kehadiran (Norm)"] + EKSKUL_LABELS
+NEW_STUDENT_CHART_LABELS = ["Nilai Akademik (Norm)", "Kehadiran (Norm)"] + EKSKUL_LABELS
+STUDENT_CHART_LABELS = ["Rata-rata\nNilai Akademik", "Kehadiran (%)"] + EKSKUL_LABELS
+
+_chart_cache = LRUCache(max_entries=CHART_CACHE_MAX_ENTRIES, max_bytes=CHART_CACHE_MAX_BYTES, sizeof=len)
+
+
+def get_chart_cache():
+    return _chart_cache
+
+
+def _values_key(values):
+    return tuple(round(float(v), 6) for v in values)
+
+
+def _figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=CHART_DPI)
+    return buffer.getvalue()
+
+
+def _render_normalized_bars(labels, values, palette, title):
+    # Figure dibuat tanpa pyplot agar tidak ada state global yang perlu ditutup.
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=CHART_FIGSIZE)
+    ax = fig.subplots()
+    bars = sns.barplot(x=labels, y=values, palette=palette, ax=ax)
+    ax.set_ylim(min(values) - 0.2 if values else -1, max(values) + 0.2 if values else 1)
+    for index, value in enumerate(values):
+        offset = 0.05 if value >= 0 else -0.1
+        ax.text(bars.patches[index].get_x() + bars.patches[index].get_width() / 2, bars.patches[index].get_height() + offset, f"{value:.2f}", ha='center', fontsize=9, weight='bold')
+    ax.set_title(title, fontsize=16, weight='bold')
+    ax.set_ylabel("Nilai (Dinormalisasi / Biner)")
+    ax.tick_params(axis="x", labelrotation=0)
+    fig.tight_layout()
+    return _figure_to_png(fig)
+
+
+def _render_student_bars(labels, values, title):
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=CHART_FIGSIZE)
+    ax = fig.subplots()
+    bars = sns.barplot(x=labels, y=values, palette="magma", ax=ax)
+    max_plot_val = max(values) if values else 100
+    ax.set_ylim(0, max(100, max_plot_val * 1.1))
+    for bar, val in zip(bars.patches, values):
+        ax.text(bar.get_x() + bar.get_width() / 2, val + (ax.get_ylim()[1] * 0.02), f"{val:.1f}", ha='center', fontsize=9, weight='bold')
+    ax.set_title(title, fontsize=16, weight='bold')
+    ax.set_ylabel("Nilai / Status (%)")
+    ax.tick_params(axis="x", labelrotation=0)
+    fig.tight_layout()
+    return _figure_to_png(fig)
+
+
+def _cached_chart(key, render):
+    png = _chart_cache.get(key)
+    if png is None:
+        png = render()
+        _chart_cache.put(key, png)
+    return png
+
+
+def _bar_spec(title, y_title, y_domain, value_format, scheme):
+    # Label sumbu x dipecah pada "\n" agar sama dengan versi matplotlib.
+    return {
+        "title": {"text": title, "fontSize": 16, "fontWeight": "bold"},
+        "height": 360,
+        "encoding": {
+            "x": {"field": "Fitur", "type": "nominal", "sort": None, "title": None,
+                  "axis": {"labelAngle": 0, "labelExpr": "split(datum.label, '\\n')"}},
+            "y": {"field": "Nilai", "type": "quantitative", "title": y_title,
+                  "scale": {"domain": y_domain}},
+        },
+        "layer": [
+            {"mark": {"type": "bar"},
+             "encoding": {"color": {"field": "Fitur", "type": "nominal", "sort": None, "legend": None,
+                                    "scale": {"scheme": scheme}}}},
+            {"mark": {"type": "text", "dy": -8, "fontWeight": "bold", "fontSize": 11},
+             "encoding": {"text": {"field": "Nilai", "type": "quantitative", "format": value_format}}},
+        ],
+    }
+
+
+def _vega_normalized_chart(labels, values, title, scheme):
+    data = pd.DataFrame({"Fitur": labels, "Nilai": values})
+    domain = [min(values) - 0.2 if values else -1, max(values) + 0.2 if values else 1]
+    return {"data": data, "spec": _bar_spec(title, "Nilai (Dinormalisasi / Biner)", domain, ".2f", scheme)}
+
+
+def _vega_student_chart(labels, values, title):
+    data = pd.DataFrame({"Fitur": labels, "Nilai": values})
+    domain = [0, max(100, (max(values) if values else 100) * 1.1)]
+    return {"data": data, "spec": _bar_spec(title, "Nilai / Status (%)", domain, ".1f", "magma")}
+
+
+def _resolve_backend(backend):
+    backend = backend or CHART_BACKEND
+    if backend not in CHART_BACKENDS:
+        raise ValueError(f"Backend grafik tidak dikenal: {backend}")
+    return backend
+
+
+# Setiap fungsi grafik mengembalikan {"data", "spec"} (Vega-Lite) atau {"png"} (matplotlib).
+def cluster_profile_chart(scope, cluster_id, values, backend=None):
+    values = [float(v) for v in values]
+    title = f"Profil Klaster {cluster_id}"
+    if _resolve_backend(backend) == "vega":
+        return _vega_normalized_chart(CLUSTER_CHART_LABELS, values, title, "tableau10")
+    key = ("cluster", scope, int(cluster_id), _values_key(values))
+    return {"png": _cached_chart(key, lambda: _render_normalized_bars(CLUSTER_CHART_LABELS, values, "cubehelix", title))}
+
+
+def new_student_chart(values, backend=None):
+    values = [float(v) for v in values]
+    if _resolve_backend(backend) == "vega":
+        return _vega_normalized_chart(NEW_STUDENT_CHART_LABELS, values, "Profil Siswa Baru", "viridis")
+    key = ("new_student", _values_key(values))
+    return {"png": _cached_chart(key, lambda: _render_normalized_bars(
+        NEW_STUDENT_CHART_LABELS, values, "viridis", "Profil Siswa Baru"
+    ))}
+
+
+def student_profile_chart(scope, student_id, nama, values, backend=None):
+    values = [float(v) for v in values]
+    title = f"Grafik Profil Siswa - {nama}"
+    if _resolve_backend(backend) == "vega":
+        return _vega_student_chart(STUDENT_CHART_LABELS, values, title)
+    key = ("student", scope, str(student_id), str(nama), _values_key(values))
+    return {"png": _cached_chart(key, lambda: _render_student_bars(STUDENT_CHART_LABELS, values, title))}
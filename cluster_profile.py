@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+from lru import LRUCache
+from schema import CATEGORICAL_COLS, NUMERIC_COLS
+
+# --- RINGKASAN PROFIL KLASTER ---
+# Dibangun sekali saat model dilatih; dasbor hanya membaca ringkasan ini.
+#   counts    -> jumlah siswa per klaster
+#   norm_mean -> rata-rata fitur numerik yang dinormalisasi
+#   norm_std  -> deviasi standar fitur numerik yang dinormalisasi
+#   raw_mean, raw_std, raw_q25, raw_median, raw_q75 -> statistik fitur numerik asli
+#   flag_freq -> proporsi siswa yang mengikuti setiap ekstrakurikuler
+#   flag_mode -> modus (0/1) setiap ekstrakurikuler
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+QUANTILE_FRAMES = ["raw_q25", "raw_median", "raw_q75"]
+PROFILE_FRAMES = ["norm_mean", "norm_std", "raw_mean", "raw_std", *QUANTILE_FRAMES, "flag_freq", "flag_mode"]
+PROFILE_CACHE_MAX_ENTRIES = 32
+
+_profile_cache = LRUCache(max_entries=PROFILE_CACHE_MAX_ENTRIES)
+
+
+def _grouped_quantiles(values, labels, valid_counts, n_clusters, quantiles):
+    # Urutkan per nilai lalu stable sort per klaster (radix untuk label int16);
+    # NaN berada di akhir setiap grup sehingga kuantil cukup diambil dari indeks
+    # hasil interpolasi linier.
+    out = np.full((len(quantiles), n_clusters), np.nan)
+    has_values = valid_counts > 0
+    if not has_values.any():
+        return out
+    order = np.argsort(values)
+    label_codes = labels.astype(np.int16 if n_clusters <= np.iinfo(np.int16).max else np.int64)
+    sorted_values = values[order[np.argsort(label_codes[order], kind="stable")]]
+    group_counts = np.bincount(labels, minlength=n_clusters)
+    starts = np.cumsum(group_counts) - group_counts
+    last = len(sorted_values) - 1
+    for qi, q in enumerate(quantiles):
+        position = starts + q * np.maximum(valid_counts - 1, 0)
+        lo = np.minimum(np.floor(position).astype(np.int64), last)
+        hi = np.minimum(np.ceil(position).astype(np.int64), last)
+        interpolated = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (position - lo)
+        out[qi, has_values] = interpolated[has_values]
+    return out
+
+
+def _encode_levels(column):
+    values = np.asarray(column)
+    if values.dtype.kind == "O":
+        values = values.astype(str)
+    levels, codes = np.unique(values, return_inverse=True)
+    return levels, codes.ravel()
+
+
+def grouped_statistics(labels, n_clusters, numeric=None, categorical=(), quantiles=DEFAULT_QUANTILES):
+    # Mesin profil satu lintasan: semua statistik per klaster dihitung dengan
+    # bincount/lexsort pada array bertipe, tanpa membuat subset per klaster.
+    labels = np.asarray(labels, dtype=np.int64)
+    counts = np.bincount(labels, minlength=n_clusters)
+    stats = {"counts": counts}
+    if numeric is not None:
+        numeric = np.asarray(numeric, dtype=np.float64)
+        n_cols = numeric.shape[1]
+        valid = ~np.isnan(numeric)
+        filled = np.where(valid, numeric, 0.0)
+        # Satu bincount untuk seluruh kolom: indeks = kolom * K + klaster.
+        flat_index = (np.arange(n_cols) * n_clusters + labels[:, None]).ravel()
+        size = n_cols * n_clusters
+        valid_counts = np.bincount(flat_index, weights=valid.ravel(), minlength=size).reshape(n_cols, n_clusters)
+        sums = np.bincount(flat_index, weights=filled.ravel(), minlength=size).reshape(n_cols, n_clusters)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / valid_counts
+            centered = np.where(valid, numeric - means.T[labels], 0.0)
+            squares = np.bincount(flat_index, weights=(centered ** 2).ravel(), minlength=size).reshape(n_cols, n_clusters)
+            stds = np.sqrt(squares / (valid_counts - 1))
+        stats["valid_counts"] = valid_counts.T
+        stats["mean"] = means.T
+        stats["std"] = np.where(valid_counts > 1, stds, np.nan).T
+        stats["quantiles"] = np.stack([
+            _grouped_quantiles(numeric[:, j], labels, valid_counts[j].astype(np.int64), n_clusters, quantiles)
+            for j in range(n_cols)
+        ], axis=-1)
+    if len(categorical):
+        encoded = [_encode_levels(column) for column in categorical]
+        sizes = np.array([len(levels) for levels, _ in encoded])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        total_levels = int(sizes.sum())
+        # Satu bincount untuk seluruh kolom kategorikal: indeks = klaster * L + offset + kode.
+        flat_index = np.concatenate([
+            labels * total_levels + offset + codes for offset, (_, codes) in zip(offsets, encoded)
+        ])
+        table = np.bincount(flat_index, minlength=n_clusters * total_levels).reshape(n_clusters, total_levels)
+        frequencies, modes = [], []
+        for offset, size, (levels, _) in zip(offsets, sizes, encoded):
+            level_counts = table[:, offset:offset + size]
+            # Seri memilih level terkecil, sama seperti .mode().iloc[0] pandas.
+            modes.append(levels[np.argmax(level_counts, axis=1)])
+            frequencies.append((levels, level_counts))
+        stats["category_counts"] = frequencies
+        stats["category_modes"] = modes
+    return stats
+
+
+def _level_share(levels, level_counts, counts, level):
+    match = np.flatnonzero(levels.astype(str) == str(level))
+    if not len(match):
+        return np.zeros(len(counts))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, level_counts[:, match[0]] / counts, np.nan)
+
+
+def build_cluster_profile(df_raw, df_normalized, labels, n_clusters):
+    clusters = pd.RangeIndex(n_clusters, name="Klaster")
+    labels = np.asarray(labels)
+    raw_stats = grouped_statistics(labels, n_clusters, numeric=df_raw[NUMERIC_COLS].to_numpy(dtype=np.float64))
+    norm_stats = grouped_statistics(
+        labels, n_clusters,
+        numeric=df_normalized[NUMERIC_COLS].to_numpy(dtype=np.float64),
+        categorical=[df_normalized[col].to_numpy() for col in CATEGORICAL_COLS],
+    )
+    counts = norm_stats["counts"]
+    flag_freq = {
+        col: _level_share(levels, level_counts, counts, 1)
+        for col, (levels, level_counts) in zip(CATEGORICAL_COLS, norm_stats["category_counts"])
+    }
+    flag_mode = {
+        col: pd.to_numeric(pd.Series(mode), errors="coerce").fillna(0).astype(int).to_numpy()
+        for col, mode in zip(CATEGORICAL_COLS, norm_stats["category_modes"])
+    }
+    profile = {
+        "n_clusters": int(n_clusters),
+        "counts": pd.Series(counts.astype(int), index=clusters, name="count"),
+        "norm_mean": pd.DataFrame(norm_stats["mean"], index=clusters, columns=NUMERIC_COLS),
+        "norm_std": pd.DataFrame(norm_stats["std"], index=clusters, columns=NUMERIC_COLS),
+        "raw_mean": pd.DataFrame(raw_stats["mean"], index=clusters, columns=NUMERIC_COLS),
+        "raw_std": pd.DataFrame(raw_stats["std"], index=clusters, columns=NUMERIC_COLS),
+        "flag_freq": pd.DataFrame(flag_freq, index=clusters),
+        "flag_mode": pd.DataFrame(flag_mode, index=clusters),
+    }
+    for qi, name in enumerate(QUANTILE_FRAMES):
+        profile[name] = pd.DataFrame(raw_stats["quantiles"][qi], index=clusters, columns=NUMERIC_COLS)
+    return profile
+
+
+def describe_clusters(profile):
+    # Deskripsi teks per klaster dibaca dari ringkasan profil (tanpa Streamlit).
+    cluster_characteristics_map = {}
+    if profile is None:
+        return {}
+
+    categorical_cols = list(profile["flag_mode"].columns)
+    for i in range(profile["n_clusters"]):
+        avg_scaled_values = profile["norm_mean"].loc[i]
+        mode_values = profile["flag_mode"].loc[i]
+        desc = ""
+        if avg_scaled_values["Rata Rata Nilai Akademik"] > 0.75:
+            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat tinggi. "
+        elif avg_scaled_values["Rata Rata Nilai Akademik"] > 0.25:
+            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di atas rata-rata. "
+        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.75:
+            desc += "Siswa di klaster ini memiliki nilai akademik cenderung sangat rendah. "
+        elif avg_scaled_values["Rata Rata Nilai Akademik"] < -0.25:
+            desc += "Siswa di klaster ini memiliki nilai akademik cenderung di bawah rata-rata. "
+        else:
+            desc += "Siswa di klaster ini memiliki nilai akademik cenderung rata-rata. "
+        if avg_scaled_values["Kehadiran"] > 0.75:
+            desc += "Tingkat kehadiran cenderung sangat tinggi. "
+        elif avg_scaled_values["Kehadiran"] > 0.25:
+            desc += "Tingkat kehadiran cenderung di atas rata-rata. "
+        elif avg_scaled_values["Kehadiran"] < -0.75:
+            desc += "Tingkat kehadiran cenderung sangat rendah. "
+        elif avg_scaled_values["Kehadiran"] < -0.25:
+            desc += "Tingkat kehadiran cenderung di bawah rata-rata. "
+        else:
+            desc += "Tingkat kehadiran cenderung rata-rata. "
+        ekskul_aktif_modes = [col_name for col_name in categorical_cols if mode_values[col_name] == 1]
+        if ekskul_aktif_modes:
+            desc += f"Siswa di klaster ini aktif dalam ekstrakurikuler: {', '.join([c.replace('Ekstrakurikuler ', '') for c in ekskul_aktif_modes])}."
+        else:
+            desc += "Siswa di klaster ini kurang aktif dalam kegiatan ekstrakurikuler."
+        cluster_characteristics_map[i] = desc
+    return cluster_characteristics_map
+
+
+def get_or_build_profile(key, builder):
+    # Ringkasan untuk K sementara (halaman visualisasi operator) disimpan di cache
+    # bersama dengan kunci yang sama seperti hasil klasterisasinya.
+    profile = _profile_cache.get(key)
+    if profile is None:
+        profile = builder()
+        _profile_cache.put(key, profile)
+    return profile
+
+
+def profile_to_json(profile):
+    payload = {"n_clusters": profile["n_clusters"], "counts": profile["counts"].tolist()}
+    for name in PROFILE_FRAMES:
+        payload[name] = profile[name].to_dict(orient="split")
+    return payload
+
+
+def profile_from_json(payload):
+    clusters = pd.RangeIndex(payload["n_clusters"], name="Klaster")
+    profile = {
+        "n_clusters": int(payload["n_clusters"]),
+        "counts": pd.Series(payload["counts"], index=clusters, name="count"),
+    }
+    for name in PROFILE_FRAMES:
+        if name not in payload:
+            continue
+        split = payload[name]
+        frame = pd.DataFrame(split["data"], columns=split["columns"], index=clusters)
+        profile[name] = frame
+    return profile
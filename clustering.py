@@ -0,0 +1,182 @@
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from kproto_engine import (FastKPrototypes, MiniBatchKPrototypes, encode_categorical, extract_prototypes,
+                           resize_prototypes, split_mixed_matrix)
+from lru import LRUCache
+from schema import ALL_FEATURES_FOR_CLUSTERING, CATEGORICAL_COLS
+
+# --- PARAMETER MODEL ---
+DEFAULT_KPROTO_PARAMS = {"init": "Huang", "n_init": 10, "random_state": 42}
+RESULT_CACHE_MAX_ENTRIES = 32
+# Warm start diterima bila biayanya paling banyak 2% di atas biaya acuan.
+WARM_START_COST_TOLERANCE = 0.02
+CLUSTERING_ENGINES = {
+    "kmodes": "kmodes (standar)",
+    "numpy": "NumPy tervektorisasi (cepat)",
+    "minibatch": "Mini-batch (data sangat besar)",
+}
+
+
+def fingerprint_dataframe(df):
+    # Sidik jari berbasis isi: nama kolom, tipe data, dan hash setiap baris.
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr(list(df.columns)).encode("utf-8"))
+    hasher.update(repr([str(t) for t in df.dtypes]).encode("utf-8"))
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    hasher.update(np.ascontiguousarray(row_hashes).tobytes())
+    return hasher.hexdigest()
+
+
+_result_cache = LRUCache(max_entries=RESULT_CACHE_MAX_ENTRIES)
+
+
+def get_result_cache():
+    return _result_cache
+
+
+def make_cache_key(df_preprocessed, n_clusters, engine="kmodes", fingerprint=None, **params):
+    merged = {**DEFAULT_KPROTO_PARAMS, **params}
+    if fingerprint is None:
+        fingerprint = fingerprint_dataframe(df_preprocessed)
+    return (fingerprint, int(n_clusters), engine, tuple(sorted(merged.items())))
+
+
+def make_model(n_clusters, engine="kmodes", n_jobs=-1, **params):
+    merged = {**DEFAULT_KPROTO_PARAMS, **params}
+    if engine == "kmodes":
+        # kmodes (dan scikit-learn di baliknya) baru diimpor saat mesin ini dipakai.
+        from kmodes.kprototypes import KPrototypes
+        return KPrototypes(n_clusters=n_clusters, verbose=0, n_jobs=n_jobs, **merged)
+    if engine == "numpy":
+        return FastKPrototypes(n_clusters=n_clusters, verbose=0, n_jobs=n_jobs, **merged)
+    if engine == "minibatch":
+        return MiniBatchKPrototypes(n_clusters=n_clusters, verbose=0, n_jobs=n_jobs, **merged)
+    raise ValueError(f"Mesin klasterisasi tidak dikenal: {engine!r}")
+
+
+def fit_kprototypes(df_preprocessed, n_clusters, engine="kmodes", n_jobs=-1, **params):
+    X_data = df_preprocessed[ALL_FEATURES_FOR_CLUSTERING]
+    categorical_feature_indices = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    kproto = make_model(n_clusters, engine=engine, n_jobs=n_jobs, **params)
+    start = time.perf_counter()
+    if engine in ("numpy", "minibatch"):
+        # Mesin NumPy membaca kolom bertipe langsung dari DataFrame, tanpa
+        # konversi ke matriks object.
+        clusters = kproto.fit_predict(X_data, categorical=categorical_feature_indices)
+    else:
+        clusters = kproto.fit_predict(X_data.to_numpy(), categorical=categorical_feature_indices)
+    kproto.fit_seconds_ = time.perf_counter() - start
+    return np.asarray(clusters), kproto, categorical_feature_indices
+
+
+def cached_fit_kprototypes(df_preprocessed, n_clusters, engine="kmodes", n_jobs=-1, **params):
+    # n_jobs tidak memengaruhi hasil (random_state tetap), jadi tidak masuk kunci cache.
+    cache = get_result_cache()
+    key = make_cache_key(df_preprocessed, n_clusters, engine=engine, **params)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    clusters, kproto, categorical_feature_indices = fit_kprototypes(
+        df_preprocessed, n_clusters, engine=engine, n_jobs=n_jobs, **params
+    )
+    clusters.setflags(write=False)
+    result = (clusters, kproto, categorical_feature_indices)
+    cache.put(key, result)
+    return result
+
+
+# --- WARM START DARI MODEL SEBELUMNYA ---
+def warm_start_init(df_preprocessed, n_clusters, previous_model):
+    # Prototipe model sebelumnya dikodekan ulang terhadap kategori data saat ini (kode yang
+    # sama dipakai kmodes dan mesin NumPy: urutan np.unique), lalu dibelah/digabung ke K baru.
+    X_data = df_preprocessed[ALL_FEATURES_FOR_CLUSTERING]
+    categorical = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    Xnum, cat_columns = split_mixed_matrix(X_data, categorical)
+    Xcat, categories = encode_categorical(cat_columns)
+    num_centroids, cat_codes, previous_categories, gamma = extract_prototypes(previous_model)
+    decoded = [previous_categories[j][cat_codes[:, j]] for j in range(cat_codes.shape[1])]
+    cat_centroids, _ = encode_categorical(decoded, categories=categories)
+    for j in range(cat_centroids.shape[1]):
+        # Kategori prototipe yang tidak lagi muncul di data diganti modus kolom.
+        known = Xcat[:, j][Xcat[:, j] >= 0]
+        mode = np.bincount(known).argmax() if len(known) else 0
+        cat_centroids[cat_centroids[:, j] < 0, j] = mode
+    num_centroids, cat_centroids = resize_prototypes(Xnum, Xcat, num_centroids, cat_centroids, n_clusters, gamma)
+    return [num_centroids, cat_centroids], gamma
+
+
+def warm_fit_kprototypes(df_preprocessed, n_clusters, previous_model, engine="kmodes", n_jobs=-1,
+                         tolerance=WARM_START_COST_TOLERANCE):
+    # Satu fit dari prototipe sebelumnya. Biaya acuan: biaya per baris model sebelumnya bila
+    # K sama, selain itu satu inisialisasi biasa. Pencarian multi-restart penuh hanya
+    # dijalankan bila warm start tidak mencapai biaya yang sebanding.
+    start = time.perf_counter()
+    init, gamma = warm_start_init(df_preprocessed, n_clusters, previous_model)
+    clusters, kproto, categorical_feature_indices = fit_kprototypes(
+        df_preprocessed, n_clusters, engine=engine, n_jobs=n_jobs, init=init, n_init=1, gamma=gamma
+    )
+    warm_cost = float(kproto.cost_)
+    previous_k = extract_prototypes(previous_model)[0].shape[0]
+    previous_rows = len(getattr(previous_model, "labels_", ()))
+    previous_cost = float(getattr(previous_model, "cost_", float("nan")))
+    if previous_k == n_clusters and previous_rows and np.isfinite(previous_cost):
+        reference_cost = previous_cost / previous_rows * len(df_preprocessed)
+    else:
+        cold_clusters, cold_kproto, _ = fit_kprototypes(
+            df_preprocessed, n_clusters, engine=engine, n_jobs=n_jobs, n_init=1, gamma=gamma
+        )
+        reference_cost = float(cold_kproto.cost_)
+        if cold_kproto.cost_ < kproto.cost_:
+            clusters, kproto = cold_clusters, cold_kproto
+    accepted = float(kproto.cost_) <= reference_cost * (1 + tolerance)
+    if not accepted:
+        clusters, kproto, categorical_feature_indices = fit_kprototypes(
+            df_preprocessed, n_clusters, engine=engine, n_jobs=n_jobs, gamma=gamma
+        )
+    kproto.fit_seconds_ = time.perf_counter() - start
+    info = {
+        "Mode": "Warm start" if accepted else "Fit penuh (warm start tidak sebanding)",
+        "Biaya Warm Start": warm_cost,
+        "Biaya Acuan": reference_cost,
+        "Biaya Akhir": float(kproto.cost_),
+        "Waktu (detik)": kproto.fit_seconds_,
+    }
+    return np.asarray(clusters), kproto, categorical_feature_indices, info
+
+
+def prototype_fingerprint(model):
+    # Sidik jari prototipe sebuah model (numerik, kode kategorikal, kategori, gamma).
+    num_centroids, cat_codes, categories, gamma = extract_prototypes(model)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(np.ascontiguousarray(num_centroids, dtype=np.float64).tobytes())
+    hasher.update(np.ascontiguousarray(cat_codes, dtype=np.int64).tobytes())
+    hasher.update(repr([np.asarray(cats).tolist() for cats in categories]).encode("utf-8"))
+    hasher.update(repr(float(gamma)).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def make_warm_cache_key(df_preprocessed, n_clusters, previous_model, engine="kmodes"):
+    # Hasil warm start bergantung pada model awalnya (init/n_init kunci dingin tidak berlaku),
+    # jadi kuncinya selalu berbeda dari kunci fit dingin untuk data dan K yang sama.
+    return make_cache_key(df_preprocessed, n_clusters, engine=engine) + (("warm", prototype_fingerprint(previous_model)),)
+
+
+def cached_warm_fit_kprototypes(df_preprocessed, n_clusters, previous_model, engine="kmodes", n_jobs=-1):
+    # Mengembalikan ((clusters, kproto, indeks kategorikal), info); info None bila hasil
+    # warm start dari model yang sama untuk data ini sudah ada di cache.
+    cache = get_result_cache()
+    key = make_warm_cache_key(df_preprocessed, n_clusters, previous_model, engine=engine)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, None
+    clusters, kproto, categorical_feature_indices, info = warm_fit_kprototypes(
+        df_preprocessed, n_clusters, previous_model, engine=engine, n_jobs=n_jobs
+    )
+    clusters.setflags(write=False)
+    result = (clusters, kproto, categorical_feature_indices)
+    cache.put(key, result)
+    return result, info
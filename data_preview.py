@@ -0,0 +1,72 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lru import LRUCache
+
+# --- PRATINJAU TABEL BERJENDELA ---
+# Tabel bertipe dikonversi ke Arrow sekali per versi dataset. Urutan dan filter
+# dihitung di server (pyarrow.compute) lalu di-cache sebagai posisi baris; browser
+# hanya menerima jendela baris dan kolom yang sedang ditampilkan.
+DEFAULT_PAGE_ROWS = 50
+PAGE_ROW_OPTIONS = [25, 50, 100, 200]
+ARROW_CACHE_MAX_ENTRIES = 8
+ARROW_CACHE_MAX_BYTES = 512 * 1024 * 1024
+POSITIONS_CACHE_MAX_ENTRIES = 64
+
+_arrow_cache = LRUCache(max_entries=ARROW_CACHE_MAX_ENTRIES, max_bytes=ARROW_CACHE_MAX_BYTES,
+                        sizeof=lambda table: table.nbytes)
+_positions_cache = LRUCache(max_entries=POSITIONS_CACHE_MAX_ENTRIES, sizeof=lambda positions: positions.nbytes)
+
+
+def arrow_table(df, dataset_key):
+    key = (dataset_key, len(df), tuple(df.columns))
+    table = _arrow_cache.get(key)
+    if table is None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        _arrow_cache.put(key, table)
+    return table
+
+
+def _filter_mask(table, filter_column, filter_text):
+    column = table.column(filter_column)
+    if not pa.types.is_string(column.type) and not pa.types.is_large_string(column.type):
+        column = pc.cast(column, pa.string())
+    mask = pc.match_substring(column, filter_text, ignore_case=True)
+    return np.asarray(mask.fill_null(False).to_numpy(zero_copy_only=False), dtype=bool)
+
+
+def row_positions(table, dataset_key, sort_by=None, ascending=True, filter_column=None, filter_text=""):
+    # Posisi baris setelah filter dan urutan; di-cache sehingga berpindah halaman
+    # tidak mengulang sort maupun filter.
+    filter_text = (filter_text or "").strip()
+    key = (dataset_key, table.num_rows, sort_by, ascending, filter_column if filter_text else None, filter_text)
+    positions = _positions_cache.get(key)
+    if positions is not None:
+        return positions
+    if sort_by:
+        column = table.column(sort_by)
+        if pa.types.is_dictionary(column.type):
+            # Kolom categorical (JK, Kelas) menjadi dictionary Arrow, yang tidak dapat diurutkan langsung.
+            column = column.cast(column.type.value_type)
+        order = pc.array_sort_indices(column, order="ascending" if ascending else "descending")
+        positions = order.to_numpy()
+    else:
+        positions = np.arange(table.num_rows)
+    if filter_column and filter_text:
+        mask = _filter_mask(table, filter_column, filter_text)
+        positions = positions[mask[positions]]
+    _positions_cache.put(key, positions)
+    return positions
+
+
+def preview_window(df, dataset_key, columns=None, sort_by=None, ascending=True, filter_column=None,
+                   filter_text="", page=1, page_rows=DEFAULT_PAGE_ROWS):
+    # Mengembalikan (jendela Arrow untuk st.dataframe, jumlah baris cocok, jumlah halaman, baris awal).
+    table = arrow_table(df, dataset_key)
+    positions = row_positions(table, dataset_key, sort_by, ascending, filter_column, filter_text)
+    n_pages = max(1, -(-len(positions) // page_rows))
+    page = min(max(1, int(page)), n_pages)
+    start = (page - 1) * page_rows
+    window = table.select(list(columns) if columns else table.column_names).take(positions[start:start + page_rows])
+    return window, len(positions), n_pages, start
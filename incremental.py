@@ -0,0 +1,109 @@
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from kproto_engine import MiniBatchKPrototypes
+from prediction import prepare_features
+from schema import CLUSTER_LABEL_DTYPE, NUMERIC_COLS, to_student_table
+
+# --- PEMBARUAN KLASTER INKREMENTAL ---
+# Siswa yang ditambahkan di tengah semester dinormalisasi dengan scaler tersimpan,
+# ditugaskan ke prototipe yang ada, lalu prototipe diperbarui secara online (rata-rata
+# berjalan dan tabel frekuensi ekskul, seperti MiniBatchKPrototypes). Fit ulang penuh
+# hanya diperlukan bila salah satu ukuran drift melewati ambang batas.
+DRIFT_THRESHOLDS = {
+    # Jumlah siswa tambahan dibanding jumlah siswa saat fit penuh terakhir.
+    "Proporsi Siswa Tambahan": 0.25,
+    # Pergeseran terbesar prototipe numerik (satuan z-score) sejak fit penuh terakhir.
+    "Pergeseran Prototipe": 0.25,
+    # Rata-rata jarak siswa tambahan ke prototipenya dibanding rata-rata saat fit penuh.
+    "Rasio Biaya Siswa Tambahan": 1.5,
+    # Pergeseran rata-rata fitur numerik seluruh siswa terhadap scaler tersimpan (z-score).
+    "Pergeseran Skala": 0.25,
+}
+
+
+class IncrementalClusterState:
+    def __init__(self, model, scaler, categorical, features, labels):
+        self.categorical = [int(c) for c in categorical]
+        self.scaler = scaler
+        self.model = MiniBatchKPrototypes.from_assignments(model, features, labels, self.categorical)
+        self.base_num_centroids = self.model._num_centroids.copy()
+        self.n_base = len(labels)
+        _, min_dist = self.model.predict_with_cost(features, self.categorical)
+        self.base_mean_cost = float(min_dist.mean()) if len(min_dist) else 0.0
+        # Statistik berjalan fitur numerik (data asli) untuk mendeteksi pergeseran skala;
+        # scaler tersimpan sendiri tidak diubah agar ruang fitur prototipe tetap sama.
+        self.running_scaler = copy.deepcopy(scaler)
+        self.n_appended = 0
+        self.appended_cost = 0.0
+
+    @classmethod
+    def from_clustered(cls, df_clustered, model, scaler, categorical, features=None):
+        if features is None:
+            _, features = prepare_features(df_clustered.drop(columns=["Klaster"]), scaler)
+        return cls(model, scaler, categorical, features, df_clustered["Klaster"].to_numpy())
+
+    def append(self, df_new):
+        # Mengembalikan (tabel siswa baru berlabel, fitur ternormalisasi, statistik).
+        start = time.perf_counter()
+        table, features = prepare_features(df_new, self.scaler)
+        if table.empty:
+            raise ValueError("File siswa tambahan tidak berisi baris data.")
+        labels, min_dist = self.model.predict_with_cost(features, self.categorical)
+        self.model.partial_fit(features, categorical=self.categorical)
+        self.n_appended += len(table)
+        self.appended_cost += float(min_dist.sum())
+        raw_numeric = table[NUMERIC_COLS].to_numpy(dtype=np.float64)
+        self.running_scaler.partial_fit(pd.DataFrame(raw_numeric, columns=NUMERIC_COLS))
+        labelled = table.assign(Klaster=labels.astype(CLUSTER_LABEL_DTYPE))
+        stats = {
+            "Jumlah Siswa": len(table),
+            "Waktu (detik)": time.perf_counter() - start,
+        }
+        return labelled, features, stats
+
+    def drift(self):
+        shift = np.sqrt(((self.model._num_centroids - self.base_num_centroids) ** 2).sum(axis=1))
+        mean_appended_cost = self.appended_cost / self.n_appended if self.n_appended else 0.0
+        scale_shift = np.abs(self.running_scaler.mean_ - self.scaler.mean_) / self.scaler.scale_
+        return {
+            "Proporsi Siswa Tambahan": self.n_appended / self.n_base if self.n_base else float("inf"),
+            "Pergeseran Prototipe": float(shift.max()) if len(shift) else 0.0,
+            "Rasio Biaya Siswa Tambahan": mean_appended_cost / self.base_mean_cost if self.base_mean_cost else 0.0,
+            "Pergeseran Skala": float(np.max(scale_shift)),
+        }
+
+    def exceeded_thresholds(self, thresholds=DRIFT_THRESHOLDS):
+        return [name for name, value in self.drift().items() if value > thresholds[name]]
+
+
+def merge_student_tables(df_existing, df_new):
+    # Kategori JK/Kelas digabung ulang agar tabel gabungan tetap bertipe ringkas.
+    return to_student_table(pd.concat([df_existing, df_new], ignore_index=True))
+
+
+def append_students(state, df_original, df_preprocessed, df_clustered, df_new, refit, thresholds=DRIFT_THRESHOLDS):
+    # Menyiapkan hasil penambahan siswa tanpa mengubah argumen apa pun: state disalin,
+    # tabel digabung ke frame baru, dan refit(df_original_gabungan) (fit ulang penuh,
+    # mengembalikan dict df_preprocessed/scaler/df_clustered/model/categorical) hanya
+    # dipanggil bila ambang drift terlewati. Bila append atau refit gagal, pengecualiannya
+    # diteruskan dan data pemanggil tetap utuh; pemanggil menerapkan hasilnya ke sesi.
+    state = copy.deepcopy(state)
+    labelled, features, stats = state.append(df_new)
+    drift, exceeded = state.drift(), state.exceeded_thresholds(thresholds)
+    result = {
+        "df_original": merge_student_tables(df_original, labelled.drop(columns=["Klaster"])),
+        "stats": stats,
+        "drift": drift,
+        "exceeded": exceeded,
+    }
+    if exceeded:
+        result.update(refit(result["df_original"]), state=None)
+    else:
+        merged = pd.concat([df_preprocessed, features], ignore_index=True)
+        labels = np.concatenate([df_clustered["Klaster"].to_numpy(), labelled["Klaster"].to_numpy()])
+        result.update(df_preprocessed=merged, df_clustered=merged.assign(Klaster=labels), model=state.model, state=state)
+    return result
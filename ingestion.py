@@ -0,0 +1,80 @@
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from lru import LRUCache
+from schema import to_student_table
+
+# --- INGESTI FILE UNGGAHAN ---
+SUPPORTED_UPLOAD_TYPES = ["xlsx", "csv", "parquet"]
+INGEST_CACHE_MAX_ENTRIES = 8
+
+_ingest_cache = LRUCache(max_entries=INGEST_CACHE_MAX_ENTRIES)
+
+
+def hash_upload(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _has_module(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def _read_xlsx(data):
+    # Mesin calamine (Rust) dipakai bila terpasang; jika tidak, workbook dibaca
+    # baris demi baris dengan mode read-only openpyxl yang hemat memori.
+    if _has_module("python_calamine"):
+        return pd.read_excel(io.BytesIO(data), engine="calamine")
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = [h if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        records = [row for row in rows if any(v is not None for v in row)]
+    finally:
+        workbook.close()
+    return pd.DataFrame.from_records(records, columns=columns)
+
+
+def _read_csv(data):
+    if _has_module("pyarrow"):
+        return pd.read_csv(io.BytesIO(data), engine="pyarrow")
+    return pd.read_csv(io.BytesIO(data))
+
+
+def _read_parquet(data):
+    return pd.read_parquet(io.BytesIO(data))
+
+
+_READERS = {
+    ".xlsx": _read_xlsx,
+    ".csv": _read_csv,
+    ".parquet": _read_parquet,
+}
+
+
+def load_uploaded_table(file_name, data):
+    # Setiap isi file yang berbeda hanya diparse sekali; unggahan ulang file yang
+    # sama (di sesi mana pun) langsung mengembalikan DataFrame dari cache.
+    # Hasilnya langsung dikonversi ke tabel bertipe ringkas (lihat schema.py).
+    # DataFrame hasil cache dipakai bersama, jadi jangan diubah in-place.
+    ext = os.path.splitext(file_name)[1].lower()
+    reader = _READERS.get(ext)
+    if reader is None:
+        raise ValueError(f"Format file '{ext}' tidak didukung. Gunakan salah satu dari: {', '.join(SUPPORTED_UPLOAD_TYPES)}.")
+    upload_hash = hash_upload(data)
+    key = (upload_hash, ext)
+    df = _ingest_cache.get(key)
+    if df is None:
+        df = to_student_table(reader(data))
+        _ingest_cache.put(key, df)
+    return upload_hash, df
@@ -0,0 +1,157 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# --- INSTRUMENTASI PER TAHAP ---
+# Setiap tahap (baca file, praproses, fit, deskripsi, grafik, tabel, PDF, ...) dicatat
+# waktu dinding, waktu CPU thread dan puncak alokasinya per rerun. Rerun yang selesai
+# disimpan di buffer bersama (dibatasi HISTORY_MAX_RERUNS) untuk panel admin, dan dapat
+# diekspor sebagai JSON lines atau textfile Prometheus (node exporter).
+# Puncak alokasi memakai tracemalloc dan hanya aktif bila APP_TRACE_MEMORY=1, karena
+# tracemalloc memperlambat alokasi; tracemalloc bersifat global per proses sehingga
+# sesi lain yang berjalan bersamaan ikut terhitung.
+TRACE_MEMORY = os.environ.get("APP_TRACE_MEMORY") == "1"
+METRICS_JSONL_PATH = os.environ.get("APP_METRICS_JSONL") or None
+METRICS_TEXTFILE_PATH = os.environ.get("APP_METRICS_TEXTFILE") or None
+HISTORY_MAX_RERUNS = 200
+METRIC_PREFIX = "pengelompokan_siswa"
+
+_history = deque(maxlen=HISTORY_MAX_RERUNS)
+_totals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _ensure_tracing():
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def begin_rerun(session_id):
+    # Rerun sebelumnya di thread ini yang terputus (st.rerun / st.stop) ditutup lebih dulu.
+    if getattr(_local, "rerun", None) is not None:
+        end_rerun(completed=False)
+    _ensure_tracing()
+    _local.rerun = {
+        "session": session_id,
+        "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "page": None,
+        "stages": [],
+        "_wall_start": time.perf_counter(),
+        "_cpu_start": time.thread_time(),
+    }
+    _local.stack = []
+
+
+def end_rerun(page=None, completed=True):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    record = {key: value for key, value in rerun.items() if not key.startswith("_")}
+    record["page"] = page or rerun["page"]
+    record["completed"] = completed
+    record["wall_s"] = time.perf_counter() - rerun["_wall_start"]
+    record["cpu_s"] = time.thread_time() - rerun["_cpu_start"]
+    with _lock:
+        _history.append(record)
+        for entry in record["stages"]:
+            total = _totals.setdefault(entry["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0})
+            total["calls"] += 1
+            total["wall_s"] += entry["wall_s"]
+            total["cpu_s"] += entry["cpu_s"]
+            total["peak_bytes"] = max(total["peak_bytes"], entry["peak_bytes"] or 0)
+    if METRICS_JSONL_PATH:
+        with open(METRICS_JSONL_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    if METRICS_TEXTFILE_PATH:
+        write_prometheus_textfile(METRICS_TEXTFILE_PATH)
+    return record
+
+
+@contextmanager
+def stage(name):
+    # Tahap bersarang: puncak tahap dalam diteruskan ke tahap luar karena reset_peak
+    # milik tahap dalam menghapus puncak yang sudah dicapai tahap luar.
+    rerun = getattr(_local, "rerun", None)
+    stack = getattr(_local, "stack", None)
+    tracing = tracemalloc.is_tracing()
+    frame = {"child_peak": 0}
+    if tracing:
+        frame["base"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    if stack is not None:
+        stack.append(frame)
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        wall_s, cpu_s = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+        peak_bytes = None
+        if tracing and tracemalloc.is_tracing():
+            absolute_peak = max(tracemalloc.get_traced_memory()[1], frame["child_peak"])
+            peak_bytes = max(absolute_peak - frame["base"], 0)
+            if stack and len(stack) > 1:
+                stack[-2]["child_peak"] = max(stack[-2]["child_peak"], absolute_peak)
+        if stack:
+            stack.pop()
+        if rerun is not None:
+            rerun["stages"].append({"stage": name, "depth": len(stack or ()), "wall_s": wall_s,
+                                    "cpu_s": cpu_s, "peak_bytes": peak_bytes})
+
+
+def timed(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def history():
+    with _lock:
+        return list(_history)
+
+
+def stage_totals():
+    with _lock:
+        return {name: dict(total) for name, total in _totals.items()}
+
+
+def to_jsonl(records=None):
+    records = history() if records is None else records
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+def prometheus_text():
+    # Format eksposisi teks Prometheus: counter kumulatif per tahap sejak proses dimulai.
+    totals = stage_totals()
+    metrics = [
+        ("stage_calls_total", "counter", "Jumlah eksekusi tahap.", "calls"),
+        ("stage_wall_seconds_total", "counter", "Total waktu dinding tahap (detik).", "wall_s"),
+        ("stage_cpu_seconds_total", "counter", "Total waktu CPU tahap (detik).", "cpu_s"),
+        ("stage_peak_bytes", "gauge", "Puncak alokasi terbesar satu eksekusi tahap (byte).", "peak_bytes"),
+    ]
+    lines = []
+    for suffix, kind, help_text, field in metrics:
+        name = f"{METRIC_PREFIX}_{suffix}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage_name, total in sorted(totals.items()):
+            lines.append(f'{name}{{stage="{stage_name}"}} {total[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path):
+    # Ditulis ke berkas sementara lalu os.replace agar node exporter tidak membaca berkas setengah jadi.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
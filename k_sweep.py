@@ -0,0 +1,85 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import silhouette_score
+
+from clustering import fit_kprototypes, fingerprint_dataframe, get_result_cache, make_cache_key
+from kproto_engine import encode_categorical, mixed_distances, split_mixed_matrix
+from schema import ALL_FEATURES_FOR_CLUSTERING, CATEGORICAL_COLS
+
+# --- SWEEP JUMLAH KLASTER (K) ---
+QUALITY_SAMPLE_SIZE = 2000
+SWEEP_COLUMNS = ["K", "Biaya (cost_)", "Iterasi", "Waktu Fit (detik)", "Skor Silhouette Campuran"]
+
+
+def mixed_silhouette_score(df_preprocessed, labels, gamma, sample_size=QUALITY_SAMPLE_SIZE, random_state=42):
+    # Silhouette dengan ketidakmiripan K-Prototypes (Euclidean kuadrat + gamma * Hamming)
+    # dihitung pada sampel agar biaya matriks jarak n x n tetap kecil.
+    labels = np.asarray(labels)
+    if len(np.unique(labels)) < 2:
+        return float("nan")
+    X_data = df_preprocessed[ALL_FEATURES_FOR_CLUSTERING]
+    categorical = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    if len(labels) > sample_size:
+        rng = np.random.RandomState(random_state)
+        rows = np.sort(rng.choice(len(labels), size=sample_size, replace=False))
+        X_data = X_data.iloc[rows]
+        labels = labels[rows]
+        if len(np.unique(labels)) < 2:
+            return float("nan")
+    Xnum, cat_columns = split_mixed_matrix(X_data, categorical)
+    Xcat, _ = encode_categorical(cat_columns)
+    dist = mixed_distances(Xnum, Xcat, Xnum, Xcat, gamma)
+    np.fill_diagonal(dist, 0.0)
+    return float(silhouette_score(dist, labels, metric="precomputed"))
+
+
+def _fit_one_k(df_preprocessed, n_clusters, engine, params):
+    start = time.perf_counter()
+    clusters, kproto, categorical_feature_indices = fit_kprototypes(
+        df_preprocessed, n_clusters, engine=engine, n_jobs=1, **params
+    )
+    fit_seconds = time.perf_counter() - start
+    stats = {
+        "K": n_clusters,
+        "Biaya (cost_)": float(kproto.cost_),
+        "Iterasi": int(kproto.n_iter_),
+        "Waktu Fit (detik)": fit_seconds,
+        "Skor Silhouette Campuran": mixed_silhouette_score(df_preprocessed, clusters, kproto.gamma),
+    }
+    return clusters, kproto, categorical_feature_indices, stats
+
+
+def run_k_sweep(df_preprocessed, k_values, engine="kmodes", max_workers=None, **params):
+    # Melatih semua K sekaligus di process pool, lalu memasukkan hasilnya ke cache
+    # bersama agar halaman klasterisasi dan visualisasi tidak perlu melatih ulang.
+    k_values = sorted({int(k) for k in k_values})
+    if not k_values:
+        raise ValueError("Rentang K untuk sweep kosong.")
+    if max_workers is None:
+        max_workers = min(len(k_values), os.cpu_count() or 1)
+    cache = get_result_cache()
+    fingerprint = fingerprint_dataframe(df_preprocessed)
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            k: executor.submit(_fit_one_k, df_preprocessed, k, engine, params)
+            for k in k_values
+        }
+        for k in k_values:
+            clusters, kproto, categorical_feature_indices, stats = futures[k].result()
+            clusters.setflags(write=False)
+            key = make_cache_key(df_preprocessed, k, engine=engine, fingerprint=fingerprint, **params)
+            cache.put(key, (clusters, kproto, categorical_feature_indices))
+            rows.append(stats)
+    return pd.DataFrame(rows, columns=SWEEP_COLUMNS)
+
+
+def suggest_k(sweep_results):
+    scores = sweep_results.dropna(subset=["Skor Silhouette Campuran"])
+    if scores.empty:
+        return None
+    return int(scores.loc[scores["Skor Silhouette Campuran"].idxmax(), "K"])
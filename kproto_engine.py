@@ -0,0 +1,507 @@
+import numpy as np
+import pandas as pd
+
+# --- MESIN K-PROTOTYPES TERVEKTORISASI ---
+# Alternatif untuk kmodes.KPrototypes: fitur numerik disimpan sebagai matriks
+# float, fitur kategorikal sebagai matriks kode integer kecil, dan jarak
+# campuran (Euclidean kuadrat + gamma * Hamming) ke semua prototipe dihitung
+# sekaligus per blok baris dengan operasi NumPy.
+
+DISTANCE_CHUNK_ROWS = 65536
+
+
+def _split_columns(n_columns, categorical):
+    if categorical is None:
+        raise ValueError("Indeks kolom kategorikal wajib diisi untuk K-Prototypes.")
+    if isinstance(categorical, (int, np.integer)):
+        categorical = [int(categorical)]
+    cat_idx = [int(c) for c in categorical]
+    num_idx = [i for i in range(n_columns) if i not in cat_idx]
+    if not cat_idx or not num_idx:
+        raise ValueError("K-Prototypes membutuhkan minimal satu kolom numerik dan satu kolom kategorikal.")
+    return num_idx, cat_idx
+
+
+def _normalize_categorical(values):
+    # Nilai '1', 1 dan 1.0 dianggap kategori yang sama agar data latih (string)
+    # dan input prediksi (integer) tetap cocok.
+    values = np.asarray(values, dtype=object)
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError):
+        return values.astype(str)
+
+
+def split_mixed_matrix(X, categorical, dtype=np.float64):
+    if isinstance(X, pd.DataFrame):
+        num_idx, cat_idx = _split_columns(X.shape[1], categorical)
+        Xnum = X.iloc[:, num_idx].to_numpy(dtype=dtype)
+        cat_columns = [X.iloc[:, i].to_numpy() for i in cat_idx]
+    else:
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        num_idx, cat_idx = _split_columns(X.shape[1], categorical)
+        Xnum = X[:, num_idx].astype(dtype)
+        cat_columns = [X[:, i] for i in cat_idx]
+    return np.ascontiguousarray(Xnum), [_normalize_categorical(c) for c in cat_columns]
+
+
+def _code_dtype(n_levels):
+    return np.int16 if n_levels < np.iinfo(np.int16).max else np.int32
+
+
+def encode_categorical(cat_columns, categories=None):
+    # Mengembalikan matriks kode (baris x kolom) dan daftar kategori per kolom.
+    # Kategori yang tidak dikenal saat prediksi diberi kode -1.
+    n_rows = len(cat_columns[0]) if cat_columns else 0
+    fit = categories is None
+    if fit:
+        categories = []
+        for col in cat_columns:
+            categories.append(np.unique(col))
+    n_levels = max(len(c) for c in categories) if categories else 1
+    codes = np.empty((n_rows, len(cat_columns)), dtype=_code_dtype(n_levels))
+    for j, col in enumerate(cat_columns):
+        cats = categories[j]
+        if col.dtype.kind != cats.dtype.kind:
+            if cats.dtype.kind != "U":
+                codes[:, j] = -1
+                continue
+            col = col.astype(str)
+        pos = np.searchsorted(cats, col)
+        pos_clipped = np.minimum(pos, len(cats) - 1)
+        known = cats[pos_clipped] == col
+        codes[:, j] = np.where(known, pos_clipped, -1)
+    return codes, categories
+
+
+def mixed_distances(Xnum, Xcat, num_centroids, cat_centroids, gamma):
+    # Jarak semua baris ke semua prototipe: ||x||^2 - 2 x.c + ||c||^2 ditambah
+    # gamma dikali jumlah atribut kategorikal yang berbeda.
+    dist = (
+        np.einsum("ij,ij->i", Xnum, Xnum)[:, None]
+        - 2.0 * (Xnum @ num_centroids.T)
+        + np.einsum("ij,ij->i", num_centroids, num_centroids)[None, :]
+    )
+    np.maximum(dist, 0.0, out=dist)
+    for j in range(Xcat.shape[1]):
+        dist += gamma * (Xcat[:, j, None] != cat_centroids[None, :, j])
+    return dist
+
+
+def assign_labels(Xnum, Xcat, num_centroids, cat_centroids, gamma, chunk_rows=DISTANCE_CHUNK_ROWS):
+    n_points = Xnum.shape[0]
+    labels = np.empty(n_points, dtype=np.int32)
+    min_dist = np.empty(n_points, dtype=np.float64)
+    for start in range(0, n_points, chunk_rows):
+        stop = min(start + chunk_rows, n_points)
+        dist = mixed_distances(Xnum[start:stop], Xcat[start:stop], num_centroids, cat_centroids, gamma)
+        labels[start:stop] = dist.argmin(axis=1)
+        min_dist[start:stop] = dist[np.arange(stop - start), labels[start:stop]]
+    return labels, min_dist
+
+
+def update_prototypes(Xnum, Xcat, labels, n_clusters, n_levels):
+    counts = np.bincount(labels, minlength=n_clusters)
+    num_centroids = np.empty((n_clusters, Xnum.shape[1]), dtype=np.float64)
+    for j in range(Xnum.shape[1]):
+        num_centroids[:, j] = np.bincount(labels, weights=Xnum[:, j], minlength=n_clusters)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        num_centroids /= counts[:, None]
+    cat_centroids = np.empty((n_clusters, Xcat.shape[1]), dtype=Xcat.dtype)
+    for j in range(Xcat.shape[1]):
+        levels = n_levels[j]
+        table = np.bincount(
+            labels.astype(np.int64) * levels + Xcat[:, j],
+            minlength=n_clusters * levels,
+        ).reshape(n_clusters, levels)
+        cat_centroids[:, j] = table.argmax(axis=1)
+    return num_centroids, cat_centroids, counts
+
+
+def _kmeanspp_init(Xnum, Xcat, n_clusters, gamma, rng):
+    n_points = Xnum.shape[0]
+    chosen = [int(rng.randint(n_points))]
+    closest = mixed_distances(Xnum, Xcat, Xnum[chosen], Xcat[chosen], gamma)[:, 0]
+    for _ in range(1, n_clusters):
+        total = closest.sum()
+        if total <= 0:
+            candidates = np.setdiff1d(np.arange(n_points), chosen)
+            idx = int(rng.choice(candidates))
+        else:
+            idx = int(rng.choice(n_points, p=closest / total))
+        chosen.append(idx)
+        dist_new = mixed_distances(Xnum, Xcat, Xnum[[idx]], Xcat[[idx]], gamma)[:, 0]
+        np.minimum(closest, dist_new, out=closest)
+    return Xnum[chosen].astype(np.float64), Xcat[chosen].copy()
+
+
+def _random_init(Xnum, Xcat, n_clusters, rng):
+    chosen = rng.choice(Xnum.shape[0], size=n_clusters, replace=False)
+    return Xnum[chosen].astype(np.float64), Xcat[chosen].copy()
+
+
+def _reseed_empty(num_centroids, cat_centroids, counts, Xnum, Xcat, min_dist):
+    # Klaster kosong diisi ulang dengan titik yang paling jauh dari prototipenya.
+    empty = np.flatnonzero(counts == 0)
+    if empty.size == 0:
+        return num_centroids, cat_centroids
+    farthest = np.argsort(min_dist)[::-1][:empty.size]
+    num_centroids[empty] = Xnum[farthest]
+    cat_centroids[empty] = Xcat[farthest]
+    return num_centroids, cat_centroids
+
+
+def resize_prototypes(Xnum, Xcat, num_centroids, cat_centroids, n_clusters, gamma):
+    # Menyesuaikan prototipe dari fit sebelumnya ke K baru. K bertambah: klaster dengan
+    # biaya terbesar dibelah (anggota terjauhnya menjadi prototipe baru). K berkurang:
+    # dua prototipe terdekat digabung (rata-rata numerik berbobot jumlah anggota,
+    # kategori mengikuti klaster yang lebih besar).
+    num_centroids = np.array(num_centroids, dtype=np.float64)
+    cat_centroids = np.array(cat_centroids)
+    while len(num_centroids) < n_clusters:
+        labels, min_dist = assign_labels(Xnum, Xcat, num_centroids, cat_centroids, gamma)
+        costs = np.bincount(labels, weights=min_dist, minlength=len(num_centroids))
+        members = np.flatnonzero(labels == costs.argmax())
+        farthest = members[min_dist[members].argmax()]
+        num_centroids = np.vstack([num_centroids, Xnum[farthest]])
+        cat_centroids = np.vstack([cat_centroids, Xcat[farthest]])
+    while len(num_centroids) > n_clusters:
+        labels, _ = assign_labels(Xnum, Xcat, num_centroids, cat_centroids, gamma)
+        counts = np.bincount(labels, minlength=len(num_centroids)).astype(np.float64)
+        between = mixed_distances(num_centroids, cat_centroids, num_centroids, cat_centroids, gamma)
+        np.fill_diagonal(between, np.inf)
+        keep, drop = sorted(np.unravel_index(between.argmin(), between.shape))
+        weights = counts[[keep, drop]] if counts[[keep, drop]].sum() > 0 else None
+        num_centroids[keep] = np.average(num_centroids[[keep, drop]], axis=0, weights=weights)
+        if counts[drop] > counts[keep]:
+            cat_centroids[keep] = cat_centroids[drop]
+        num_centroids = np.delete(num_centroids, drop, axis=0)
+        cat_centroids = np.delete(cat_centroids, drop, axis=0)
+    return num_centroids, cat_centroids
+
+
+def run_lloyd(Xnum, Xcat, num_centroids, cat_centroids, gamma, n_levels, max_iter):
+    n_clusters = num_centroids.shape[0]
+    labels, min_dist = assign_labels(Xnum, Xcat, num_centroids, cat_centroids, gamma)
+    epoch_costs = [float(min_dist.sum())]
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        num_centroids, cat_centroids, counts = update_prototypes(Xnum, Xcat, labels, n_clusters, n_levels)
+        num_centroids, cat_centroids = _reseed_empty(num_centroids, cat_centroids, counts, Xnum, Xcat, min_dist)
+        new_labels, min_dist = assign_labels(Xnum, Xcat, num_centroids, cat_centroids, gamma)
+        epoch_costs.append(float(min_dist.sum()))
+        converged = np.array_equal(new_labels, labels)
+        labels = new_labels
+        if converged:
+            break
+    return num_centroids, cat_centroids, labels, epoch_costs[-1], n_iter, epoch_costs
+
+
+class FastKPrototypes:
+    def __init__(self, n_clusters=8, max_iter=100, init="k-means++", n_init=10, gamma=None,
+                 verbose=0, random_state=None, n_jobs=1, dtype=np.float64):
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.init = init
+        self.n_init = n_init
+        self.gamma = gamma
+        self.verbose = verbose
+        self.random_state = random_state
+        # n_jobs hanya untuk kompatibilitas dengan kmodes.KPrototypes; semua
+        # restart dijalankan berurutan karena setiap iterasi sudah tervektorisasi.
+        self.n_jobs = n_jobs
+        self.dtype = dtype
+
+    def _prepare(self, X, categorical):
+        Xnum, cat_columns = split_mixed_matrix(X, categorical, dtype=self.dtype)
+        return Xnum, cat_columns
+
+    def _n_runs(self):
+        # Prototipe awal yang diberikan langsung (warm start) hanya dijalankan sekali,
+        # sama seperti kmodes.KPrototypes.
+        return max(int(self.n_init), 1) if isinstance(self.init, str) else 1
+
+    def _initial_centroids(self, Xnum, Xcat, gamma, rng):
+        init = self.init
+        if isinstance(init, (list, tuple)) and len(init) == 2:
+            num_c = np.array(init[0], dtype=np.float64)
+            cat_c = np.asarray(init[1]).astype(Xcat.dtype)
+            if num_c.shape != (self.n_clusters, Xnum.shape[1]) or cat_c.shape != (self.n_clusters, Xcat.shape[1]):
+                raise ValueError(f"Ukuran prototipe awal tidak sesuai dengan {self.n_clusters} klaster dan jumlah fitur data.")
+            return num_c, cat_c.copy()
+        if isinstance(init, str):
+            name = init.lower()
+            if name == "random":
+                return _random_init(Xnum, Xcat, self.n_clusters, rng)
+            # 'Huang' dan 'Cao' dari kmodes dipetakan ke k-means++ campuran.
+            return _kmeanspp_init(Xnum, Xcat, self.n_clusters, gamma, rng)
+        raise ValueError(f"Metode inisialisasi tidak dikenal: {init!r}")
+
+    def fit(self, X, y=None, categorical=None):
+        Xnum, cat_columns = self._prepare(X, categorical)
+        n_points = Xnum.shape[0]
+        if self.n_clusters > n_points:
+            raise ValueError(f"Jumlah klaster ({self.n_clusters}) melebihi jumlah data ({n_points}).")
+        Xcat, self.categories_ = encode_categorical(cat_columns)
+        self.categorical = list(categorical) if not isinstance(categorical, (int, np.integer)) else [int(categorical)]
+        n_levels = [max(len(c), 1) for c in self.categories_]
+        if self.gamma is None:
+            self.gamma = 0.5 * float(np.mean(Xnum.std(axis=0)))
+
+        rng = np.random.RandomState(self.random_state)
+        seeds = rng.randint(np.iinfo(np.int32).max, size=self._n_runs())
+        best = None
+        for seed in seeds:
+            init_rng = np.random.RandomState(seed)
+            num_c, cat_c = self._initial_centroids(Xnum, Xcat, self.gamma, init_rng)
+            result = run_lloyd(Xnum, Xcat, num_c, cat_c, self.gamma, n_levels, self.max_iter)
+            if self.verbose:
+                print(f"Init {seed}: biaya {result[3]:.4f} setelah {result[4]} iterasi")
+            if best is None or result[3] < best[3]:
+                best = result
+        self._set_fitted(*best)
+        return self
+
+    def _set_fitted(self, num_centroids, cat_centroids, labels, cost, n_iter, epoch_costs):
+        self._num_centroids = np.asarray(num_centroids, dtype=np.float64)
+        self._cat_centroids = np.asarray(cat_centroids)
+        self.labels_ = labels
+        self.cost_ = cost
+        self.n_iter_ = n_iter
+        self.epoch_costs_ = epoch_costs
+
+    def fit_predict(self, X, y=None, categorical=None):
+        return self.fit(X, categorical=categorical).labels_
+
+    def _encode_for_predict(self, X, categorical):
+        if not hasattr(self, "_num_centroids"):
+            raise ValueError("Model belum dilatih.")
+        if categorical is None:
+            categorical = self.categorical
+        Xnum, cat_columns = self._prepare(X, categorical)
+        Xcat, _ = encode_categorical(cat_columns, categories=self.categories_)
+        return Xnum, Xcat
+
+    def predict_with_cost(self, X, categorical=None):
+        # Label beserta jarak campuran setiap baris ke prototipe terdekatnya.
+        Xnum, Xcat = self._encode_for_predict(X, categorical)
+        return assign_labels(Xnum, Xcat, self._num_centroids, self._cat_centroids, self.gamma)
+
+    def predict(self, X, categorical=None, **kwargs):
+        return self.predict_with_cost(X, categorical)[0]
+
+    @classmethod
+    def from_prototypes(cls, num_centroids, cat_codes, categories, gamma, categorical):
+        # Membangun model siap-prediksi langsung dari array prototipe tersimpan.
+        categories = [np.asarray(c) for c in categories]
+        n_levels = max((len(c) for c in categories), default=1)
+        model = cls(n_clusters=len(num_centroids), gamma=float(gamma))
+        model.categories_ = categories
+        model.categorical = [int(c) for c in categorical]
+        model._set_fitted(np.asarray(num_centroids, dtype=np.float64),
+                          np.asarray(cat_codes).astype(_code_dtype(n_levels)),
+                          np.empty(0, dtype=np.int32), float("nan"), 0, [])
+        return model
+
+    @property
+    def cluster_centroids_(self):
+        if not hasattr(self, "_num_centroids"):
+            raise AttributeError("Model belum dilatih sehingga belum memiliki cluster_centroids_.")
+        decoded = np.empty(self._cat_centroids.shape, dtype=object)
+        for j, cats in enumerate(self.categories_):
+            decoded[:, j] = cats[self._cat_centroids[:, j]]
+        return np.hstack((self._num_centroids.astype(object), decoded))
+
+
+def _extend_categories(categories, cat_columns):
+    # Menambahkan kategori baru yang muncul di potongan data berikutnya.
+    # Mengembalikan kategori baru dan pemetaan kode lama -> kode baru per kolom.
+    new_categories, remaps = [], []
+    for cats, col in zip(categories, cat_columns):
+        if cats.dtype.kind != col.dtype.kind and cats.dtype.kind == "U":
+            col = col.astype(str)
+        seen = np.unique(col)
+        if cats.dtype.kind == seen.dtype.kind and np.isin(seen, cats).all():
+            new_categories.append(cats)
+            remaps.append(None)
+            continue
+        if cats.dtype.kind != seen.dtype.kind:
+            cats, seen = cats.astype(str), seen.astype(str)
+        merged = np.union1d(cats, seen)
+        new_categories.append(merged)
+        remaps.append(np.searchsorted(merged, cats))
+    return new_categories, remaps
+
+
+def extract_prototypes(model):
+    # Prototipe dalam bentuk array (numerik, kode kategorikal, daftar kategori,
+    # gamma) dari FastKPrototypes maupun kmodes.KPrototypes.
+    if isinstance(model, FastKPrototypes):
+        return model._num_centroids, model._cat_centroids, model.categories_, float(model.gamma)
+    num_centroids, cat_codes = model._enc_cluster_centroids
+    cat_codes = np.asarray(cat_codes, dtype=np.int64).copy()
+    categories = []
+    for j, col_map in enumerate(model._enc_map):
+        values = [value for value, _ in sorted(col_map.items(), key=lambda item: item[1])]
+        cats = _normalize_categorical(values)
+        # Urutan kategori kmodes mengikuti nilai asli; diurutkan ulang setelah
+        # normalisasi agar searchsorted tetap valid.
+        order = np.argsort(cats, kind="stable")
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+        cat_codes[:, j] = remap[cat_codes[:, j]]
+        categories.append(cats[order])
+    n_levels = max((len(c) for c in categories), default=1)
+    return (np.asarray(num_centroids, dtype=np.float64), cat_codes.astype(_code_dtype(n_levels)),
+            categories, float(model.gamma))
+
+
+class MiniBatchKPrototypes(FastKPrototypes):
+    # Varian mini-batch: prototipe diperbarui dari potongan data secara bertahap
+    # (rata-rata berjalan untuk fitur numerik, tabel frekuensi untuk fitur
+    # kategorikal) sehingga memori hanya sebesar satu potongan.
+
+    def __init__(self, n_clusters=8, batch_size=4096, n_epochs=3, init="k-means++", n_init=3,
+                 gamma=None, verbose=0, random_state=None, n_jobs=1, dtype=np.float64,
+                 max_iter=None):
+        super().__init__(n_clusters=n_clusters, max_iter=max_iter, init=init, n_init=n_init,
+                         gamma=gamma, verbose=verbose, random_state=random_state,
+                         n_jobs=n_jobs, dtype=dtype)
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+
+    def _init_from_batch(self, Xnum, Xcat, rng):
+        if Xnum.shape[0] < self.n_clusters:
+            raise ValueError(f"Potongan data pertama ({Xnum.shape[0]} baris) lebih kecil dari jumlah klaster ({self.n_clusters}).")
+        if self.gamma is None:
+            self.gamma = 0.5 * float(np.mean(Xnum.std(axis=0)))
+        best = None
+        for _ in range(self._n_runs()):
+            num_c, cat_c = self._initial_centroids(Xnum, Xcat, self.gamma, rng)
+            _, min_dist = assign_labels(Xnum, Xcat, num_c, cat_c, self.gamma)
+            cost = float(min_dist.sum())
+            if best is None or cost < best[0]:
+                best = (cost, num_c, cat_c)
+        _, num_c, cat_c = best
+        self._num_centroids = num_c
+        self._cat_centroids = cat_c
+        self.counts_ = np.zeros(self.n_clusters, dtype=np.float64)
+        self._cat_counts = [np.zeros((self.n_clusters, len(c)), dtype=np.float64) for c in self.categories_]
+
+    @classmethod
+    def from_assignments(cls, model, X, labels, categorical):
+        # Model online yang dimulai dari prototipe model mana pun (kmodes, NumPy, mini-batch)
+        # dengan jumlah anggota dan tabel frekuensi dari penugasan yang sudah ada.
+        num_centroids, cat_codes, categories, gamma = extract_prototypes(model)
+        n_clusters = num_centroids.shape[0]
+        Xnum, cat_columns = split_mixed_matrix(X, categorical)
+        Xcat, _ = encode_categorical(cat_columns, categories=categories)
+        labels = np.asarray(labels, dtype=np.int64)
+        online = cls(n_clusters=n_clusters, gamma=gamma)
+        online.categories_ = [np.asarray(c) for c in categories]
+        online.categorical = [int(c) for c in categorical]
+        n_levels = max((len(c) for c in online.categories_), default=1)
+        online._num_centroids = np.array(num_centroids, dtype=np.float64)
+        online._cat_centroids = np.asarray(cat_codes).astype(_code_dtype(n_levels))
+        online.counts_ = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+        online._cat_counts = []
+        for j, cats in enumerate(online.categories_):
+            known = Xcat[:, j] >= 0
+            online._cat_counts.append(np.bincount(
+                labels[known] * len(cats) + Xcat[known, j], minlength=n_clusters * len(cats)
+            ).reshape(n_clusters, len(cats)).astype(np.float64))
+        online.cost_ = float(getattr(model, "cost_", float("nan")))
+        return online
+
+    def _apply_category_remap(self, remaps):
+        for j, remap in enumerate(remaps):
+            if remap is None:
+                continue
+            table = np.zeros((self.n_clusters, len(self.categories_[j])), dtype=np.float64)
+            table[:, remap] = self._cat_counts[j]
+            self._cat_counts[j] = table
+            self._cat_centroids[:, j] = remap[self._cat_centroids[:, j]]
+        n_levels = max(len(c) for c in self.categories_)
+        self._cat_centroids = self._cat_centroids.astype(_code_dtype(n_levels))
+
+    def partial_fit(self, X, y=None, categorical=None):
+        Xnum, cat_columns = self._prepare(X, categorical)
+        if not hasattr(self, "_num_centroids"):
+            self.categorical = list(categorical)
+            _, self.categories_ = encode_categorical(cat_columns)
+            Xcat, _ = encode_categorical(cat_columns, categories=self.categories_)
+            rng = np.random.RandomState(self.random_state)
+            self._init_from_batch(Xnum, Xcat, rng)
+        else:
+            self.categories_, remaps = _extend_categories(self.categories_, cat_columns)
+            self._apply_category_remap(remaps)
+            Xcat, _ = encode_categorical(cat_columns, categories=self.categories_)
+        self._update_from_batch(Xnum, Xcat)
+        return self
+
+    def _update_from_batch(self, Xnum, Xcat):
+        labels, _ = assign_labels(Xnum, Xcat, self._num_centroids, self._cat_centroids, self.gamma)
+        batch_counts = np.bincount(labels, minlength=self.n_clusters).astype(np.float64)
+        batch_sums = np.empty_like(self._num_centroids)
+        for j in range(Xnum.shape[1]):
+            batch_sums[:, j] = np.bincount(labels, weights=Xnum[:, j], minlength=self.n_clusters)
+        new_counts = self.counts_ + batch_counts
+        touched = batch_counts > 0
+        # Rata-rata berjalan: c_baru = (n_lama * c_lama + jumlah_batch) / n_baru
+        self._num_centroids[touched] = (
+            self._num_centroids[touched] * self.counts_[touched, None] + batch_sums[touched]
+        ) / new_counts[touched, None]
+        self.counts_ = new_counts
+        for j in range(Xcat.shape[1]):
+            levels = self._cat_counts[j].shape[1]
+            self._cat_counts[j] += np.bincount(
+                labels.astype(np.int64) * levels + Xcat[:, j], minlength=self.n_clusters * levels
+            ).reshape(self.n_clusters, levels)
+            self._cat_centroids[touched, j] = self._cat_counts[j][touched].argmax(axis=1)
+
+    def fit_stream(self, chunk_factory, categorical):
+        # chunk_factory() harus menghasilkan iterator potongan data baru setiap
+        # dipanggil, karena data dibaca ulang untuk setiap epoch.
+        for epoch in range(max(int(self.n_epochs), 1)):
+            for chunk in chunk_factory():
+                for start in range(0, len(chunk), self.batch_size):
+                    self.partial_fit(_slice_rows(chunk, start, start + self.batch_size), categorical=categorical)
+            if self.verbose:
+                print(f"Epoch {epoch + 1}: {int(self.counts_.sum())} pembaruan baris")
+        return self
+
+    def predict_stream(self, chunk_factory, categorical=None):
+        # Penugasan akhir: semua baris dilabeli per potongan dan biaya total dijumlahkan.
+        labels_parts, cost = [], 0.0
+        for chunk in chunk_factory():
+            labels, min_dist = self.predict_with_cost(chunk, categorical)
+            labels_parts.append(labels)
+            cost += float(min_dist.sum())
+        labels = np.concatenate(labels_parts) if labels_parts else np.empty(0, dtype=np.int32)
+        return labels, cost
+
+    def fit(self, X, y=None, categorical=None):
+        n_points = len(X)
+        rng = np.random.RandomState(self.random_state)
+        order = rng.permutation(n_points)
+
+        def shuffled_batches():
+            yield _take_rows(X, order)
+
+        self.fit_stream(shuffled_batches, categorical)
+        labels, cost = self.predict_stream(lambda: iter([X]), categorical)
+        self.labels_ = labels
+        self.cost_ = cost
+        self.n_iter_ = int(np.ceil(n_points / self.batch_size)) * max(int(self.n_epochs), 1)
+        self.epoch_costs_ = [cost]
+        return self
+
+
+def _slice_rows(X, start, stop):
+    return X.iloc[start:stop] if isinstance(X, pd.DataFrame) else X[start:stop]
+
+
+def _take_rows(X, rows):
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else np.asarray(X)[rows]
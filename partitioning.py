@@ -0,0 +1,239 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import DEFAULT_ARTIFACT_DIR, load_artifacts, save_artifacts
+from cluster_profile import build_cluster_profile, describe_clusters
+from clustering import fingerprint_dataframe, fit_kprototypes
+from prediction import DESCRIPTION_COL, prepare_features
+from preprocessing import preprocess_table
+from schema import ALL_FEATURES_FOR_CLUSTERING, CLUSTER_LABEL_DTYPE, to_student_table
+
+# --- KLASTERISASI PER PARTISI (PER KELAS / PER SEKOLAH) ---
+# Data dipecah menurut satu kolom kunci; setiap partisi dinormalisasi dan diklasterisasi
+# sendiri (scaler + model + deskripsi per partisi) di process pool yang dibatasi jumlah
+# core. Setiap fit memakai n_jobs=1 dan partisi terbesar dijadwalkan lebih dulu, sehingga
+# waktu total mengikuti jumlah core, bukan jumlah partisi.
+# Label klaster global = offset partisi + label lokal, sehingga tabel, grafik dan PDF yang
+# ada tetap bekerja dengan satu kolom Klaster.
+PARTITIONED_ARTIFACT_DIR = os.path.join(DEFAULT_ARTIFACT_DIR, "partisi")
+PARTITION_INDEX_FILE = "partitions.json"
+MAX_PARTITIONS = 200
+UNKNOWN_PARTITION_LABEL = -1
+NON_PARTITION_COLS = ["No", "Nama", "Klaster", DESCRIPTION_COL] + ALL_FEATURES_FOR_CLUSTERING
+
+
+def partition_columns(df):
+    # Kolom yang layak menjadi kunci partisi: bukan fitur/identitas siswa dan bernilai 2..MAX_PARTITIONS.
+    return [
+        col for col in df.columns
+        if col not in NON_PARTITION_COLS and 2 <= df[col].nunique(dropna=True) <= MAX_PARTITIONS
+    ]
+
+
+def _partition_keys(table, key):
+    if key not in table.columns:
+        raise ValueError(f"Kolom partisi '{key}' tidak ditemukan dalam data.")
+    missing = int(table[key].isna().sum())
+    if missing:
+        raise ValueError(f"Kolom partisi '{key}' kosong pada {missing} baris.")
+    return table[key].astype(str).str.strip()
+
+
+def split_partitions(table, key):
+    # Mengembalikan {nilai partisi: posisi baris} berurutan menurut nilai partisi.
+    keys = _partition_keys(table, key)
+    return {value: np.asarray(positions) for value, positions in sorted(keys.groupby(keys, sort=False).indices.items())}
+
+
+def _global_description(key, value, local_label, description):
+    return f"{key} {value}, klaster {local_label}: {description}"
+
+
+def _fit_partition(df_part, n_clusters, engine):
+    # Dijalankan di proses pekerja: praproses + fit + deskripsi satu partisi.
+    start = time.perf_counter()
+    df_preprocessed, scaler, filled = preprocess_table(df_part)
+    clusters, model, categorical_indices = fit_kprototypes(df_preprocessed, n_clusters, engine=engine, n_jobs=1)
+    labels = clusters.astype(CLUSTER_LABEL_DTYPE)
+    profile = build_cluster_profile(df_part, df_preprocessed, labels, n_clusters)
+    return {
+        "labels": labels,
+        "scaler": scaler,
+        "model": model,
+        "categorical_indices": [int(i) for i in categorical_indices],
+        "n_clusters": n_clusters,
+        "profile": profile,
+        "desc_map": describe_clusters(profile),
+        "dataset_hash": fingerprint_dataframe(df_preprocessed),
+        "filled": filled,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class PartitionedModel:
+    def __init__(self, key, partitions, engine=None):
+        # partitions: {nilai: {"scaler", "model", "categorical_indices", "n_clusters", "desc_map", "offset", ...}}
+        self.key = key
+        self.partitions = partitions
+        self.engine = engine
+
+    @property
+    def n_clusters(self):
+        return sum(part["n_clusters"] for part in self.partitions.values())
+
+    @property
+    def cluster_desc_map(self):
+        return {
+            part["offset"] + local: _global_description(self.key, value, local, desc)
+            for value, part in self.partitions.items()
+            for local, desc in part["desc_map"].items()
+        }
+
+    def partition_of(self, label):
+        for value, part in self.partitions.items():
+            if part["offset"] <= label < part["offset"] + part["n_clusters"]:
+                return value, label - part["offset"]
+        return None, None
+
+    def predict(self, df_new):
+        # Setiap siswa dinormalisasi dan diprediksi dengan model partisinya; siswa dengan nilai
+        # kunci yang tidak punya model mendapat label UNKNOWN_PARTITION_LABEL.
+        table = to_student_table(df_new)
+        labels = np.full(len(table), UNKNOWN_PARTITION_LABEL, dtype=np.int64)
+        for value, positions in split_partitions(table, self.key).items():
+            part = self.partitions.get(value)
+            if part is None:
+                continue
+            _, features = prepare_features(table.iloc[positions], part["scaler"])
+            local = np.asarray(part["model"].predict(features, categorical=part["categorical_indices"]))
+            labels[positions] = local + part["offset"]
+        return table, labels
+
+
+def fit_partitioned(df, key, n_clusters, engine="kmodes", max_workers=None):
+    # Mengembalikan (tabel siswa berlabel global, PartitionedModel, statistik).
+    start = time.perf_counter()
+    table = to_student_table(df)
+    partitions = split_partitions(table, key)
+    too_small = [f"{value} ({len(positions)})" for value, positions in partitions.items() if len(positions) < n_clusters]
+    if too_small:
+        raise ValueError(f"Partisi berikut memiliki siswa lebih sedikit dari K={n_clusters}: {', '.join(too_small)}.")
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(partitions)))
+    # Partisi terbesar lebih dulu agar partisi besar tidak tertinggal di akhir antrean.
+    order = sorted(partitions, key=lambda value: len(partitions[value]), reverse=True)
+    if max_workers == 1:
+        results = {value: _fit_partition(table.iloc[partitions[value]], n_clusters, engine) for value in order}
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {value: executor.submit(_fit_partition, table.iloc[partitions[value]], n_clusters, engine)
+                       for value in order}
+            results = {value: future.result() for value, future in futures.items()}
+
+    labels = np.empty(len(table), dtype=CLUSTER_LABEL_DTYPE)
+    model_parts, offset = {}, 0
+    for value, positions in partitions.items():
+        result = results[value]
+        labels[positions] = result.pop("labels") + offset
+        model_parts[value] = {**result, "offset": offset, "n_rows": len(positions)}
+        offset += result["n_clusters"]
+    model = PartitionedModel(key, model_parts, engine=engine)
+    elapsed = time.perf_counter() - start
+    stats = {
+        "Jumlah Partisi": len(partitions),
+        "Jumlah Siswa": len(table),
+        "Jumlah Pekerja": max_workers,
+        "Waktu (detik)": elapsed,
+        "Total Waktu Fit Partisi (detik)": sum(part["seconds"] for part in model_parts.values()),
+    }
+    return table.assign(Klaster=labels), model, stats
+
+
+def partition_summary(model):
+    return pd.DataFrame(
+        [
+            {
+                model.key: value,
+                "Jumlah Siswa": part.get("n_rows"),
+                "Klaster Global": f"{part['offset']}-{part['offset'] + part['n_clusters'] - 1}",
+                "Waktu Fit (detik)": part.get("seconds"),
+            }
+            for value, part in model.partitions.items()
+        ]
+    )
+
+
+def predict_partitioned(df_new, model):
+    # Padanan predict_batch untuk model per partisi.
+    start = time.perf_counter()
+    table, labels = model.predict(df_new)
+    descriptions = pd.Series(labels).map(model.cluster_desc_map)
+    unknown = labels == UNKNOWN_PARTITION_LABEL
+    descriptions[unknown] = [f"Tidak ada model untuk {model.key} '{value}'." for value in table.loc[unknown, model.key]]
+    result = table.assign(**{
+        "Klaster": labels.astype(CLUSTER_LABEL_DTYPE),
+        DESCRIPTION_COL: descriptions.fillna("Deskripsi klaster tidak tersedia.").to_numpy(),
+    })
+    elapsed = time.perf_counter() - start
+    stats = {
+        "Jumlah Siswa": len(result),
+        "Tanpa Model Partisi": int(unknown.sum()),
+        "Waktu (detik)": elapsed,
+        "Baris per Detik": len(result) / elapsed if elapsed > 0 else float("inf"),
+    }
+    return result, stats
+
+
+# --- ARTEFAK PER PARTISI ---
+# Setiap partisi disimpan sebagai artefak berversi biasa di subfolder sendiri; berkas
+# partitions.json memetakan nilai partisi ke subfolder, versi dan offset labelnya.
+def _partition_dir_name(position, value):
+    return f"p{position:03d}_" + (re.sub(r"[^0-9A-Za-z_-]+", "_", value).strip("_") or "kosong")
+
+
+def save_partitioned_artifacts(model, df_clustered=None, artifact_dir=PARTITIONED_ARTIFACT_DIR):
+    entries = []
+    for position, (value, part) in enumerate(model.partitions.items()):
+        subdir = _partition_dir_name(position, value)
+        version = save_artifacts(
+            part["scaler"], part["model"], part["categorical_indices"], part["desc_map"], part["dataset_hash"],
+            engine=model.engine, artifact_dir=os.path.join(artifact_dir, subdir), cluster_profile=part.get("profile"),
+            extra_meta={"partition_key": model.key, "partition_value": value},
+        )
+        entries.append({"value": value, "dir": subdir, "version": version, "offset": part["offset"],
+                        "n_clusters": part["n_clusters"], "n_rows": part.get("n_rows")})
+    os.makedirs(artifact_dir, exist_ok=True)
+    index_tmp = os.path.join(artifact_dir, PARTITION_INDEX_FILE + ".tmp")
+    with open(index_tmp, "w", encoding="utf-8") as f:
+        json.dump({"key": model.key, "engine": model.engine, "partitions": entries}, f, ensure_ascii=False, indent=2)
+    if df_clustered is not None:
+        df_clustered.to_parquet(os.path.join(artifact_dir, "table.parquet"), index=False)
+    os.replace(index_tmp, os.path.join(artifact_dir, PARTITION_INDEX_FILE))
+    return entries
+
+
+def load_partitioned_artifacts(artifact_dir=PARTITIONED_ARTIFACT_DIR):
+    index_path = os.path.join(artifact_dir, PARTITION_INDEX_FILE)
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(f"Belum ada model per partisi tersimpan di '{artifact_dir}'.")
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    partitions = {}
+    for entry in index["partitions"]:
+        bundle = load_artifacts(entry["version"], os.path.join(artifact_dir, entry["dir"]), with_table=False)
+        partitions[entry["value"]] = {
+            "scaler": bundle["scaler"],
+            "model": bundle["model"],
+            "categorical_indices": bundle["categorical_indices"],
+            "n_clusters": entry["n_clusters"],
+            "desc_map": bundle["cluster_desc_map"],
+            "profile": bundle["cluster_profile"],
+            "offset": entry["offset"],
+            "n_rows": entry.get("n_rows"),
+        }
+    return PartitionedModel(index["key"], partitions, engine=index.get("engine"))
@@ -0,0 +1,321 @@
+import io
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+
+from lru import LRUCache
+from schema import CATEGORICAL_COLS
+
+# --- LAPORAN PDF PROFIL SISWA ---
+REPORT_FORMATS = {"zip": "ZIP (satu PDF per siswa)", "pdf": "Satu PDF gabungan"}
+BULK_CHUNK_SIZE = 50
+TEMPLATE_CACHE_MAX_ENTRIES = 8
+PROFILE_FIELD_KEYS = [
+    "Nomor Induk", "Jenis Kelamin", "Kelas", "Rata-rata Nilai Akademik",
+    "Persentase Kehadiran", "Ekstrakurikuler yang Diikuti",
+]
+KETERANGAN_UMUM = (
+    "Laporan ini menyajikan profil detail siswa berdasarkan hasil pengelompokan "
+    "menggunakan Algoritma K-Prototype. Klasterisasi dilakukan berdasarkan "
+    "nilai akademik, kehadiran, dan partisipasi ekstrakurikuler siswa. "
+    "Informasi klaster ini dapat digunakan untuk memahami kebutuhan siswa dan "
+    "merancang strategi pembinaan yang sesuai."
+)
+
+_template_cache = LRUCache(max_entries=TEMPLATE_CACHE_MAX_ENTRIES)
+
+
+def profile_fields(nama, data_siswa_dict):
+    ekskul_diikuti = []
+    for col in CATEGORICAL_COLS:
+        val = data_siswa_dict.get(col)
+        if val is not None and (val == 1 or str(val).strip() == '1'):
+            ekskul_diikuti.append(col.replace("Ekstrakurikuler ", ""))
+    return {
+        "Nama": nama,
+        "Nomor Induk": data_siswa_dict.get("No", "-"),
+        "Jenis Kelamin": data_siswa_dict.get("JK", "-"),
+        "Kelas": data_siswa_dict.get("Kelas", "-"),
+        "Rata-rata Nilai Akademik": f"{data_siswa_dict.get('Rata Rata Nilai Akademik', '-'):.2f}",
+        "Persentase Kehadiran": f"{data_siswa_dict.get('Kehadiran', '-'):.2%}",
+        "Ekstrakurikuler yang Diikuti": ", ".join(ekskul_diikuti) if ekskul_diikuti else "Tidak mengikuti ekstrakurikuler",
+    }
+
+
+def _draw_profile_page(pdf, fields, klaster, cluster_desc_map):
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.set_text_color(44, 47, 127)
+    pdf.cell(0, 10, "PROFIL SISWA - HASIL KLASTERISASI", ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_font("Arial", "", 10)
+    pdf.set_text_color(0, 0, 0)
+    pdf.multi_cell(0, 5, KETERANGAN_UMUM, align='J')
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 8, f"Nama Siswa: {fields['Nama']}", ln=True)
+    pdf.cell(0, 8, f"Klaster Hasil: {klaster}", ln=True)
+    pdf.ln(3)
+    klaster_desc = cluster_desc_map.get(klaster, "Deskripsi klaster tidak tersedia.")
+    pdf.set_font("Arial", "I", 10)
+    pdf.set_text_color(80, 80, 80)
+    pdf.multi_cell(0, 5, f"Karakteristik Klaster {klaster}: {klaster_desc}", align='J')
+    pdf.ln(5)
+    pdf.set_font("Arial", "", 10)
+    pdf.set_text_color(0, 0, 0)
+    for key in PROFILE_FIELD_KEYS:
+        pdf.cell(0, 7, f"{key}: {fields[key]}", ln=True)
+
+
+def add_profile_page(pdf, nama, data_siswa_dict, klaster, cluster_desc_map):
+    _draw_profile_page(pdf, profile_fields(nama, data_siswa_dict), klaster, cluster_desc_map)
+
+
+def generate_profile_pdf_fpdf(nama, data_siswa_dict, klaster, cluster_desc_map):
+    # Jalur lama: seluruh tata letak dibangun ulang oleh FPDF untuk setiap siswa.
+    # PERBAIKAN: fpdf2 mengembalikan bytearray dari output(); .encode('latin-1')
+    # pada hasilnya selalu gagal.
+    pdf = FPDF()
+    add_profile_page(pdf, nama, data_siswa_dict, klaster, cluster_desc_map)
+    return bytes(pdf.output())
+
+
+# --- JALUR CEPAT: TEMPLATE HALAMAN YANG DIPAKAI ULANG ---
+# Tata letak statis (judul, paragraf keterangan, blok deskripsi klaster) dirender
+# oleh FPDF sekali per klaster dengan penanda di tempat isian siswa. Content stream
+# hasilnya dipotong pada penanda tersebut; setiap siswa cukup mengisi potongan itu
+# dan objek PDF ditulis langsung ke buffer.
+_FIELD_MARKER = re.compile(rb"@@(\d+)@@")
+
+
+def _escape_pdf_text(value):
+    text = str(value).encode("latin-1")
+    return text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r")
+
+
+def _font_entries(pdf):
+    # fpdf2 < 2.8 menyimpan font sebagai dict, versi baru sebagai objek CoreFont.
+    entries = []
+    for font in pdf.fonts.values():
+        index, name = (font["i"], font["name"]) if isinstance(font, dict) else (font.i, font.name)
+        entries.append((index, name))
+    return sorted(entries)
+
+
+class PdfPageWriter:
+    # Penulis PDF minimal untuk halaman hasil template: objek halaman ditulis
+    # bertahap ke file, pohon halaman dan xref baru ditulis saat close().
+    def __init__(self, out, fonts, page_size):
+        self.out = out
+        self.fonts = fonts
+        self.page_size = page_size
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3
+        self.position = 0
+        self._write(b"%PDF-1.3\n%\xe9\xeb\xf1\xbf\n")
+        font_ids = {}
+        for index, name in fonts:
+            font_ids[index] = self._add_object(
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} /Encoding /WinAnsiEncoding >>".encode("ascii")
+            )
+        font_refs = " ".join(f"/F{index} {obj_id} 0 R" for index, obj_id in font_ids.items())
+        self._write_object(2, f"<< /Font << {font_refs} >> /ProcSet [/PDF /Text] >>".encode("ascii"))
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def _write_object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _add_object(self, body):
+        obj_id = self.next_id
+        self.next_id += 1
+        self._write_object(obj_id, body)
+        return obj_id
+
+    def add_page(self, content):
+        content_id = self._add_object(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        width, height = self.page_size
+        page_id = self._add_object(
+            f"<< /Type /Page /Parent 1 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+            f"/Resources 2 0 R /Contents {content_id} 0 R >>".encode("ascii")
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(1, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        catalog_id = self._add_object(b"<< /Type /Catalog /Pages 1 0 R >>")
+        xref_position = self.position
+        xref = [b"xref\n0 %d\n" % self.next_id, b"0000000000 65535 f \n"]
+        xref.extend(b"%010d 00000 n \n" % self.offsets[obj_id] for obj_id in range(1, self.next_id))
+        self._write(b"".join(xref))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, catalog_id, xref_position))
+
+
+class ProfilePdfTemplate:
+    def __init__(self, cluster_desc_map):
+        self.cluster_desc_map = dict(cluster_desc_map)
+        self._pages = {}
+        self.fonts = None
+        self.page_size = None
+
+    def _page_template(self, klaster):
+        template = self._pages.get(klaster)
+        if template is None:
+            markers = {key: f"@@{i}@@" for i, key in enumerate(["Nama"] + PROFILE_FIELD_KEYS)}
+            pdf = FPDF()
+            pdf.set_compression(False)
+            _draw_profile_page(pdf, markers, klaster, self.cluster_desc_map)
+            pieces = _FIELD_MARKER.split(bytes(pdf.pages[1].contents))
+            field_order = ["Nama"] + PROFILE_FIELD_KEYS
+            template = (pieces[0::2], [field_order[int(i)] for i in pieces[1::2]])
+            self._pages[klaster] = template
+            self.fonts = self.fonts or _font_entries(pdf)
+            self.page_size = self.page_size or (pdf.w_pt, pdf.h_pt)
+        return template
+
+    def page_content(self, nama, data_siswa_dict, klaster):
+        static_parts, field_order = self._page_template(klaster)
+        fields = profile_fields(nama, data_siswa_dict)
+        chunks = [static_parts[0]]
+        for key, static in zip(field_order, static_parts[1:]):
+            chunks.append(_escape_pdf_text(fields[key]))
+            chunks.append(static)
+        return b"".join(chunks)
+
+    def page_writer(self, out):
+        if self.fonts is None:
+            self._page_template(next(iter(self.cluster_desc_map), 0))
+        return PdfPageWriter(out, self.fonts, self.page_size)
+
+    def render(self, nama, data_siswa_dict, klaster):
+        content = self.page_content(nama, data_siswa_dict, klaster)
+        buffer = io.BytesIO()
+        writer = self.page_writer(buffer)
+        writer.add_page(content)
+        writer.close()
+        return buffer.getvalue()
+
+
+def get_profile_template(cluster_desc_map):
+    # Satu template per model (peta deskripsi klaster); dipakai ulang antar-rerun.
+    key = tuple(sorted((int(k), str(v)) for k, v in cluster_desc_map.items()))
+    template = _template_cache.get(key)
+    if template is None:
+        template = ProfilePdfTemplate(cluster_desc_map)
+        _template_cache.put(key, template)
+    return template
+
+
+def generate_profile_pdf(nama, data_siswa_dict, klaster, cluster_desc_map):
+    return get_profile_template(cluster_desc_map).render(nama, data_siswa_dict, klaster)
+
+
+def select_students(df_clustered, kelas=None, klaster=None):
+    mask = None
+    if kelas is not None:
+        mask = df_clustered["Kelas"].astype(str) == str(kelas)
+    if klaster is not None:
+        klaster_mask = df_clustered["Klaster"] == int(klaster)
+        mask = klaster_mask if mask is None else mask & klaster_mask
+    return df_clustered if mask is None else df_clustered[mask]
+
+
+def report_file_name(record):
+    nama = re.sub(r"[^\w\-]+", "_", str(record.get("Nama", "siswa"))).strip("_") or "siswa"
+    kelas = re.sub(r"[^\w\-]+", "_", str(record.get("Kelas", "-"))).strip("_") or "-"
+    return f"{kelas}/{record.get('No', '-')}_{nama}.pdf"
+
+
+def _render_chunk(records, cluster_desc_map, merged):
+    # Dijalankan di proses pekerja: satu potongan siswa -> daftar PDF (mode ZIP)
+    # atau daftar content stream halaman (mode gabungan, ditulis oleh proses induk).
+    template = get_profile_template(cluster_desc_map)
+    if merged:
+        return [
+            template.page_content(record.get("Nama", "-"), record, int(record["Klaster"]))
+            for record in records
+        ]
+    return [
+        (report_file_name(record), template.render(record.get("Nama", "-"), record, int(record["Klaster"])))
+        for record in records
+    ]
+
+
+def _iter_rendered_chunks(df_students, cluster_desc_map, merged, max_workers, chunk_size):
+    # Jumlah potongan yang sedang diproses dibatasi agar hasil yang belum ditulis
+    # tidak menumpuk di memori.
+    chunks = (
+        df_students.iloc[start:start + chunk_size].to_dict("records")
+        for start in range(0, len(df_students), chunk_size)
+    )
+    max_in_flight = max_workers * 2
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        for records in chunks:
+            pending.append((len(records), executor.submit(_render_chunk, records, cluster_desc_map, merged)))
+            if len(pending) >= max_in_flight:
+                n_students, future = pending.pop(0)
+                yield n_students, future.result()
+        for n_students, future in pending:
+            yield n_students, future.result()
+
+
+def export_reports(df_students, cluster_desc_map, out_file, fmt="zip", progress_callback=None,
+                   max_workers=None, chunk_size=BULK_CHUNK_SIZE):
+    # Ekspor massal: halaman dirender di process pool per potongan lalu langsung
+    # ditulis ke out_file (path atau file object).
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Format laporan tidak dikenal: {fmt}")
+    if df_students is None or df_students.empty:
+        raise ValueError("Tidak ada siswa yang dipilih untuk dibuatkan laporan.")
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, -(-len(df_students) // chunk_size))
+    start = time.perf_counter()
+    done_students = 0
+    n_pages = 0
+
+    def report_progress():
+        if progress_callback is not None:
+            progress_callback(done_students, len(df_students))
+
+    if fmt == "zip":
+        with zipfile.ZipFile(out_file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for n_students, files in _iter_rendered_chunks(df_students, cluster_desc_map, False, max_workers, chunk_size):
+                for name, data in files:
+                    archive.writestr(name, data)
+                done_students += n_students
+                n_pages += len(files)
+                report_progress()
+    else:
+        # Halaman ditulis bertahap ke satu PDF; hanya potongan yang sedang diproses
+        # yang berada di memori.
+        owns_file = isinstance(out_file, (str, os.PathLike))
+        handle = open(out_file, "wb") if owns_file else out_file
+        try:
+            writer = get_profile_template(cluster_desc_map).page_writer(handle)
+            for n_students, pages in _iter_rendered_chunks(df_students, cluster_desc_map, True, max_workers, chunk_size):
+                for content in pages:
+                    writer.add_page(content)
+                done_students += n_students
+                n_pages += len(pages)
+                report_progress()
+            writer.close()
+        finally:
+            if owns_file:
+                handle.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "Jumlah Siswa": done_students,
+        "Jumlah Halaman": n_pages,
+        "Waktu (detik)": elapsed,
+        "Halaman per Detik": n_pages / elapsed if elapsed > 0 else float("inf"),
+    }
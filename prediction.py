@@ -0,0 +1,68 @@
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import ALL_FEATURES_FOR_CLUSTERING, CLUSTER_LABEL_DTYPE, NUMERIC_COLS, convert_flag_columns, to_student_table
+
+# --- PREDIKSI KLASTER SECARA BATCH ---
+DESCRIPTION_COL = "Deskripsi Klaster"
+
+
+def validate_student_rows(df_new):
+    # Kolom fitur wajib ada, nilai numerik yang terisi harus angka dan flag ekskul harus
+    # 0/1 atau Ya/Tidak. Nilai kosong tetap diperbolehkan (numerik diisi rata-rata data
+    # latih, ekskul dianggap 0).
+    columns = [str(c).strip() for c in df_new.columns]
+    missing_cols = [col for col in ALL_FEATURES_FOR_CLUSTERING if col not in columns]
+    if missing_cols:
+        raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data: {', '.join(missing_cols)}.")
+    invalid_cols = []
+    for col, series in zip(columns, (df_new.iloc[:, j] for j in range(df_new.shape[1]))):
+        if col in NUMERIC_COLS and (pd.to_numeric(series, errors="coerce").isna() & series.notna()).any():
+            invalid_cols.append(col)
+    if invalid_cols:
+        raise ValueError(f"Kolom-kolom berikut berisi nilai yang bukan angka: {', '.join(invalid_cols)}.")
+    convert_flag_columns(df_new.rename(columns=lambda c: str(c).strip()))
+
+
+def prepare_features(df_new, scaler):
+    # Menyiapkan fitur siswa baru dengan scaler yang sudah dilatih: satu panggilan
+    # transform untuk seluruh baris. Nilai numerik kosong diisi rata-rata data latih.
+    table = to_student_table(df_new)
+    missing_cols = [col for col in ALL_FEATURES_FOR_CLUSTERING if col not in table.columns]
+    if missing_cols:
+        raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data: {', '.join(missing_cols)}.")
+    numeric = table[NUMERIC_COLS].to_numpy(dtype=np.float64)
+    nan_rows, nan_cols = np.nonzero(np.isnan(numeric))
+    numeric[nan_rows, nan_cols] = scaler.mean_[nan_cols]
+    scaled = scaler.transform(pd.DataFrame(numeric, columns=NUMERIC_COLS))
+    features = table[ALL_FEATURES_FOR_CLUSTERING].assign(
+        **{col: scaled[:, j] for j, col in enumerate(NUMERIC_COLS)}
+    )
+    return table, features
+
+
+def predict_batch(df_new, scaler, model, categorical_indices, cluster_desc_map):
+    start = time.perf_counter()
+    table, features = prepare_features(df_new, scaler)
+    labels = np.asarray(model.predict(features, categorical=list(categorical_indices)))
+    descriptions = pd.Series(labels).map(cluster_desc_map).fillna("Deskripsi klaster tidak tersedia.")
+    result = table.assign(**{
+        "Klaster": labels.astype(CLUSTER_LABEL_DTYPE),
+        DESCRIPTION_COL: descriptions.to_numpy(),
+    })
+    elapsed = time.perf_counter() - start
+    stats = {
+        "Jumlah Siswa": len(result),
+        "Waktu (detik)": elapsed,
+        "Baris per Detik": len(result) / elapsed if elapsed > 0 else float("inf"),
+    }
+    return result, stats
+
+
+def to_excel_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
@@ -0,0 +1,24 @@
+from schema import CATEGORICAL_COLS, ID_COLS, NUMERIC_COLS, to_student_table
+
+# --- PRAPROSES & NORMALISASI (TANPA STREAMLIT) ---
+# Dipakai oleh app.py, benchmark dan pipeline baris perintah. Kolom yang hilang
+# dilaporkan lewat ValueError; pemanggil yang menampilkan pesannya.
+
+
+def preprocess_table(df):
+    # Mengembalikan (fitur ternormalisasi, scaler, {kolom: rata-rata pengisi nilai kosong}).
+    df_processed = to_student_table(df)
+    missing_cols = [col for col in NUMERIC_COLS + CATEGORICAL_COLS if col not in df_processed.columns]
+    if missing_cols:
+        raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data Anda: {', '.join(missing_cols)}. Harap periksa file Excel Anda dan pastikan nama kolom sudah benar.")
+    df_clean_for_clustering = df_processed.drop(columns=ID_COLS, errors="ignore")
+    filled = {}
+    for col in NUMERIC_COLS:
+        if df_clean_for_clustering[col].isnull().any():
+            mean_val = df_clean_for_clustering[col].mean()
+            df_clean_for_clustering[col] = df_clean_for_clustering[col].fillna(mean_val)
+            filled[col] = float(mean_val)
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    df_clean_for_clustering[NUMERIC_COLS] = scaler.fit_transform(df_clean_for_clustering[NUMERIC_COLS])
+    return df_clean_for_clustering, scaler, filled
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# --- SKEMA DATA SISWA ---
+# Dipakai bersama oleh app.py dan modul-modul pemrosesan agar nama kolom
+# hanya didefinisikan di satu tempat.
+
+ID_COLS = ["No", "Nama", "JK", "Kelas"]
+NUMERIC_COLS = ["Rata Rata Nilai Akademik", "Kehadiran"]
+CATEGORICAL_COLS = ["Ekstrakurikuler Komputer", "Ekstrakurikuler Pertanian",
+                    "Ekstrakurikuler Menjahit", "Ekstrakurikuler Pramuka"]
+ALL_FEATURES_FOR_CLUSTERING = NUMERIC_COLS + CATEGORICAL_COLS
+
+# --- REPRESENTASI BERTIPE RINGKAS ---
+# Flag ekstrakurikuler disimpan sebagai uint8, JK/Kelas sebagai categorical dan
+# kolom numerik sebagai float32. Kolom yang tidak ada dibiarkan apa adanya agar
+# validasi kolom tetap dilakukan oleh preprocess_data.
+FLAG_DTYPE = "uint8"
+NUMERIC_DTYPE = "float32"
+CATEGORY_ID_COLS = ["JK", "Kelas"]
+CLUSTER_LABEL_DTYPE = "int16"
+
+# --- NILAI FLAG EKSTRAKURIKULER ---
+# Flag hanya boleh 0/1 (angka atau teks), Ya/Tidak, Yes/No atau True/False (huruf
+# besar-kecil diabaikan). Sel kosong dianggap 0 seperti sebelumnya; nilai lain
+# ditolak dengan ValueError yang menyebut siswanya, bukan diam-diam dijadikan 0.
+FLAG_VALUES = {"1": 1, "0": 0, "ya": 1, "tidak": 0, "yes": 1, "no": 0, "true": 1, "false": 0}
+MAX_REPORTED_ROWS = 10
+
+
+def _describe_rows(table, positions):
+    # "Budi (baris 3)" bila kolom Nama ada, selain itu "baris 3" (label indeks + 1).
+    labels = []
+    for pos in positions[:MAX_REPORTED_ROWS]:
+        index = table.index[pos]
+        row = f"baris {index + 1}" if isinstance(index, (int, np.integer)) else f"baris {index}"
+        name = table["Nama"].iloc[pos] if "Nama" in table.columns else None
+        labels.append(f"{name} ({row})" if pd.notna(name) else row)
+    if len(positions) > MAX_REPORTED_ROWS:
+        labels.append(f"dan {len(positions) - MAX_REPORTED_ROWS} baris lainnya")
+    return ", ".join(labels)
+
+
+def parse_flags(series):
+    # Mengembalikan (flag uint8, mask nilai yang tidak dikenali).
+    numeric = pd.to_numeric(series, errors="coerce")
+    flags = numeric.where(numeric.isin([0, 1]))
+    pending = flags.isna() & series.notna()
+    if pending.any():
+        text = series[pending].astype(str).str.strip().str.lower()
+        flags[pending] = text.map(FLAG_VALUES).where(text != "", 0)
+    invalid = flags.isna() & series.notna()
+    return flags.fillna(0).astype(FLAG_DTYPE), invalid.to_numpy()
+
+
+def convert_flag_columns(table):
+    # {kolom: flag uint8} untuk setiap kolom ekstrakurikuler yang ada; nilai tidak
+    # dikenali dilaporkan per kolom lengkap dengan nama siswanya.
+    converted, problems = {}, []
+    for col in CATEGORICAL_COLS:
+        if col in table.columns:
+            converted[col], invalid = parse_flags(table[col])
+            if invalid.any():
+                values = ", ".join(sorted({repr(v) for v in table[col][invalid].head(MAX_REPORTED_ROWS)}))
+                problems.append(f"'{col}' berisi {values} pada {_describe_rows(table, np.flatnonzero(invalid))}")
+    if problems:
+        raise ValueError("Kolom ekstrakurikuler hanya boleh berisi 0/1 atau Ya/Tidak. " + "; ".join(problems) + ".")
+    return converted
+
+
+def to_student_table(df):
+    table = df.rename(columns=lambda c: str(c).strip())
+    converted = convert_flag_columns(table)
+    for col in NUMERIC_COLS:
+        if col in table.columns:
+            converted[col] = pd.to_numeric(table[col], errors="coerce").astype(NUMERIC_DTYPE)
+    for col in CATEGORY_ID_COLS:
+        if col in table.columns:
+            converted[col] = table[col].astype("category")
+    if "No" in table.columns and pd.api.types.is_integer_dtype(table["No"]):
+        converted["No"] = pd.to_numeric(table["No"], downcast="integer")
+    if "Klaster" in table.columns:
+        converted["Klaster"] = table["Klaster"].astype(np.dtype(CLUSTER_LABEL_DTYPE))
+    return table.assign(**converted)
+
+
+def _column_buffers(series):
+    # Kunci buffer memori sebuah kolom, dipakai untuk mendeteksi kolom yang
+    # dipakai bersama oleh beberapa DataFrame.
+    values = series.array
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = values.codes
+    try:
+        arr = np.asarray(values)
+        return (arr.__array_interface__["data"][0], arr.nbytes)
+    except (TypeError, ValueError):
+        return (id(values), 0)
+
+
+def memory_report(frames):
+    # frames: dict nama -> DataFrame. Menghitung memori setiap frame dan total
+    # memori unik sesi (kolom yang dipakai bersama hanya dihitung sekali).
+    rows, seen, unique_bytes = [], set(), 0
+    for name, df in frames.items():
+        if df is None:
+            continue
+        usage = df.memory_usage(deep=True, index=False)
+        shared = 0
+        for col in df.columns:
+            key = _column_buffers(df[col])
+            if key in seen:
+                shared += int(usage[col])
+            else:
+                seen.add(key)
+                unique_bytes += int(usage[col])
+        rows.append({
+            "Frame": name,
+            "Baris": len(df),
+            "Memori (MB)": usage.sum() / 1e6,
+            "Dipakai Bersama (MB)": shared / 1e6,
+        })
+    report = pd.DataFrame(rows, columns=["Frame", "Baris", "Memori (MB)", "Dipakai Bersama (MB)"])
+    return report, unique_bytes / 1e6
+
+
+def legacy_memory_estimate(df_typed):
+    # Perkiraan memori tata letak lama (tiga salinan penuh: flag sebagai int64 di
+    # data asli, string '0'/'1' di data praproses, JK/Kelas sebagai object).
+    legacy = df_typed.copy()
+    for col in legacy.columns:
+        if isinstance(legacy[col].dtype, pd.CategoricalDtype):
+            legacy[col] = legacy[col].astype(object)
+    for col in NUMERIC_COLS:
+        if col in legacy.columns:
+            legacy[col] = legacy[col].astype("float64")
+    for col in CATEGORICAL_COLS:
+        if col in legacy.columns:
+            legacy[col] = legacy[col].astype("int64")
+    original = legacy.memory_usage(deep=True, index=False).sum()
+    features = legacy[[c for c in NUMERIC_COLS + CATEGORICAL_COLS if c in legacy.columns]].copy()
+    for col in CATEGORICAL_COLS:
+        if col in features.columns:
+            features[col] = features[col].astype(str).astype(object)
+    preprocessed = features.memory_usage(deep=True, index=False).sum()
+    clustered = original + 8 * len(legacy)
+    return (original + preprocessed + clustered) / 1e6
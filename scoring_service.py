@@ -0,0 +1,257 @@
+import argparse
+import io
+import ipaddress
+import json
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import DEFAULT_ARTIFACT_DIR, load_artifacts
+from prediction import DESCRIPTION_COL, predict_batch, validate_student_rows
+
+# --- LAYANAN SKORING HEADLESS ---
+# Memuat model tersimpan sekali, menerima batch siswa (JSON/CSV) dan
+# menggabungkan permintaan kecil yang datang bersamaan menjadi micro-batch
+# sebelum memanggil predict. Setiap permintaan divalidasi sendiri sebelum masuk
+# antrean, sehingga hasil validasi tidak bergantung pada permintaan lain di batch.
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_ROWS = 2048
+DEFAULT_MAX_WAIT_MS = 5.0
+LATENCY_WINDOW = 10000
+RESPONSE_COLS = ["No", "Nama", "Klaster", DESCRIPTION_COL]
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_rows=DEFAULT_MAX_BATCH_ROWS, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 validate_fn=None):
+        self._predict_fn = predict_fn
+        self._validate_fn = validate_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, df):
+        future = Future()
+        if self._validate_fn is not None:
+            try:
+                self._validate_fn(df)
+            except Exception as e:
+                future.set_exception(e)
+                return future
+        self._queue.put((df, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            frames = [df for df, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                combined = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+                result = self._predict_fn(combined)
+                self.batch_sizes.append(len(combined))
+                offsets = np.cumsum([0] + [len(df) for df in frames])
+                for future, start, stop in zip(futures, offsets[:-1], offsets[1:]):
+                    future.set_result(result.iloc[start:stop])
+            except Exception as e:
+                if len(frames) == 1:
+                    futures[0].set_exception(e)
+                    continue
+                # Batch gagal: setiap permintaan diprediksi sendiri agar kesalahan hanya
+                # diterima oleh permintaan penyebabnya.
+                for df, future in zip(frames, futures):
+                    if not future.done():
+                        self._predict_single(df, future)
+
+    def _predict_single(self, df, future):
+        try:
+            result = self._predict_fn(df.reset_index(drop=True))
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            self.batch_sizes.append(len(df))
+            future.set_result(result)
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.total_requests += 1
+
+    def summary(self):
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64)
+            total = self.total_requests
+        if samples.size == 0:
+            return {"requests": total, "p50_ms": None, "p99_ms": None}
+        return {
+            "requests": total,
+            "p50_ms": float(np.percentile(samples, 50) * 1000),
+            "p99_ms": float(np.percentile(samples, 99) * 1000),
+        }
+
+
+class ScoringService:
+    def __init__(self, bundle, max_batch_rows=DEFAULT_MAX_BATCH_ROWS, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.bundle = bundle
+        self.latency = LatencyTracker()
+        self.batcher = MicroBatcher(self._predict, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms,
+                                    validate_fn=validate_student_rows)
+
+    def _predict(self, df):
+        result, _ = predict_batch(
+            df,
+            self.bundle["scaler"],
+            self.bundle["model"],
+            self.bundle["categorical_indices"],
+            self.bundle["cluster_desc_map"],
+        )
+        return result[[c for c in RESPONSE_COLS if c in result.columns]]
+
+    def score(self, df, timeout=30.0):
+        return self.batcher.submit(df).result(timeout=timeout)
+
+    def stats(self):
+        sizes = list(self.batcher.batch_sizes)
+        return {
+            **self.latency.summary(),
+            "batches": len(sizes),
+            "mean_batch_rows": float(np.mean(sizes)) if sizes else None,
+        }
+
+
+def _parse_body(body, content_type):
+    if content_type.startswith("text/csv"):
+        return pd.read_csv(io.BytesIO(body))
+    payload = json.loads(body or b"[]")
+    if isinstance(payload, dict):
+        payload = payload.get("students", [payload])
+    return pd.DataFrame.from_records(payload)
+
+
+def make_handler(service, verbose=False):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json"):
+            data = body.encode("utf-8") if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, json.dumps({
+                    "status": "ok",
+                    "version": service.bundle.get("version"),
+                    "n_clusters": len(service.bundle["cluster_desc_map"]),
+                }))
+            elif self.path == "/stats":
+                self._send(200, json.dumps(service.stats()))
+            else:
+                self._send(404, json.dumps({"error": "Endpoint tidak ditemukan."}))
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, json.dumps({"error": "Endpoint tidak ditemukan."}))
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                df = _parse_body(self.rfile.read(length), self.headers.get("Content-Type", "application/json"))
+                if df.empty:
+                    raise ValueError("Data siswa kosong.")
+                result = service.score(df)
+            except Exception as e:
+                self._send(400, json.dumps({"error": str(e)}))
+                return
+            if self.headers.get("Accept", "").startswith("text/csv"):
+                self._send(200, result.to_csv(index=False), content_type="text/csv")
+            else:
+                self._send(200, result.to_json(orient="records"))
+            service.latency.record(time.perf_counter() - start)
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    return ScoringHandler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+
+def build_server(service, host="127.0.0.1", port=DEFAULT_PORT, unix_socket=None, verbose=False):
+    handler = make_handler(service, verbose=verbose)
+    if unix_socket:
+        return UnixHTTPServer(unix_socket, handler)
+    if not ipaddress.ip_address(host).is_loopback:
+        raise ValueError("Layanan skoring hanya untuk akses lokal; gunakan alamat loopback (mis. 127.0.0.1).")
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan skoring klaster siswa (lokal, tanpa Streamlit).")
+    parser.add_argument("--artifact-dir", default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument("--version", default=None, help="Versi model yang dipakai (bawaan: versi terbaru).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", default=None, help="Jalankan di Unix socket alih-alih port TCP.")
+    parser.add_argument("--max-batch-rows", type=int, default=DEFAULT_MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    bundle = load_artifacts(version=args.version, artifact_dir=args.artifact_dir, with_table=False)
+    service = ScoringService(bundle, max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms)
+    server = build_server(service, host=args.host, port=args.port, unix_socket=args.unix_socket, verbose=args.verbose)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"Layanan skoring (model {bundle['version']}) berjalan di {where} (POST /predict, GET /stats, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
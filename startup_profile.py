@@ -0,0 +1,83 @@
+import builtins
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# --- PROFIL WAKTU MULAI APLIKASI ---
+# Aktif bila APP_STARTUP_PROFILE=1. Setiap impor modul baru dari app.py dicatat
+# waktunya (kumulatif, termasuk impor di dalamnya), lalu waktu hingga render
+# pertama dicatat di akhir skrip.
+STARTUP_PROFILE_ENABLED = os.environ.get("APP_STARTUP_PROFILE") == "1"
+PROFILED_MODULES = [
+    "streamlit", "pandas", "numpy", "schema", "clustering", "cluster_profile", "kproto_engine",
+    "ingestion", "prediction", "charts", "artifact_store", "k_sweep", "streaming", "pdf_reports",
+    "sklearn.preprocessing", "kmodes.kprototypes", "fpdf", "matplotlib.pyplot", "seaborn",
+]
+
+_import_seconds = {}
+_first_render_seconds = None
+_local = threading.local()
+_original_import = builtins.__import__
+_installed = False
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Hanya impor terluar dari modul yang belum dimuat yang dicatat, agar waktu
+    # dependensi di dalamnya tidak terhitung dua kali.
+    if level != 0 or name in sys.modules or getattr(_local, "depth", 0):
+        return _original_import(name, globals, locals, fromlist, level)
+    _local.depth = 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = 0
+        _import_seconds[name] = _import_seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+def install_import_profiler():
+    global _installed
+    if STARTUP_PROFILE_ENABLED and not _installed:
+        builtins.__import__ = _timed_import
+        _installed = True
+
+
+def record_first_render(script_start):
+    # Hanya run pertama di proses ini yang mewakili cold start.
+    global _first_render_seconds
+    if _first_render_seconds is None:
+        _first_render_seconds = time.perf_counter() - script_start
+        print(format_report(), file=sys.stderr)
+    return _first_render_seconds
+
+
+def import_report():
+    return sorted(_import_seconds.items(), key=lambda item: item[1], reverse=True)
+
+
+def format_report():
+    lines = ["Profil waktu mulai aplikasi:"]
+    for name, seconds in import_report():
+        lines.append(f"  impor {name:<28} {seconds * 1000:8.1f} ms")
+    if _first_render_seconds is not None:
+        lines.append(f"  render pertama                    {_first_render_seconds * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def measure_cold_imports(modules=PROFILED_MODULES, python=sys.executable):
+    # Setiap modul diimpor di proses Python baru sehingga tidak ada cache sys.modules.
+    results = {}
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        code = f"import time; t = time.perf_counter(); import {name}; print(time.perf_counter() - t)"
+        proc = subprocess.run([python, "-c", code], cwd=cwd, capture_output=True, text=True)
+        results[name] = float(proc.stdout.strip()) if proc.returncode == 0 else None
+    return results
+
+
+if __name__ == "__main__":
+    for module_name, seconds in measure_cold_imports().items():
+        shown = "tidak tersedia" if seconds is None else f"{seconds * 1000:.1f} ms"
+        print(f"{module_name:<28} {shown}")
@@ -0,0 +1,144 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import StandardScaler
+
+from kproto_engine import FastKPrototypes, MiniBatchKPrototypes
+from schema import (ALL_FEATURES_FOR_CLUSTERING, CATEGORICAL_COLS, CLUSTER_LABEL_DTYPE, NUMERIC_COLS, NUMERIC_DTYPE,
+                    convert_flag_columns)
+
+# --- KLASTERISASI OUT-OF-CORE UNTUK DATA SKALA KABUPATEN ---
+DEFAULT_CHUNK_ROWS = 50000
+
+
+def iter_table_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Membaca file per potongan tanpa memuat seluruh tabel ke memori.
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows)]
+            buffer = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) >= chunk_rows:
+                    yield pd.DataFrame(buffer, columns=header)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=header)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Format file tidak didukung untuk pembacaan bertahap: {ext}")
+
+
+def chunks_from_files(paths, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Pabrik potongan untuk cluster_out_of_core: setiap panggilan membaca ulang semua
+    # file dari awal, berurutan, sehingga beberapa workbook dapat diperlakukan satu dataset.
+    def chunk_factory():
+        for path in paths:
+            yield from iter_table_chunks(path, chunk_rows)
+    return chunk_factory
+
+
+def fit_scaler_streaming(chunk_factory):
+    # Lintasan pertama: mean dan deviasi standar dihitung bertahap (NaN diabaikan).
+    scaler = StandardScaler()
+    for chunk in chunk_factory():
+        chunk = chunk.rename(columns=lambda c: str(c).strip())
+        scaler.partial_fit(chunk[NUMERIC_COLS].to_numpy(dtype=np.float64))
+    return scaler
+
+
+def preprocess_chunk(chunk, scaler):
+    # Sama dengan preprocess_data, tetapi memakai scaler yang sudah dilatih dan
+    # mengisi nilai kosong dengan rata-rata global dari scaler.
+    chunk = chunk.rename(columns=lambda c: str(c).strip())
+    missing_cols = [col for col in ALL_FEATURES_FOR_CLUSTERING if col not in chunk.columns]
+    if missing_cols:
+        raise ValueError(f"Kolom-kolom berikut tidak ditemukan dalam data: {', '.join(missing_cols)}.")
+    out = pd.DataFrame(index=chunk.index)
+    numeric = chunk[NUMERIC_COLS].to_numpy(dtype=np.float64, copy=True)
+    nan_rows, nan_cols = np.nonzero(np.isnan(numeric))
+    numeric[nan_rows, nan_cols] = scaler.mean_[nan_cols]
+    scaled = scaler.transform(numeric)
+    for j, col in enumerate(NUMERIC_COLS):
+        out[col] = scaled[:, j]
+    # Flag divalidasi seperti to_student_table; nomor baris pada pesan mengikuti indeks
+    # potongan (read_csv melanjutkan indeks antarpotongan).
+    return out.assign(**convert_flag_columns(chunk))
+
+
+def cluster_out_of_core(chunk_factory, n_clusters, batch_size=4096, n_epochs=3, random_state=42, n_init=3):
+    # Tiga tahap: (1) scaler bertahap, (2) pembaruan prototipe mini-batch per
+    # potongan, (3) penugasan seluruh baris dalam satu lintasan tervektorisasi.
+    start = time.perf_counter()
+    scaler = fit_scaler_streaming(chunk_factory)
+    categorical = list(range(len(NUMERIC_COLS), len(ALL_FEATURES_FOR_CLUSTERING)))
+
+    def preprocessed_chunks():
+        for chunk in chunk_factory():
+            yield preprocess_chunk(chunk, scaler)[ALL_FEATURES_FOR_CLUSTERING]
+
+    model = MiniBatchKPrototypes(n_clusters=n_clusters, batch_size=batch_size, n_epochs=n_epochs,
+                                 random_state=random_state, n_init=n_init)
+    model.fit_stream(preprocessed_chunks, categorical)
+    labels, cost = model.predict_stream(preprocessed_chunks, categorical)
+    model.labels_ = labels
+    model.cost_ = cost
+    model.fit_seconds_ = time.perf_counter() - start
+    return labels, model, scaler, categorical
+
+
+def collect_features(chunk_factory, scaler):
+    # Hanya kolom fitur yang dikumpulkan (numerik mentah float32 dengan NaN, dan fitur
+    # ternormalisasi) untuk ringkasan profil klaster; identitas siswa tetap di file.
+    raw, normalized = [], []
+    for chunk in chunk_factory():
+        chunk = chunk.rename(columns=lambda c: str(c).strip())
+        normalized.append(preprocess_chunk(chunk, scaler)[ALL_FEATURES_FOR_CLUSTERING])
+        raw.append(chunk[NUMERIC_COLS].apply(pd.to_numeric, errors="coerce").astype(NUMERIC_DTYPE))
+    return pd.concat(raw, ignore_index=True), pd.concat(normalized, ignore_index=True)
+
+
+def iter_labelled_chunks(chunk_factory, labels):
+    # Lintasan penulisan: potongan asli (flag sudah dikonversi) dengan kolom Klaster,
+    # dalam urutan yang sama dengan label dari predict_stream.
+    offset = 0
+    for chunk in chunk_factory():
+        chunk = chunk.rename(columns=lambda c: str(c).strip())
+        chunk_labels = labels[offset:offset + len(chunk)].astype(CLUSTER_LABEL_DTYPE)
+        offset += len(chunk)
+        yield chunk.assign(**convert_flag_columns(chunk), Klaster=chunk_labels)
+
+
+def compare_with_full_fit(df_preprocessed, minibatch_model, n_clusters, random_state=42, n_init=10):
+    # Laporan akurasi: fit penuh pada data yang sama lalu dibandingkan dengan
+    # hasil mini-batch (Adjusted Rand Index dan selisih biaya relatif).
+    X_data = df_preprocessed[ALL_FEATURES_FOR_CLUSTERING]
+    categorical = [X_data.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    start = time.perf_counter()
+    full_model = FastKPrototypes(n_clusters=n_clusters, random_state=random_state, n_init=n_init,
+                                 gamma=minibatch_model.gamma)
+    full_labels = full_model.fit_predict(X_data, categorical=categorical)
+    full_seconds = time.perf_counter() - start
+    minibatch_labels, min_dist = minibatch_model.predict_with_cost(X_data, categorical=categorical)
+    minibatch_cost = float(min_dist.sum())
+    return {
+        "Adjusted Rand Index": float(adjusted_rand_score(full_labels, minibatch_labels)),
+        "Biaya Fit Penuh": float(full_model.cost_),
+        "Biaya Mini-batch": minibatch_cost,
+        "Selisih Biaya Relatif": (minibatch_cost - full_model.cost_) / full_model.cost_ if full_model.cost_ else 0.0,
+        "Waktu Fit Penuh (detik)": full_seconds,
+    }
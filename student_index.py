@@ -0,0 +1,128 @@
+import bisect
+import difflib
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from lru import LRUCache
+
+# --- INDEKS PENCARIAN SISWA ---
+# Dibangun sekali per dataset: Nama dan No dipetakan ke posisi baris sehingga
+# pencarian satu siswa O(1), dan pencarian awalan memakai daftar nama terurut
+# (bisect) alih-alih memindai seluruh tabel di setiap rerun.
+INDEX_CACHE_MAX_ENTRIES = 8
+SEARCH_PAGE_SIZE = 50
+MEMBER_PAGE_SIZE = 25
+FUZZY_CUTOFF = 0.75
+
+_index_cache = LRUCache(max_entries=INDEX_CACHE_MAX_ENTRIES)
+_membership_cache = LRUCache(max_entries=INDEX_CACHE_MAX_ENTRIES)
+
+
+class StudentIndex:
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.names = df["Nama"].astype(str).str.strip().to_numpy()
+        self.numbers = df["No"].astype(str).to_numpy() if "No" in df.columns else np.arange(1, self.n_rows + 1).astype(str)
+        self.by_name = pd.Series(np.arange(self.n_rows)).groupby(self.names, sort=False).indices
+        self.by_number = {}
+        for position, number in enumerate(self.numbers):
+            self.by_number.setdefault(number, position)
+        lowered = np.char.lower(self.names.astype(str))
+        order = np.argsort(lowered, kind="stable")
+        self._sorted_lower = lowered[order].tolist()
+        self._sorted_positions = order
+        self._lower = lowered
+        self._unique_lower = sorted(set(self._sorted_lower))
+        self._positions_by_lower = pd.Series(np.arange(self.n_rows)).groupby(lowered, sort=False).indices
+
+    def label(self, position):
+        # Nama ganda dibedakan dengan nomor induk.
+        return f"{self.names[position]} (No. {self.numbers[position]})"
+
+    def positions_for_name(self, nama):
+        return self.by_name.get(str(nama).strip(), np.empty(0, dtype=np.int64))
+
+    def position_for_number(self, number):
+        return self.by_number.get(str(number))
+
+    def search(self, query):
+        # Urutan hasil: nomor induk persis, awalan nama, potongan nama, lalu nama mirip (typo).
+        query = str(query or "").strip().lower()
+        if not query:
+            return np.arange(self.n_rows)
+        matches = []
+        exact_number = self.by_number.get(query)
+        if exact_number is not None:
+            matches.append(np.array([exact_number]))
+        start = bisect.bisect_left(self._sorted_lower, query)
+        end = bisect.bisect_left(self._sorted_lower, query + "\uffff", lo=start)
+        prefix = self._sorted_positions[start:end]
+        matches.append(prefix)
+        contains = np.flatnonzero(np.char.find(self._lower, query) > 0)
+        matches.append(contains)
+        if not len(prefix) and not len(contains):
+            close = difflib.get_close_matches(query, self._unique_lower, n=SEARCH_PAGE_SIZE, cutoff=FUZZY_CUTOFF)
+            matches.extend(self._positions_by_lower[name] for name in close)
+        combined = np.concatenate(matches) if matches else np.empty(0, dtype=np.int64)
+        _, first = np.unique(combined, return_index=True)
+        return combined[np.sort(first)]
+
+    def search_page(self, query, page=1, page_size=SEARCH_PAGE_SIZE):
+        results = self.search(query)
+        n_pages = max(1, -(-len(results) // page_size))
+        page = min(max(1, int(page)), n_pages)
+        start = (page - 1) * page_size
+        return results[start:start + page_size], len(results), n_pages
+
+
+def get_student_index(df, scope):
+    # Kunci: cakupan dataset (versi model / hash unggahan) dan jumlah baris.
+    key = (scope, len(df))
+    index = _index_cache.get(key)
+    if index is None:
+        index = StudentIndex(df)
+        _index_cache.put(key, index)
+    return index
+
+
+# --- INDEKS ANGGOTA KLASTER ---
+class ClusterMembershipIndex:
+    # Posisi baris per klaster dari satu stable argsort; anggota klaster k adalah
+    # potongan order[starts[k]:ends[k]] (terurut sesuai posisi baris asli).
+    def __init__(self, labels):
+        labels = np.asarray(labels, dtype=np.int64)
+        self.order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+
+    def members(self, klaster):
+        klaster = int(klaster)
+        if klaster < 0 or klaster >= len(self.starts):
+            return np.empty(0, dtype=np.int64)
+        return self.order[self.starts[klaster]:self.ends[klaster]]
+
+    def page(self, klaster, exclude_position=None, page=1, page_size=MEMBER_PAGE_SIZE):
+        # Mengembalikan (posisi baris di halaman ini, jumlah anggota lain, jumlah halaman).
+        members = self.members(klaster)
+        if exclude_position is not None:
+            cut = np.searchsorted(members, exclude_position)
+            if cut < len(members) and members[cut] == exclude_position:
+                members = np.delete(members, cut)
+        n_pages = max(1, -(-len(members) // page_size))
+        page = min(max(1, int(page)), n_pages)
+        start = (page - 1) * page_size
+        return members[start:start + page_size], len(members), n_pages
+
+
+def get_cluster_membership(labels, scope):
+    # Kunci memuat sidik jari label agar klasterisasi ulang tidak memakai indeks lama.
+    labels = np.ascontiguousarray(labels)
+    key = (scope, hashlib.blake2b(labels.tobytes(), digest_size=16).hexdigest())
+    index = _membership_cache.get(key)
+    if index is None:
+        index = ClusterMembershipIndex(labels)
+        _membership_cache.put(key, index)
+    return index
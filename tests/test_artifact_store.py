@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import artifact_store
+from artifact_store import latest_version, list_versions, load_artifacts, read_meta, save_artifacts
+from benchmarks.synthetic import generate_roster
+from clustering import fingerprint_dataframe, fit_kprototypes
+from preprocessing import preprocess_table
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df = generate_roster(300, seed=0)
+    features, scaler, _ = preprocess_table(df)
+    labels, model, categorical = fit_kprototypes(features, 3, engine="numpy")
+    return df, features, scaler, labels, model, categorical
+
+
+def test_concurrent_saves_get_distinct_versions(tmp_path, fitted):
+    df, features, scaler, labels, model, categorical = fitted
+
+    def save(i):
+        return save_artifacts(scaler, model, categorical, {0: "a"}, f"data-{i}", df_clustered=df.assign(Klaster=labels),
+                              engine="numpy", artifact_dir=str(tmp_path), skip_if_unchanged=False)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        versions = list(executor.map(save, range(8)))
+    assert sorted(versions) == list_versions(str(tmp_path))
+    assert len(set(versions)) == 8
+    assert latest_version(str(tmp_path)) == max(versions)
+    for version in versions:
+        assert read_meta(version, str(tmp_path))["version"] == version
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".simpan-")]
+
+
+def test_lock_is_not_taken_over_while_held(tmp_path, monkeypatch, fitted):
+    df, features, scaler, labels, model, categorical = fitted
+    monkeypatch.setattr(artifact_store, "LOCK_TIMEOUT_SECONDS", 0.3)
+    lock_path = tmp_path / artifact_store.LOCK_FILE
+
+    def save():
+        return save_artifacts(scaler, model, categorical, {}, "data", engine="numpy", artifact_dir=str(tmp_path),
+                              skip_if_unchanged=False)
+
+    # Kunci yang masih dipegang tetap berlaku walaupun berkasnya sudah lama tidak diubah.
+    with artifact_store._artifact_lock(str(tmp_path)):
+        os.utime(lock_path, (0, 0))
+        with pytest.raises(TimeoutError):
+            save()
+    assert list_versions(str(tmp_path)) == []
+    # Berkas kunci sisa proses yang sudah mati (tidak dipegang siapa pun) tidak menghalangi.
+    assert save() == "v0001"
+
+
+def test_skip_if_unchanged_compares_labels(tmp_path, fitted):
+    df, features, scaler, labels, model, categorical = fitted
+    dataset_hash = fingerprint_dataframe(features)
+    first = save_artifacts(scaler, model, categorical, {}, dataset_hash, df_clustered=df.assign(Klaster=labels),
+                           engine="numpy", artifact_dir=str(tmp_path))
+    again = save_artifacts(scaler, model, categorical, {}, dataset_hash, df_clustered=df.assign(Klaster=labels),
+                           engine="numpy", artifact_dir=str(tmp_path))
+    assert again == first
+    other_labels, other_model, _ = fit_kprototypes(features, 3, engine="numpy", random_state=7, n_init=1)
+    changed = save_artifacts(scaler, other_model, categorical, {}, dataset_hash,
+                             df_clustered=df.assign(Klaster=other_labels), engine="numpy", artifact_dir=str(tmp_path))
+    assert changed != first
+    bundle = load_artifacts(changed, str(tmp_path))
+    assert (bundle["df_clustered"]["Klaster"].to_numpy() == other_labels).all()
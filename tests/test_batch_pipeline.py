@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import adjusted_rand_score
+
+from artifact_store import load_artifacts
+from batch_pipeline import main, run_pipeline
+from clustering import fit_kprototypes
+from preprocessing import preprocess_table
+from schema import CATEGORICAL_COLS, ID_COLS, NUMERIC_COLS
+
+
+def separated_roster(n_per_group=150, seed=0):
+    # Tiga kelompok yang terpisah jelas agar fit out-of-core dan fit penuh harus sepakat.
+    rng = np.random.default_rng(seed)
+    groups = [(62.0, 0.72, [1, 0, 0, 1]), (76.0, 0.86, [0, 1, 0, 0]), (90.0, 0.98, [0, 0, 1, 1])]
+    frames = []
+    for nilai, kehadiran, pattern in groups:
+        frame = pd.DataFrame({
+            NUMERIC_COLS[0]: rng.normal(nilai, 2.0, n_per_group).round(2),
+            NUMERIC_COLS[1]: rng.normal(kehadiran, 0.01, n_per_group).round(4),
+        })
+        for col, flag in zip(CATEGORICAL_COLS, pattern):
+            frame[col] = np.where(rng.random(n_per_group) < 0.05, 1 - flag, flag)
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    df.loc[rng.random(len(df)) < 0.02, NUMERIC_COLS[0]] = np.nan
+    df.insert(0, "No", np.arange(1, len(df) + 1))
+    df.insert(1, "Nama", [f"Siswa {i}" for i in range(1, len(df) + 1)])
+    df.insert(2, "JK", rng.choice(["L", "P"], len(df)))
+    df.insert(3, "Kelas", rng.choice(["X IPA 1", "XI IPS 2"], len(df)))
+    return df[ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS]
+
+
+@pytest.mark.parametrize("table_format", ["csv", "parquet"])
+def test_chunked_run_matches_full_fit(tmp_path, table_format):
+    df = separated_roster()
+    df.to_csv(tmp_path / "siswa.csv", index=False)
+    summaries, failures = run_pipeline(
+        str(tmp_path / "siswa.csv"), 3, output_dir=str(tmp_path / "hasil"), artifact_dir=str(tmp_path / "artefak"),
+        table_format=table_format, pdf_format="zip", chunk_rows=100, log=lambda message: None,
+    )
+    assert failures == {}
+    summary = summaries[0]
+    assert summary["Jumlah Siswa"] == len(df)
+    assert summary["Laporan PDF"] is None
+
+    table_path = tmp_path / "hasil" / "siswa" / f"Hasil_Klasterisasi.{table_format}"
+    out = pd.read_csv(table_path) if table_format == "csv" else pd.read_parquet(table_path)
+    # Tabel hasil mempertahankan baris dan urutan aslinya.
+    assert out["Nama"].tolist() == df["Nama"].tolist()
+    assert out[NUMERIC_COLS].equals(df[NUMERIC_COLS])
+
+    features, _, _ = preprocess_table(df)
+    full_labels, _, _ = fit_kprototypes(features, 3, engine="numpy")
+    assert adjusted_rand_score(full_labels, out["Klaster"]) == pytest.approx(1.0)
+
+    bundle = load_artifacts(summary["Versi Model"], str(tmp_path / "artefak"), with_table=False)
+    assert bundle["meta"]["engine"] == "minibatch"
+    assert len(bundle["cluster_desc_map"]) == 3
+
+
+def test_chunked_run_rejects_unsupported_options(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--chunk-rows", "100", "--table-format", "xlsx"])
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--chunk-rows", "100", "--partition-by", "Kelas"])
+    assert "--chunk-rows" in capsys.readouterr().err
@@ -0,0 +1,34 @@
+from benchmarks.suite import compare_with_baseline
+
+
+def report(*rows):
+    return {"results": [
+        {"stage": stage, "rows": 1000, "min_s": min_s, "median_s": median_s, "peak_mb": 1.0}
+        for stage, min_s, median_s in rows
+    ]}
+
+
+def test_small_absolute_changes_are_noise():
+    baseline = report(("deskripsi", 0.004, 0.005))
+    # 1,31x pada tahap milidetik (seperti dua run identik berturut-turut) bukan regresi.
+    comparison = compare_with_baseline(report(("deskripsi", 0.00524, 0.009)), baseline)
+    assert comparison[0]["ratio"] > 1.25
+    assert not comparison[0]["regression"]
+
+
+def test_large_slowdown_is_a_regression():
+    baseline = report(("klasterisasi", 0.200, 0.210))
+    comparison = compare_with_baseline(report(("klasterisasi", 0.300, 0.310)), baseline)
+    assert comparison[0]["regression"]
+
+
+def test_comparison_uses_fastest_run_not_median():
+    # Satu pengulangan lambat menaikkan median, tetapi waktu tercepat tidak berubah.
+    baseline = report(("prediksi", 0.100, 0.105))
+    comparison = compare_with_baseline(report(("prediksi", 0.101, 0.180)), baseline)
+    assert not comparison[0]["regression"]
+
+
+def test_stages_missing_from_baseline_are_skipped():
+    comparison = compare_with_baseline(report(("pdf_fpdf", 1.0, 1.0)), report(("pdf", 0.01, 0.01)))
+    assert comparison == []
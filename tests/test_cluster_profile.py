@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cluster_profile import grouped_statistics
+
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+def expected_quantiles(numeric, labels, n_clusters):
+    # Acuan pandas: kuantil per klaster (interpolasi linier, NaN diabaikan).
+    grouped = pd.DataFrame(numeric).groupby(labels)
+    out = np.full((len(QUANTILES), n_clusters, numeric.shape[1]), np.nan)
+    for qi, q in enumerate(QUANTILES):
+        table = grouped.quantile(q).reindex(range(n_clusters))
+        out[qi] = table.to_numpy()
+    return out
+
+
+def test_quantiles_match_pandas_with_nans():
+    rng = np.random.default_rng(0)
+    n_clusters = 5
+    labels = rng.integers(0, 3, size=60)
+    numeric = rng.normal(70.0, 10.0, size=(60, 3)).round(1)
+    numeric[rng.random(numeric.shape) < 0.2] = np.nan
+    # Klaster 3: satu siswa tanpa nilai sama sekali; klaster 4 kosong.
+    labels = np.append(labels, 3)
+    numeric = np.vstack([numeric, np.full((1, 3), np.nan)])
+    # Klaster 2 kolom pertama: hanya satu nilai valid.
+    numeric[labels == 2, 0] = np.nan
+    numeric[np.flatnonzero(labels == 2)[0], 0] = 55.0
+
+    stats = grouped_statistics(labels, n_clusters, numeric=numeric, quantiles=QUANTILES)
+
+    assert stats["quantiles"].shape == (len(QUANTILES), n_clusters, 3)
+    np.testing.assert_allclose(stats["quantiles"], expected_quantiles(numeric, labels, n_clusters), equal_nan=True)
+
+
+@pytest.mark.parametrize("n_rows", [1, 2, 7])
+def test_quantiles_match_pandas_small_groups(n_rows):
+    labels = np.zeros(n_rows, dtype=np.int64)
+    numeric = np.arange(n_rows, 0, -1, dtype=np.float64)[:, None]
+    stats = grouped_statistics(labels, 1, numeric=numeric, quantiles=QUANTILES)
+    np.testing.assert_allclose(stats["quantiles"], expected_quantiles(numeric, labels, 1))
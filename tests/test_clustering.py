@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_roster
+from clustering import (cached_fit_kprototypes, cached_warm_fit_kprototypes, fit_kprototypes, get_result_cache,
+                        make_cache_key, make_warm_cache_key)
+from preprocessing import preprocess_table
+
+
+@pytest.fixture
+def data():
+    get_result_cache().clear()
+    features, _, _ = preprocess_table(generate_roster(300, seed=0))
+    _, previous_model, _ = fit_kprototypes(features.iloc[:200], 3, engine="numpy", random_state=1, n_init=1)
+    _, other_model, _ = fit_kprototypes(features.iloc[100:], 3, engine="numpy", random_state=2, n_init=1)
+    yield features, previous_model, other_model
+    get_result_cache().clear()
+
+
+def test_warm_key_never_matches_cold_key(data):
+    features, previous_model, other_model = data
+    cold = make_cache_key(features, 3, engine="numpy")
+    warm = make_warm_cache_key(features, 3, previous_model, engine="numpy")
+    assert warm != cold
+    assert warm != make_warm_cache_key(features, 3, other_model, engine="numpy")
+    assert warm == make_warm_cache_key(features, 3, previous_model, engine="numpy")
+
+
+def test_warm_start_runs_even_when_cold_result_is_cached(data):
+    features, previous_model, _ = data
+    cold = cached_fit_kprototypes(features, 3, engine="numpy")
+    warm, info = cached_warm_fit_kprototypes(features, 3, previous_model, engine="numpy")
+    assert info is not None
+    assert warm is not cold
+    # Fit dingin berikutnya tetap mendapat hasil dingin, bukan hasil warm start.
+    assert cached_fit_kprototypes(features, 3, engine="numpy") is cold
+
+
+def test_cold_fit_after_warm_start_is_a_cold_fit(data):
+    features, previous_model, _ = data
+    (warm_labels, _, _), _ = cached_warm_fit_kprototypes(features, 3, previous_model, engine="numpy")
+    cold_labels, cold_model, _ = cached_fit_kprototypes(features, 3, engine="numpy")
+    expected_labels, expected_model, _ = fit_kprototypes(features, 3, engine="numpy")
+    np.testing.assert_array_equal(cold_labels, expected_labels)
+    assert cold_model.cost_ == pytest.approx(expected_model.cost_)
+
+
+def test_warm_result_cached_per_previous_model(data):
+    features, previous_model, other_model = data
+    first, info = cached_warm_fit_kprototypes(features, 3, previous_model, engine="numpy")
+    again, again_info = cached_warm_fit_kprototypes(features, 3, previous_model, engine="numpy")
+    assert again is first and again_info is None
+    _, other_info = cached_warm_fit_kprototypes(features, 3, other_model, engine="numpy")
+    assert other_info is not None
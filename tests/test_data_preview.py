@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from data_preview import preview_window
+from schema import to_student_table
+
+
+@pytest.fixture
+def students():
+    return to_student_table(pd.DataFrame({
+        "No": [1, 2, 3, 4, 5],
+        "Nama": ["Budi", "Ani", "Citra", "Dewi", "Eko"],
+        "JK": ["L", "P", "P", "P", "L"],
+        "Kelas": ["XI IPA 1", "X IPA 2", "XII IPS 1", "X IPA 1", "XI IPA 1"],
+        "Rata Rata Nilai Akademik": [80.0, 75.5, 90.0, 60.0, 70.0],
+        "Kehadiran": [0.9, 0.8, 0.95, 0.7, 0.85],
+    }))
+
+
+@pytest.mark.parametrize("column", ["Kelas", "JK"])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_by_categorical_column(students, column, ascending):
+    assert isinstance(students[column].dtype, pd.CategoricalDtype)
+    window, total, _, _ = preview_window(students, ("test", column, ascending), sort_by=column, ascending=ascending)
+    expected = sorted(students[column].astype(str), reverse=not ascending)
+    assert total == len(students)
+    assert window.column(column).to_pylist() == expected
+
+
+def test_sort_and_filter_numeric(students):
+    window, total, n_pages, _ = preview_window(students, ("test", "numeric"), sort_by="Rata Rata Nilai Akademik",
+                                               filter_column="Kelas", filter_text="ipa", page_rows=2)
+    assert total == 4
+    assert n_pages == 2
+    assert window.column("Nama").to_pylist() == ["Dewi", "Eko"]
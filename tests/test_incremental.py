@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import adjusted_rand_score
+
+from clustering import fit_kprototypes
+from incremental import DRIFT_THRESHOLDS, IncrementalClusterState, append_students
+from preprocessing import preprocess_table
+from schema import CATEGORICAL_COLS, ID_COLS, NUMERIC_COLS, to_student_table
+
+NILAI, KEHADIRAN = NUMERIC_COLS
+# Kelompok laten: (nilai, kehadiran, pola ekskul); terpisah jelas agar prototipe stabil.
+GROUPS = [(62.0, 0.72, [1, 0, 0, 1]), (76.0, 0.86, [0, 1, 0, 0]), (90.0, 0.98, [0, 0, 1, 1])]
+
+
+def roster(n_per_group, seed, groups=(0, 1, 2), nilai_shift=0.0, first_no=1):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for g in groups:
+        nilai, kehadiran, pattern = GROUPS[g]
+        frame = pd.DataFrame({
+            NILAI: rng.normal(nilai + nilai_shift, 2.0, n_per_group).round(2),
+            KEHADIRAN: rng.normal(kehadiran, 0.01, n_per_group).round(4),
+        })
+        for col, flag in zip(CATEGORICAL_COLS, pattern):
+            frame[col] = np.where(rng.random(n_per_group) < 0.05, 1 - flag, flag)
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "No", np.arange(first_no, first_no + len(df)))
+    df.insert(1, "Nama", [f"Siswa {i}" for i in df["No"]])
+    df.insert(2, "JK", rng.choice(["L", "P"], len(df)))
+    df.insert(3, "Kelas", rng.choice(["X IPA 1", "XI IPS 2"], len(df)))
+    return df[ID_COLS + NUMERIC_COLS + CATEGORICAL_COLS]
+
+
+@pytest.fixture(scope="module")
+def base():
+    df = roster(200, seed=0)
+    features, scaler, _ = preprocess_table(df)
+    labels, model, categorical = fit_kprototypes(features, 3, engine="numpy")
+    return to_student_table(df), features, scaler, labels, model, categorical
+
+
+def new_state(base):
+    _, features, scaler, labels, model, categorical = base
+    return IncrementalClusterState(model, scaler, categorical, features, labels)
+
+
+def test_append_keeps_prototypes_close_to_refit(base):
+    _, features, _, _, _, categorical = base
+    state = new_state(base)
+    labelled, new_features, _ = state.append(roster(10, seed=1, first_no=1001))
+    refit_labels, refit_model, _ = fit_kprototypes(pd.concat([features, new_features], ignore_index=True), 3,
+                                                   engine="numpy")
+    # Prototipe dicocokkan menurut urutan nilai akademik (kelompok terpisah pada sumbu itu).
+    incremental = state.model._num_centroids[np.argsort(state.model._num_centroids[:, 0])]
+    refit = refit_model._num_centroids[np.argsort(refit_model._num_centroids[:, 0])]
+    np.testing.assert_allclose(incremental, refit, atol=0.02)
+    assert adjusted_rand_score(refit_labels[len(features):], labelled["Klaster"]) == pytest.approx(1.0)
+    assert state.exceeded_thresholds() == []
+
+
+@pytest.mark.parametrize("new_rows, expected", [
+    # Banyak siswa dengan sebaran yang sama: hanya proporsinya yang melewati ambang.
+    (lambda: roster(70, seed=2, first_no=1001), ["Proporsi Siswa Tambahan"]),
+    # Dua siswa yang jauh dari semua prototipe: biaya rata-ratanya melonjak.
+    (lambda: roster(1, seed=3, groups=(0, 1), first_no=1001).assign(**{NILAI: 20.0, KEHADIRAN: 0.3}),
+     ["Rasio Biaya Siswa Tambahan"]),
+    # Siswa baru semuanya dari kelompok atas (sedikit di atasnya): rata-rata seluruh siswa bergeser.
+    (lambda: roster(140, seed=5, groups=(2,), nilai_shift=2.0, first_no=1001), ["Pergeseran Skala"]),
+])
+def test_each_threshold_trips(base, new_rows, expected):
+    state = new_state(base)
+    state.append(new_rows())
+    assert state.exceeded_thresholds() == expected
+
+
+def test_prototype_shift_threshold_trips(base):
+    # Pergeseran prototipe selalu disertai biaya tinggi pada data ini, jadi ambang lain dinonaktifkan.
+    thresholds = dict.fromkeys(DRIFT_THRESHOLDS, float("inf"))
+    thresholds["Pergeseran Prototipe"] = DRIFT_THRESHOLDS["Pergeseran Prototipe"]
+    small = new_state(base)
+    small.append(roster(140, seed=6, groups=(0,), nilai_shift=-4.0, first_no=1001))
+    assert small.exceeded_thresholds(thresholds) == []
+    shifted = new_state(base)
+    shifted.append(roster(140, seed=6, groups=(0,), nilai_shift=-8.0, first_no=1001))
+    assert shifted.drift()["Pergeseran Prototipe"] > DRIFT_THRESHOLDS["Pergeseran Prototipe"]
+    assert shifted.exceeded_thresholds(thresholds) == ["Pergeseran Prototipe"]
+
+
+def test_append_without_drift_leaves_inputs_untouched(base):
+    table, features, _, labels, model, _ = base
+    state = new_state(base)
+    before = state.model._num_centroids.copy()
+    df_clustered = features.assign(Klaster=labels)
+
+    def refit(df_original):
+        raise AssertionError("Fit ulang tidak boleh dijalankan tanpa drift.")
+
+    result = append_students(state, table, features, df_clustered, roster(10, seed=1, first_no=1001), refit)
+    assert result["exceeded"] == []
+    assert len(result["df_original"]) == len(result["df_clustered"]) == len(table) + 30
+    assert result["state"].n_appended == 30
+    assert state.n_appended == 0
+    np.testing.assert_array_equal(state.model._num_centroids, before)
+
+
+def test_failed_refit_leaves_session_data_unchanged(base):
+    table, features, _, labels, _, _ = base
+    state = new_state(base)
+    before = state.model._num_centroids.copy()
+    df_clustered = features.assign(Klaster=labels)
+    snapshots = [frame.copy() for frame in (table, features, df_clustered)]
+    calls = []
+
+    def refit(df_original):
+        calls.append(len(df_original))
+        raise ValueError("Klasterisasi ulang penuh gagal; data sesi tidak diubah.")
+
+    with pytest.raises(ValueError, match="gagal"):
+        append_students(state, table, features, df_clustered, roster(70, seed=2, first_no=1001), refit)
+    assert calls == [len(table) + 210]
+    assert state.n_appended == 0
+    np.testing.assert_array_equal(state.model._num_centroids, before)
+    for frame, snapshot in zip((table, features, df_clustered), snapshots):
+        pd.testing.assert_frame_equal(frame, snapshot)
+
+
+def test_refit_result_replaces_incremental_state(base):
+    table, features, _, labels, _, _ = base
+    df_clustered = features.assign(Klaster=labels)
+
+    def refit(df_original):
+        df_preprocessed, scaler, _ = preprocess_table(df_original)
+        refit_labels, model, categorical = fit_kprototypes(df_preprocessed, 3, engine="numpy")
+        return {"df_preprocessed": df_preprocessed, "scaler": scaler, "df_clustered": df_preprocessed.assign(Klaster=refit_labels),
+                "model": model, "categorical": categorical}
+
+    result = append_students(new_state(base), table, features, df_clustered, roster(70, seed=2, first_no=1001), refit)
+    assert result["exceeded"] == ["Proporsi Siswa Tambahan"]
+    assert result["state"] is None
+    assert len(result["df_clustered"]) == len(result["df_original"]) == len(table) + 210
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import adjusted_rand_score
+
+from clustering import fit_kprototypes
+from kproto_engine import FastKPrototypes, assign_labels, encode_categorical, split_mixed_matrix
+from schema import ALL_FEATURES_FOR_CLUSTERING, CATEGORICAL_COLS, NUMERIC_COLS
+
+
+def seeded_roster(n_per_group=80, seed=0):
+    # Tiga kelompok siswa yang terpisah jelas pada fitur numerik (sudah dinormalisasi)
+    # dan pola ekskul, dengan sedikit derau pada flag.
+    rng = np.random.default_rng(seed)
+    centers = [(-1.5, -1.0), (0.0, 1.2), (1.6, -0.2)]
+    patterns = [(1, 0, 0, 1), (0, 1, 0, 0), (0, 0, 1, 1)]
+    frames = []
+    for center, pattern in zip(centers, patterns):
+        numeric = rng.normal(center, 0.25, size=(n_per_group, len(NUMERIC_COLS)))
+        flags = np.tile(pattern, (n_per_group, 1))
+        noise = rng.random(flags.shape) < 0.05
+        flags = np.where(noise, 1 - flags, flags)
+        frame = pd.DataFrame(numeric, columns=NUMERIC_COLS)
+        for j, col in enumerate(CATEGORICAL_COLS):
+            frame[col] = flags[:, j].astype(str)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)[ALL_FEATURES_FOR_CLUSTERING]
+
+
+@pytest.fixture(scope="module")
+def fits():
+    df = seeded_roster()
+    kmodes_labels, kmodes_model, _ = fit_kprototypes(df, 3, engine="kmodes", n_jobs=1)
+    numpy_labels, numpy_model, _ = fit_kprototypes(df, 3, engine="numpy")
+    return df, kmodes_labels, kmodes_model, numpy_labels, numpy_model
+
+
+def test_numpy_engine_matches_kmodes_partition(fits):
+    _, kmodes_labels, _, numpy_labels, _ = fits
+    assert adjusted_rand_score(kmodes_labels, numpy_labels) == pytest.approx(1.0)
+
+
+def test_numpy_engine_cost_matches_kmodes(fits):
+    _, _, kmodes_model, _, numpy_model = fits
+    assert numpy_model.gamma == pytest.approx(kmodes_model.gamma)
+    assert numpy_model.cost_ == pytest.approx(kmodes_model.cost_, rel=1e-6)
+
+
+def test_cost_equals_sum_of_assigned_distances(fits):
+    df, _, _, numpy_labels, numpy_model = fits
+    categorical = [df.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    Xnum, cat_columns = split_mixed_matrix(df, categorical)
+    Xcat, _ = encode_categorical(cat_columns, categories=numpy_model.categories_)
+    labels, min_dist = assign_labels(Xnum, Xcat, numpy_model._num_centroids, numpy_model._cat_centroids,
+                                     numpy_model.gamma)
+    assert (labels == numpy_labels).all()
+    assert min_dist.sum() == pytest.approx(numpy_model.cost_)
+
+
+def test_predict_is_consistent_with_fit(fits):
+    df, _, _, numpy_labels, numpy_model = fits
+    categorical = [df.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    assert (numpy_model.predict(df, categorical=categorical) == numpy_labels).all()
+
+
+def test_seeded_fit_is_deterministic():
+    df = seeded_roster(seed=1)
+    categorical = [df.columns.get_loc(c) for c in CATEGORICAL_COLS]
+    first = FastKPrototypes(n_clusters=3, random_state=42).fit_predict(df, categorical=categorical)
+    second = FastKPrototypes(n_clusters=3, random_state=42).fit_predict(df, categorical=categorical)
+    assert (first == second).all()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_roster
+from partitioning import (
+    UNKNOWN_PARTITION_LABEL,
+    fit_partitioned,
+    load_partitioned_artifacts,
+    predict_partitioned,
+    save_partitioned_artifacts,
+)
+from prediction import DESCRIPTION_COL
+
+KELAS = ["X IPA 1", "XI IPS 2", "XII IPA 3"]
+N_CLUSTERS = 2
+
+
+@pytest.fixture(scope="module")
+def partitioned():
+    df = generate_roster(240, seed=0, missing_rate=0.0)
+    df["Kelas"] = np.array(KELAS, dtype=object)[np.arange(len(df)) % len(KELAS)]
+    table, model, stats = fit_partitioned(df, "Kelas", N_CLUSTERS, engine="numpy", max_workers=1)
+    return df, table, model, stats
+
+
+def test_training_rows_route_back_to_their_labels(partitioned):
+    df, table, model, stats = partitioned
+    assert stats["Jumlah Partisi"] == len(KELAS)
+    assert model.n_clusters == len(KELAS) * N_CLUSTERS
+    _, labels = model.predict(df)
+    np.testing.assert_array_equal(labels, table["Klaster"].to_numpy())
+    # Label global setiap siswa berada di rentang offset partisi kelasnya sendiri.
+    for kelas, label in zip(table["Kelas"], table["Klaster"]):
+        assert model.partition_of(label)[0] == kelas
+
+
+def test_unseen_partition_gets_unknown_label(partitioned):
+    df, table, model, _ = partitioned
+    df_new = df.head(4).assign(Kelas=["XII IPS 9", "XII IPS 9", KELAS[0], KELAS[1]])
+    result, stats = predict_partitioned(df_new, model)
+    assert result["Klaster"].tolist()[:2] == [UNKNOWN_PARTITION_LABEL] * 2
+    assert result[DESCRIPTION_COL].tolist()[:2] == ["Tidak ada model untuk Kelas 'XII IPS 9'."] * 2
+    assert (result["Klaster"].iloc[2:] != UNKNOWN_PARTITION_LABEL).all()
+    assert stats["Tanpa Model Partisi"] == 2
+
+
+def test_artifacts_round_trip(tmp_path, partitioned):
+    df, table, model, _ = partitioned
+    save_partitioned_artifacts(model, df_clustered=table, artifact_dir=str(tmp_path))
+    loaded = load_partitioned_artifacts(str(tmp_path))
+    assert loaded.key == model.key
+    assert loaded.engine == model.engine
+    assert {value: part["offset"] for value, part in loaded.partitions.items()} == \
+        {value: part["offset"] for value, part in model.partitions.items()}
+    assert loaded.cluster_desc_map == model.cluster_desc_map
+    _, labels = loaded.predict(df)
+    np.testing.assert_array_equal(labels, table["Klaster"].to_numpy())
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+from pdf_reports import generate_profile_pdf, generate_profile_pdf_fpdf
+from schema import CATEGORICAL_COLS
+
+pypdf = pytest.importorskip("pypdf")
+
+CLUSTER_DESC_MAP = {0: "Siswa aktif (banyak ekskul) dengan nilai rata-rata \\ tinggi.", 1: "Perlu pendampingan."}
+
+
+def pdf_text(data):
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() for page in reader.pages)
+
+
+def student(nama):
+    record = {
+        "No": 17,
+        "Nama": nama,
+        "JK": "P",
+        "Kelas": "XI (IPA) 2",
+        "Rata Rata Nilai Akademik": 81.25,
+        "Kehadiran": 0.935,
+    }
+    record.update({col: "1" if i % 2 == 0 else "0" for i, col in enumerate(CATEGORICAL_COLS)})
+    return record
+
+
+@pytest.mark.parametrize("nama", [
+    "Budi Santoso",
+    "Siti (Ani) Rahma",
+    "A\\B",
+    "Dewi ((x)) \\ )( \\(",
+])
+@pytest.mark.parametrize("klaster", [0, 1])
+def test_template_text_matches_fpdf(nama, klaster):
+    record = student(nama)
+    template_text = pdf_text(generate_profile_pdf(nama, record, klaster, CLUSTER_DESC_MAP))
+    fpdf_text = pdf_text(generate_profile_pdf_fpdf(nama, record, klaster, CLUSTER_DESC_MAP))
+    assert nama in template_text
+    assert template_text == fpdf_text
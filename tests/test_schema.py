@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction import validate_student_rows
+from schema import CATEGORICAL_COLS, NUMERIC_COLS, to_student_table
+from streaming import preprocess_chunk
+
+
+def roster(**flags):
+    n_rows = len(next(iter(flags.values())))
+    df = pd.DataFrame({
+        "No": range(1, n_rows + 1),
+        "Nama": [f"Siswa {i}" for i in range(1, n_rows + 1)],
+        "Rata Rata Nilai Akademik": np.linspace(60.0, 90.0, n_rows),
+        "Kehadiran": np.linspace(0.7, 1.0, n_rows),
+    })
+    for col in CATEGORICAL_COLS:
+        df[col] = flags.get(col.replace("Ekstrakurikuler ", ""), [0] * n_rows)
+    return df
+
+
+def test_flags_accept_numbers_and_yes_no_vocabulary():
+    df = roster(Komputer=[1, 0, "1", "0", "Ya", " tidak ", "YES", "no", None, 1.0])
+    table = to_student_table(df)
+    assert table["Ekstrakurikuler Komputer"].dtype == np.uint8
+    assert table["Ekstrakurikuler Komputer"].tolist() == [1, 0, 1, 0, 1, 0, 1, 0, 0, 1]
+
+
+@pytest.mark.parametrize("bad", ["x", 2, 256, -1, 0.5])
+def test_flags_reject_unknown_values_by_student_name(bad):
+    df = roster(Pramuka=[1, bad, 0])
+    with pytest.raises(ValueError, match=r"'Ekstrakurikuler Pramuka'.*Siswa 2 \(baris 2\)"):
+        to_student_table(df)
+
+
+def test_flag_error_lists_every_bad_column():
+    df = roster(Komputer=["Ya", "mungkin"], Menjahit=[3, 0])
+    with pytest.raises(ValueError) as error:
+        to_student_table(df)
+    message = str(error.value)
+    assert "'Ekstrakurikuler Komputer' berisi 'mungkin' pada Siswa 2 (baris 2)" in message
+    assert "'Ekstrakurikuler Menjahit' berisi 3 pada Siswa 1 (baris 1)" in message
+
+
+def test_streaming_chunks_validate_flags_with_global_row_numbers():
+    from sklearn.preprocessing import StandardScaler
+    chunk = roster(Pertanian=[0, "Ya", "sering"]).set_axis([100, 101, 102])
+    scaler = StandardScaler().fit(chunk[NUMERIC_COLS].to_numpy(dtype=np.float64))
+    with pytest.raises(ValueError, match=r"'sering' pada Siswa 3 \(baris 103\)"):
+        preprocess_chunk(chunk, scaler)
+    out = preprocess_chunk(chunk.iloc[:2], scaler)
+    assert out["Ekstrakurikuler Pertanian"].tolist() == [0, 1]
+
+
+def test_validate_student_rows_uses_flag_vocabulary():
+    validate_student_rows(roster(Komputer=["Ya", "Tidak"]))
+    with pytest.raises(ValueError, match="Siswa 1"):
+        validate_student_rows(roster(Komputer=["kadang", 0]))
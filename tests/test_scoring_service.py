@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_roster
+from clustering import fit_kprototypes
+from cluster_profile import build_cluster_profile, describe_clusters
+from preprocessing import preprocess_table
+from schema import to_student_table
+from scoring_service import MicroBatcher, ScoringService
+
+
+@pytest.fixture(scope="module")
+def service():
+    df = generate_roster(200, seed=0)
+    features, scaler, _ = preprocess_table(df)
+    labels, model, categorical = fit_kprototypes(features, 3, engine="numpy")
+    desc_map = describe_clusters(build_cluster_profile(to_student_table(df), features, labels, 3))
+    bundle = {"scaler": scaler, "model": model, "categorical_indices": categorical, "cluster_desc_map": desc_map}
+    # Jendela tunggu panjang agar permintaan yang dikirim berurutan masuk batch yang sama.
+    return ScoringService(bundle, max_wait_ms=200)
+
+
+def test_missing_column_rejected_even_when_batched(service):
+    valid = generate_roster(3, seed=1)
+    invalid = generate_roster(2, seed=2).drop(columns=["Kehadiran"])
+    valid_future = service.batcher.submit(valid)
+    invalid_future = service.batcher.submit(invalid)
+    with pytest.raises(ValueError, match="Kehadiran"):
+        invalid_future.result(timeout=10)
+    assert len(valid_future.result(timeout=10)) == 3
+
+
+def test_non_numeric_value_rejected(service):
+    df = generate_roster(2, seed=3).astype({"Rata Rata Nilai Akademik": object})
+    df.loc[0, "Rata Rata Nilai Akademik"] = "delapan puluh"
+    with pytest.raises(ValueError, match="bukan angka"):
+        service.score(df, timeout=10)
+
+
+def test_batch_failure_only_fails_offending_request():
+    def predict(df):
+        if (df["x"] < 0).any():
+            raise ValueError("nilai negatif")
+        return df.assign(y=df["x"] * 2)
+
+    batcher = MicroBatcher(predict, max_wait_ms=200)
+    good = batcher.submit(pd.DataFrame({"x": [1, 2]}))
+    bad = batcher.submit(pd.DataFrame({"x": [-1]}))
+    other = batcher.submit(pd.DataFrame({"x": [5]}))
+    assert good.result(timeout=10)["y"].tolist() == [2, 4]
+    assert other.result(timeout=10)["y"].tolist() == [10]
+    with pytest.raises(ValueError, match="negatif"):
+        bad.result(timeout=10)